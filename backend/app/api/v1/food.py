@@ -14,7 +14,7 @@ from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
 from app.core.security import verify_token
 from app.models.food import FoodAnalysisResponse, FoodAnalysisRequest, FoodItem
 from app.services.image_recognition import ImageRecognitionService
-from app.services.nutrition_analysis import NutritionAnalysisService
+from app.services.nutrition_analysis import get_nutrition_service
 from app.services.emotion_analysis import EmotionAnalysisService
 from typing import Optional
 
@@ -124,7 +124,7 @@ async def upload_food_image(
     # 4. 서비스 레이어 초기화
     # Initialize service layer components
     image_service = ImageRecognitionService()  # YOLO v8 + Claude Vision
-    nutrition_service = NutritionAnalysisService()  # USDA DB 조회
+    nutrition_service = get_nutrition_service()  # USDA DB 조회 (프로세스 공용)
     emotion_service = EmotionAnalysisService()  # 8가지 감정 분류
 
     # === 1단계: AI 기반 음식 인식 ===
@@ -140,22 +140,22 @@ async def upload_food_image(
     food_items = []
     total_calories = 0
 
-    for detection in detections:
-        # 바운딩 박스 크기로 음식 분량 추정 (g 단위)
-        # Estimate portion size from bounding box (in grams)
-        # 휴리스틱: 이미지의 50% = 200g 기준
-        # Heuristic: 50% of image = 200g baseline
-        portion_grams = image_service.estimate_portion_size(detection['bbox'])
-
-        # USDA FoodData Central DB에서 영양 정보 조회
-        # Query nutrition information from USDA FoodData Central
-        # 캐싱: Redis에 24시간 저장 (동일 음식 재조회 방지)
-        # Caching: Stored in Redis for 24h (avoid redundant lookups)
-        nutrition = await nutrition_service.get_nutrition_info(
-            detection['class'],  # 음식 이름 (예: "apple", "rice")
-            portion_grams  # 추정 분량 (g)
-        )
-
+    # 바운딩 박스 크기로 음식 분량 추정 (g 단위, 전체 탐지 결과 일괄 계산)
+    # Estimate portion sizes from bounding boxes (in grams, all detections at once)
+    # 휴리스틱: 이미지의 50% = 200g 기준
+    # Heuristic: 50% of image = 200g baseline
+    portions = image_service.estimate_portion_sizes([detection['bbox'] for detection in detections])
+
+    # USDA FoodData Central DB에서 영양 정보 일괄 조회
+    # Query nutrition information from USDA FoodData Central for all foods at once
+    # 캐싱: Redis에 24시간 저장 (MGET 한 번으로 조회, 동일 음식 재조회 방지)
+    # Caching: Stored in Redis for 24h (read with one MGET, avoid redundant lookups)
+    nutritions = await nutrition_service.get_nutrition_info_batch([
+        (detection['class'], portion_grams)  # (음식 이름, 추정 분량 g)
+        for detection, portion_grams in zip(detections, portions)
+    ])
+
+    for detection, portion_grams, nutrition in zip(detections, portions, nutritions):
         if nutrition:
             # 인식된 음식을 FoodItem 객체로 변환
             # Convert detected food to FoodItem object
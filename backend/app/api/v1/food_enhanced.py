@@ -2,17 +2,31 @@
 Food API Routes - Enhanced Implementation
 Mode 1: Real-time emotion-nutrition analysis with full database integration
 """
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, BackgroundTasks, Query, Request
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    File,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    UploadFile
+)
+from fastapi.responses import StreamingResponse
 from app.core.security import verify_token
 from app.core.exceptions import PsiException
-from app.models.food import FoodAnalysisResponse, FoodItem
+from app.core.serialization import NDJSON_MEDIA_TYPE, ndjson_lines, negotiate_response
+from app.models.food import FOOD_ITEM_LIST_ADAPTER, FoodAnalysisResponse, FoodItem
 from app.services.image_recognition import ImageRecognitionService
-from app.services.nutrition_analysis import NutritionAnalysisService
+from app.services.nutrition_analysis import get_nutrition_service
 from app.services.emotion_analysis import EmotionAnalysisService
 from app.services.database_service import DatabaseService
 from typing import Optional, List
+from datetime import datetime
 import logging
 import io
+import uuid
 from PIL import Image
 import boto3
 from app.core.config import settings
@@ -26,7 +40,7 @@ class FoodUploadService:
 
     def __init__(self):
         self.image_service = ImageRecognitionService()
-        self.nutrition_service = NutritionAnalysisService()
+        self.nutrition_service = get_nutrition_service()
         self.emotion_service = EmotionAnalysisService()
         self.db_service = DatabaseService()
 
@@ -182,16 +196,20 @@ class FoodUploadService:
         food_items = []
         total_calories = 0.0
 
-        for detection in detections:
-            # Estimate portion size
-            portion_grams = self.image_service.estimate_portion_size(detection['bbox'])
+        # Estimate portion sizes for all detections at once
+        portions = self.image_service.estimate_portion_sizes(
+            [detection['bbox'] for detection in detections]
+        )
 
-            # Get nutrition info
-            nutrition = await self.nutrition_service.get_nutrition_info(
-                detection['class'],
-                portion_grams
-            )
+        # Get nutrition info for all foods with one cache round trip
+        nutritions = await self.nutrition_service.get_nutrition_info_batch(
+            [
+                (detection['class'], portion_grams)
+                for detection, portion_grams in zip(detections, portions)
+            ]
+        )
 
+        for detection, portion_grams, nutrition in zip(detections, portions, nutritions):
             if nutrition:
                 food_items.append(FoodItem(
                     name=detection['class'],
@@ -222,6 +240,7 @@ class FoodUploadService:
         recommendation = "Enjoy your meal mindfully!"
         emotion_type = None
         emotion_score = None
+        emotion_data = None
 
         if hrv and heart_rate:
             emotion_result = await self.emotion_service.classify_emotion(hrv, heart_rate)
@@ -241,33 +260,32 @@ class FoodUploadService:
                 total_nutrition
             )
 
-            # Save emotion data
-            await self.db_service.save_emotion_data(
-                user_id=user_id,
-                hrv=hrv,
-                heart_rate=heart_rate,
-                coherence=0.5,  # TODO: Calculate from HRV
-                emotion_type=emotion_type,
-                emotion_score=emotion_score
-            )
+            emotion_data = {
+                'hrv': hrv,
+                'heart_rate': heart_rate,
+                'coherence': 0.5,  # TODO: Calculate from HRV
+                'emotion_type': emotion_type,
+                'emotion_score': emotion_score
+            }
 
-        # 8. Save food record to database
-        food_items_dict = [item.dict() for item in food_items]
+        # 8. Save food record and emotion data, then count the analysis
+        food_items_dict = FOOD_ITEM_LIST_ADAPTER.dump_python(food_items)
 
-        await self.db_service.save_food_record(
+        await self.db_service.save_analysis_bundle(
             user_id=user_id,
-            image_url=image_url,
-            foods=food_items_dict,
-            total_calories=total_calories,
-            nutrition=total_nutrition,
-            emotion_state=emotion_type,
-            emotion_score=emotion_score
+            food_record={
+                'image_url': image_url,
+                'foods': food_items_dict,
+                'total_calories': total_calories,
+                'nutrition': total_nutrition,
+                'emotion_state': emotion_type,
+                'emotion_score': emotion_score
+            },
+            usage_type='food_analyses',
+            emotion_data=emotion_data
         )
 
-        # 9. Increment usage counter
-        await self.db_service.increment_daily_usage(user_id, 'food_analyses')
-
-        # 10. Calculate XP
+        # 9. Calculate XP
         xp_gained = 15 + len(food_items) * 5
 
         return FoodAnalysisResponse(
@@ -286,13 +304,14 @@ def get_food_service() -> FoodUploadService:
     return FoodUploadService()
 
 
-@router.post("/upload", response_model=FoodAnalysisResponse)
+@router.post("/upload", responses={200: {"model": FoodAnalysisResponse}})
 async def upload_food_image(
     file: UploadFile = File(...),
     hrv: Optional[float] = Query(None, ge=10.0, le=200.0, description="Heart Rate Variability in ms"),
     heart_rate: Optional[int] = Query(None, ge=30, le=220, description="Heart rate in bpm"),
     user_id: str = Depends(verify_token),
-    food_service: FoodUploadService = Depends(get_food_service)
+    food_service: FoodUploadService = Depends(get_food_service),
+    accept: Optional[str] = Header(None)
 ):
     """
     Upload food image for complete analysis
@@ -311,6 +330,7 @@ async def upload_food_image(
     - file: Food image (JPG/PNG, max 10MB)
     - hrv: Heart Rate Variability from wearable (optional)
     - heart_rate: Heart rate in bpm from wearable (optional)
+    - Accept: send `application/msgpack` for a MessagePack body instead of JSON
 
     **Returns:**
     - Detected foods with nutrition breakdown
@@ -365,7 +385,7 @@ async def upload_food_image(
         )
 
         logger.info(f"Successfully processed food upload for user {user_id}")
-        return result
+        return negotiate_response(result, accept)
 
     except HTTPException:
         raise
@@ -384,6 +404,7 @@ async def upload_food_image(
 async def get_food_history(
     limit: int = 10,
     offset: int = 0,
+    cursor: Optional[str] = None,
     user_id: str = Depends(verify_token)
 ):
     """
@@ -391,11 +412,13 @@ async def get_food_history(
 
     **Parameters:**
     - limit: Number of records to return (default: 10, max: 100)
-    - offset: Offset for pagination (default: 0)
+    - cursor: `next_cursor` from the previous page (preferred)
+    - offset: Offset for pagination (deprecated, ignored when cursor is set)
 
     **Returns:**
     - List of previous food analyses
     - Includes nutrition, emotion, and timestamps
+    - next_cursor for the following page (null on the last page)
     """
     # Validate parameters
     if limit < 1 or limit > 100:
@@ -410,19 +433,37 @@ async def get_food_history(
             detail="Offset must be non-negative"
         )
 
+    keyset = None
+    if cursor:
+        created_at, _, record_id = cursor.partition("|")
+        try:
+            keyset = (datetime.fromisoformat(created_at), str(uuid.UUID(record_id)))
+        except ValueError:
+            raise HTTPException(
+                status_code=400,
+                detail="Invalid pagination cursor"
+            )
+
     try:
         db_service = DatabaseService()
         history = await db_service.get_food_history(
             user_id=user_id,
             limit=limit,
-            offset=offset
+            offset=offset,
+            cursor=keyset
         )
 
+        next_cursor = None
+        if len(history) == limit:
+            last = history[-1]
+            next_cursor = f"{last['created_at']}|{last['record_id']}"
+
         return {
             "history": history,
             "count": len(history),
             "limit": limit,
-            "offset": offset
+            "offset": offset,
+            "next_cursor": next_cursor
         }
 
     except Exception as e:
@@ -433,6 +474,22 @@ async def get_food_history(
         )
 
 
+@router.get("/history/export")
+async def export_food_history(user_id: str = Depends(verify_token)):
+    """
+    Export the user's complete food history
+
+    **Returns:**
+    - Newline-delimited JSON, one food record per line, newest first
+    - Streamed from a database cursor, so large histories are not buffered
+    """
+    db_service = DatabaseService()
+    return StreamingResponse(
+        ndjson_lines(db_service.stream_food_history(user_id)),
+        media_type=NDJSON_MEDIA_TYPE
+    )
+
+
 @router.get("/stats")
 async def get_food_stats(
     days: int = 7,
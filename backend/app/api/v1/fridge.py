@@ -14,7 +14,7 @@ from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
 from app.core.security import verify_token
 from app.models.recipe import FridgeDetectionResponse, DetectedIngredient
 from app.services.image_recognition import ImageRecognitionService
-from app.services.recipe_matching import RecipeMatchingService
+from app.services.recipe_matching import get_recipe_service
 from app.services.emotion_analysis import EmotionAnalysisService
 from typing import List, Optional
 
@@ -114,7 +114,7 @@ async def detect_fridge_ingredients(
     # 2. 서비스 레이어 초기화
     # Initialize service layer components
     image_service = ImageRecognitionService()  # YOLO v8 음식 인식
-    recipe_service = RecipeMatchingService()  # TF-IDF 레시피 매칭
+    recipe_service = get_recipe_service()  # TF-IDF 레시피 매칭 (프로세스 공용)
     emotion_service = EmotionAnalysisService()  # 8가지 감정 분류
 
     # === 1단계: 모든 이미지에서 재료 인식 ===
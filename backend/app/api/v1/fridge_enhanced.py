@@ -2,12 +2,13 @@
 Fridge API Routes - Enhanced Implementation
 Mode 2: Emotion-based fridge recipe recommendations
 """
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query, Header
 from app.core.security import verify_token
 from app.core.exceptions import PsiException
+from app.core.serialization import negotiate_response
 from app.models.recipe import FridgeDetectionResponse, DetectedIngredient
 from app.services.image_recognition import ImageRecognitionService
-from app.services.recipe_matching import RecipeMatchingService
+from app.services.recipe_matching import get_recipe_service
 from app.services.emotion_analysis import EmotionAnalysisService
 from app.services.database_service import DatabaseService
 from typing import List, Optional, Dict
@@ -23,7 +24,7 @@ class FridgeDetectionService:
 
     def __init__(self):
         self.image_service = ImageRecognitionService()
-        self.recipe_service = RecipeMatchingService()
+        self.recipe_service = get_recipe_service()
         self.emotion_service = EmotionAnalysisService()
         self.db_service = DatabaseService()
 
@@ -229,8 +230,8 @@ class FridgeDetectionService:
         # 5. Analyze emotion
         emotion_type = 'calmness'  # Default
         if hrv and heart_rate:
-            emotion_result = await self.emotion_service.classify_emotion(hrv, heart_rate)
-            emotion_type = emotion_result.type
+            # Only the winning emotion is needed here: use the precomputed lookup table
+            emotion_type, emotion_score = self.emotion_service.classify_top_emotion(hrv, heart_rate)
 
             # Save emotion data
             await self.db_service.save_emotion_data(
@@ -239,7 +240,7 @@ class FridgeDetectionService:
                 heart_rate=heart_rate,
                 coherence=0.5,
                 emotion_type=emotion_type,
-                emotion_score=emotion_result.score
+                emotion_score=emotion_score
             )
 
         # 6. Get user preferences
@@ -282,13 +283,14 @@ def get_fridge_service() -> FridgeDetectionService:
     return FridgeDetectionService()
 
 
-@router.post("/detect", response_model=FridgeDetectionResponse)
+@router.post("/detect", responses={200: {"model": FridgeDetectionResponse}})
 async def detect_fridge_ingredients(
     files: List[UploadFile] = File(...),
     hrv: Optional[float] = Query(None, ge=10.0, le=200.0, description="Heart Rate Variability in ms"),
     heart_rate: Optional[int] = Query(None, ge=30, le=220, description="Heart rate in bpm"),
     user_id: str = Depends(verify_token),
-    fridge_service: FridgeDetectionService = Depends(get_fridge_service)
+    fridge_service: FridgeDetectionService = Depends(get_fridge_service),
+    accept: Optional[str] = Header(None)
 ):
     """
     Detect ingredients and get recipe recommendations
@@ -306,6 +308,7 @@ async def detect_fridge_ingredients(
     - files: List of fridge images (1-5 photos, JPG/PNG)
     - hrv: Heart Rate Variability from wearable (optional)
     - heart_rate: Heart rate in bpm (optional)
+    - Accept: send `application/msgpack` for a MessagePack body instead of JSON
 
     **Returns:**
     - Detected ingredients with confidence
@@ -332,7 +335,7 @@ async def detect_fridge_ingredients(
         )
 
         logger.info(f"Successfully processed fridge detection for user {user_id}")
-        return result
+        return negotiate_response(result, accept)
 
     except HTTPException:
         raise
@@ -2,9 +2,11 @@
 Wellness API Routes - Enhanced Implementation
 Mode 3: Comprehensive emotion wellness hub with analytics
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from app.core.security import verify_token
 from app.core.exceptions import PsiException
+from app.core.serialization import NDJSON_MEDIA_TYPE, ndjson_lines
 from app.models.emotion import WellnessResponse, EmotionAnalysisResult
 from app.services.emotion_analysis import EmotionAnalysisService
 from app.services.database_service import DatabaseService
@@ -374,7 +376,7 @@ class WellnessService:
         Returns:
             Trend analysis with insights
         """
-        history = await self.db_service.get_emotion_history(user_id, days)
+        history, truncated = await self.db_service.get_full_emotion_history(user_id, days)
 
         if not history:
             return {
@@ -410,6 +412,7 @@ class WellnessService:
         insights = {
             "period_days": days,
             "total_readings": len(history),
+            "truncated": truncated,
             "dominant_emotion": {
                 "type": dominant_emotion[0],
                 "percentage": round((dominant_emotion[1] / len(history)) * 100, 1)
@@ -493,7 +496,7 @@ def get_wellness_service() -> WellnessService:
     return WellnessService()
 
 
-@router.get("/check", response_model=WellnessResponse)
+@router.get("/check", responses={200: {"model": WellnessResponse}})
 async def wellness_check(
     hrv: Optional[float] = Query(None, ge=10.0, le=200.0, description="Heart Rate Variability in ms"),
     heart_rate: Optional[int] = Query(None, ge=30, le=220, description="Heart rate in bpm"),
@@ -539,7 +542,8 @@ async def wellness_check(
             # Try to get latest from database
             emotion_history = await wellness_service.db_service.get_emotion_history(
                 user_id,
-                days=1
+                days=1,
+                limit=1
             )
 
             if emotion_history:
@@ -592,13 +596,16 @@ async def wellness_check(
             emotion_score=current_emotion.score
         )
 
-        return WellnessResponse(
+        response = WellnessResponse(
             current_emotion=current_emotion,
             wellness_score=wellness_score,
             recommendations=recommendations,
             daily_tip=daily_tip
         )
 
+        # Already validated; serialize in pydantic-core instead of re-validating
+        return Response(content=response.model_dump_json(), media_type="application/json")
+
     except HTTPException:
         raise
     except PsiException:
@@ -630,7 +637,9 @@ async def get_wellness_history(
     - Emotion distribution over time
     """
     try:
-        history = await wellness_service.db_service.get_emotion_history(user_id, days)
+        history, truncated = await wellness_service.db_service.get_full_emotion_history(
+            user_id, days
+        )
 
         # Group by date
         daily_summary = defaultdict(list)
@@ -670,7 +679,8 @@ async def get_wellness_history(
         return {
             "period_days": days,
             "daily_summary": daily_stats,
-            "total_readings": len(history)
+            "total_readings": len(history),
+            "truncated": truncated
         }
 
     except HTTPException:
@@ -686,6 +696,28 @@ async def get_wellness_history(
         )
 
 
+@router.get("/history/export")
+async def export_wellness_history(
+    days: int = Query(90, ge=1, le=365, description="Number of days to export"),
+    user_id: str = Depends(verify_token),
+    wellness_service: WellnessService = Depends(get_wellness_service)
+):
+    """
+    Export raw emotion readings
+
+    **Parameters:**
+    - days: Number of days to export (1-365)
+
+    **Returns:**
+    - Newline-delimited JSON, one reading per line, newest first
+    - Streamed from a database cursor, so large histories are not buffered
+    """
+    return StreamingResponse(
+        ndjson_lines(wellness_service.db_service.stream_emotion_history(user_id, days)),
+        media_type=NDJSON_MEDIA_TYPE
+    )
+
+
 @router.get("/trends")
 async def get_emotion_trends(
     period: str = Query('week', regex='^(week|month|year)$'),
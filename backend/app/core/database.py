@@ -16,21 +16,144 @@ except ImportError:
     MOTOR_AVAILABLE = False
     AsyncIOMotorClient = None
 
-from typing import Optional, Any
+from typing import Optional, Any, AsyncIterator, Dict, List, Sequence, Tuple
+from functools import wraps
+import asyncio
 import logging
+import orjson
+import time
 from app.core.config import settings
+from app.core.error_codes import ErrorCode
+from app.core.exceptions import ServiceUnavailableError
 
 logger = logging.getLogger(__name__)
 
+# Errors that indicate PostgreSQL itself is unreachable (as opposed to a bad query)
+_CONNECTION_ERRORS = (OSError, asyncio.TimeoutError)
+if ASYNCPG_AVAILABLE:
+    _CONNECTION_ERRORS += (
+        asyncpg.exceptions.PostgresConnectionError,
+        asyncpg.exceptions.ConnectionDoesNotExistError,
+        asyncpg.exceptions.CannotConnectNowError,
+    )
+
+    class PsiConnection(asyncpg.Connection):
+        """asyncpg connection carrying the named prepared statements from Database"""
+        __slots__ = ("_psi_stmts",)
+else:
+    PsiConnection = None
+
+
+def circuit_breaker(func):
+    """
+    Fail fast on PostgreSQL outages instead of queueing on pool.acquire()
+
+    States:
+    - CLOSED: calls go through, consecutive connection failures are counted
+    - OPEN: calls raise ServiceUnavailableError immediately until the cooldown expires
+    - HALF_OPEN: a single probe call is let through; success closes the circuit,
+      failure re-opens it. Concurrent callers fail fast while the probe is in flight.
+    """
+    @wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        self._before_call()
+        try:
+            result = await func(self, *args, **kwargs)
+        except _CONNECTION_ERRORS:
+            self._record_failure()
+            raise
+        except Exception:
+            # Query-level errors still mean the server answered
+            self._record_success()
+            raise
+        except BaseException:
+            # Cancelled mid-call; release the probe slot without judging health
+            self._probe_in_flight = False
+            raise
+        self._record_success()
+        return result
+
+    return wrapper
+
+
+def _encode_jsonb(value: Any) -> str:
+    """asyncpg text-format JSONB encoder"""
+    return orjson.dumps(value).decode()
+
 
 class Database:
     """Database connection manager"""
 
+    # Circuit breaker settings
+    CIRCUIT_STATE_CLOSED = "closed"
+    CIRCUIT_STATE_OPEN = "open"
+    CIRCUIT_STATE_HALF_OPEN = "half_open"
+    CIRCUIT_FAILURE_THRESHOLD = 5  # consecutive connection failures before tripping
+    CIRCUIT_COOLDOWN_SECONDS = 30.0  # time to stay open before letting a probe through
+
     def __init__(self):
         self.postgres_pool: Optional[Any] = None
         self.mongo_client: Optional[Any] = None
         self.mongo_db = None
 
+        # Hot statements prepared once per physical connection (name -> SQL)
+        self._statements: Dict[str, str] = {}
+
+        # Circuit breaker state
+        self._fail_count = 0
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+
+    @property
+    def circuit_state(self) -> str:
+        """Current circuit breaker state"""
+        if self._opened_at is None:
+            return self.CIRCUIT_STATE_CLOSED
+        if time.monotonic() - self._opened_at < self.CIRCUIT_COOLDOWN_SECONDS:
+            return self.CIRCUIT_STATE_OPEN
+        return self.CIRCUIT_STATE_HALF_OPEN
+
+    def _before_call(self):
+        """Raise immediately if the circuit is open, or claim the half-open probe"""
+        state = self.circuit_state
+        if state == self.CIRCUIT_STATE_CLOSED:
+            return
+
+        if state == self.CIRCUIT_STATE_HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return
+
+        retry_after = self.CIRCUIT_COOLDOWN_SECONDS - (time.monotonic() - self._opened_at)
+        raise ServiceUnavailableError(
+            service="postgresql",
+            message="Database temporarily unavailable",
+            retry_after=max(1, int(retry_after)),
+            error_code=ErrorCode.DB_CONNECTION_FAILED,
+            details={"circuit_state": state}
+        )
+
+    def _record_success(self):
+        """Close the circuit after a successful call"""
+        if self._opened_at is not None:
+            logger.info("PostgreSQL circuit breaker closed")
+        self._fail_count = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+
+    def _record_failure(self):
+        """Count a connection failure and trip the circuit if needed"""
+        self._fail_count += 1
+        was_probe = self._probe_in_flight
+        self._probe_in_flight = False
+
+        if was_probe or self._fail_count >= self.CIRCUIT_FAILURE_THRESHOLD:
+            if self._opened_at is None or was_probe:
+                logger.error(
+                    "PostgreSQL circuit breaker opened after %d consecutive failures",
+                    self._fail_count
+                )
+            self._opened_at = time.monotonic()
+
     async def connect(self):
         """Connect to all databases"""
         try:
@@ -43,7 +166,12 @@ class Database:
                     password=settings.POSTGRES_PASSWORD,
                     database=settings.POSTGRES_DB,
                     min_size=5,
-                    max_size=20
+                    max_size=20,
+                    connection_class=PsiConnection,
+                    init=self._init_connection,
+                    # Keep asyncpg's own statement cache warm for ad-hoc queries too
+                    statement_cache_size=1024,
+                    max_cached_statement_lifetime=0
                 )
                 logger.info("Connected to PostgreSQL")
             else:
@@ -53,6 +181,13 @@ class Database:
             if MOTOR_AVAILABLE:
                 self.mongo_client = AsyncIOMotorClient(settings.MONGODB_URL)
                 self.mongo_db = self.mongo_client[settings.MONGODB_DB]
+                # No-op when the index already exists (see scripts/init_mongodb.js)
+                try:
+                    await self.mongo_db.user_preferences.create_index(
+                        [('user_id', 1)], unique=True
+                    )
+                except Exception as e:
+                    logger.warning(f"MongoDB user_preferences index not ensured: {e}")
                 logger.info("Connected to MongoDB")
             else:
                 logger.warning("motor not available, MongoDB connection skipped")
@@ -71,21 +206,144 @@ class Database:
             self.mongo_client.close()
             logger.info("Disconnected from MongoDB")
 
+    def register_statement(self, name: str, query: str):
+        """
+        Register a hot query to be prepared on every pool connection
+
+        Must be called before connect(); statements registered later are
+        prepared lazily on first use.
+        """
+        self._statements[name] = query
+
+    async def _init_connection(self, conn):
+        """
+        Pool init hook for every new connection
+
+        - JSONB columns are decoded to Python objects by orjson inside asyncpg
+          (and Python objects are accepted as JSONB parameters)
+        - All registered statements are prepared once
+        """
+        await conn.set_type_codec(
+            'jsonb',
+            encoder=_encode_jsonb,
+            decoder=orjson.loads,
+            schema='pg_catalog'
+        )
+        conn._psi_stmts = {
+            name: await conn.prepare(query)
+            for name, query in self._statements.items()
+        }
+
+    async def _get_statement(self, conn, name: str, refresh: bool = False):
+        """Look up a connection's prepared statement, preparing it if missing"""
+        stmts = conn._psi_stmts
+        stmt = None if refresh else stmts.get(name)
+        if stmt is None:
+            stmt = stmts[name] = await conn.prepare(self._statements[name])
+        return stmt
+
+    async def _run_prepared(self, conn, method: str, name: str, args: tuple):
+        """Run a named prepared statement, re-preparing it if the schema changed"""
+        stmt = await self._get_statement(conn, name)
+        try:
+            return await getattr(stmt, method)(*args)
+        except asyncpg.exceptions.InvalidCachedStatementError:
+            # A migration altered a referenced table; the old plan is unusable
+            stmt = await self._get_statement(conn, name, refresh=True)
+            return await getattr(stmt, method)(*args)
+
+    @circuit_breaker
+    async def fetch_prepared(self, name: str, *args):
+        """Execute a registered prepared statement and return all rows"""
+        async with self.postgres_pool.acquire() as conn:
+            return await self._run_prepared(conn, "fetch", name, args)
+
+    @circuit_breaker
+    async def fetchrow_prepared(self, name: str, *args):
+        """Execute a registered prepared statement and return one row"""
+        async with self.postgres_pool.acquire() as conn:
+            return await self._run_prepared(conn, "fetchrow", name, args)
+
+    async def iterate_prepared(self, name: str, *args, prefetch: int = 500) -> AsyncIterator[Any]:
+        """
+        Stream rows of a registered statement through a server-side cursor
+
+        Only `prefetch` rows are held in memory at a time. The connection stays
+        checked out (inside a read transaction) until the iterator is exhausted
+        or closed. Circuit breaker bookkeeping mirrors @circuit_breaker, which
+        cannot wrap async generators.
+        """
+        self._before_call()
+        try:
+            async with self.postgres_pool.acquire() as conn:
+                stmt = await self._get_statement(conn, name)
+                async with conn.transaction(readonly=True):
+                    async for row in stmt.cursor(*args, prefetch=prefetch):
+                        yield row
+        except _CONNECTION_ERRORS:
+            self._record_failure()
+            raise
+        except Exception:
+            self._record_success()
+            raise
+        except BaseException:
+            # Consumer went away (client disconnect) or the task was cancelled
+            self._probe_in_flight = False
+            raise
+        self._record_success()
+
+    @circuit_breaker
     async def execute_query(self, query: str, *args):
         """Execute a PostgreSQL query"""
         async with self.postgres_pool.acquire() as conn:
             return await conn.fetch(query, *args)
 
+    @circuit_breaker
     async def execute_one(self, query: str, *args):
         """Execute a PostgreSQL query and return one row"""
         async with self.postgres_pool.acquire() as conn:
             return await conn.fetchrow(query, *args)
 
+    @circuit_breaker
     async def execute(self, query: str, *args):
         """Execute a PostgreSQL command (INSERT, UPDATE, DELETE)"""
         async with self.postgres_pool.acquire() as conn:
             return await conn.execute(query, *args)
 
+    @circuit_breaker
+    async def copy_records(self, table: str, records: Sequence[tuple], columns: Sequence[str]):
+        """
+        Bulk-insert rows with the PostgreSQL COPY protocol
+
+        One round trip for the whole batch instead of one INSERT per row.
+        COPY bypasses statement defaults, so every listed column must be
+        supplied by the caller.
+        """
+        async with self.postgres_pool.acquire() as conn:
+            return await conn.copy_records_to_table(table, records=records, columns=columns)
+
+    @circuit_breaker
+    async def gather_queries(self, queries: Sequence[Tuple[str, tuple]]) -> List[Any]:
+        """
+        Run independent PostgreSQL queries concurrently
+
+        asyncpg cannot pipeline on a single connection, so each query acquires
+        its own pool connection and all of them are awaited together. Only use
+        this for queries that are truly independent: they do not share a
+        transaction and may observe different snapshots.
+
+        Args:
+            queries: (query, args) pairs
+
+        Returns:
+            List of fetched rows per query, in input order
+        """
+        async def run(query: str, args: tuple):
+            async with self.postgres_pool.acquire() as conn:
+                return await conn.fetch(query, *args)
+
+        return await asyncio.gather(*(run(query, args) for query, args in queries))
+
 
 # Global database instance
 db = Database()
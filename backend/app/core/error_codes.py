@@ -10,7 +10,10 @@ Error Code Format: PSI-{CATEGORY}-{NUMBER}
 Example: PSI-AUTH-1001 (Authentication failed - invalid credentials)
 """
 from enum import Enum
-from typing import Dict, Optional
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+import sys
 
 
 class ErrorCategory(str, Enum):
@@ -248,7 +251,7 @@ class ErrorCode(str, Enum):
 
 
 # Error code metadata for detailed error information
-ERROR_CODE_METADATA: Dict[ErrorCode, Dict[str, any]] = {
+_ERROR_CODE_METADATA: Dict[ErrorCode, Dict[str, Any]] = {
     # Authentication Errors
     ErrorCode.AUTH_MISSING_CREDENTIALS: {
         "status_code": 401,
@@ -410,23 +413,96 @@ ERROR_CODE_METADATA: Dict[ErrorCode, Dict[str, any]] = {
 }
 
 
-def get_error_metadata(error_code: ErrorCode) -> Dict[str, any]:
+def _freeze_metadata(metadata: Dict[str, Any]) -> Mapping[str, Any]:
+    """Intern metadata keys and wrap the entry in a read-only view"""
+    return MappingProxyType({sys.intern(key): value for key, value in metadata.items()})
+
+
+# Read-only view of the error code table (entries are read-only as well)
+ERROR_CODE_METADATA: Mapping[ErrorCode, Mapping[str, Any]] = MappingProxyType({
+    code: _freeze_metadata(metadata)
+    for code, metadata in _ERROR_CODE_METADATA.items()
+})
+
+# Fallback metadata for codes without an explicit entry
+DEFAULT_ERROR_METADATA: Mapping[str, Any] = _freeze_metadata({
+    "status_code": 500,
+    "message": "An unexpected error occurred",
+    "user_message": "Something went wrong. Please try again later.",
+    "category": ErrorCategory.SERVICE,
+    "retryable": True,
+})
+
+del _ERROR_CODE_METADATA
+
+# Flat per-code lookups for the helpers called on every error response
+_HTTP_STATUS: Dict[ErrorCode, int] = {
+    code: metadata.get("status_code", 500) for code, metadata in ERROR_CODE_METADATA.items()
+}
+_RETRYABLE: Dict[ErrorCode, bool] = {
+    code: metadata.get("retryable", False) for code, metadata in ERROR_CODE_METADATA.items()
+}
+
+
+@lru_cache(maxsize=None)
+def get_error_metadata(error_code: ErrorCode) -> Mapping[str, Any]:
     """
     Get metadata for an error code
 
+    Memoized; safe because the returned mapping is read-only.
+
     Args:
         error_code: ErrorCode enum value
 
     Returns:
-        Dictionary containing error metadata
+        Read-only mapping containing error metadata
     """
-    return ERROR_CODE_METADATA.get(error_code, {
-        "status_code": 500,
-        "message": "An unexpected error occurred",
-        "user_message": "Something went wrong. Please try again later.",
-        "category": ErrorCategory.SERVICE,
-        "retryable": True,
-    })
+    return ERROR_CODE_METADATA.get(error_code, DEFAULT_ERROR_METADATA)
+
+
+def resolve_error(error_code: ErrorCode, /, **kwargs) -> Tuple[int, str, str, bool]:
+    """
+    Resolve everything an error response needs with a single metadata lookup
+
+    Args:
+        error_code: ErrorCode enum value
+        **kwargs: Values to substitute in the user message template
+
+    Returns:
+        Tuple of (HTTP status code, internal message, formatted user message, retryable)
+
+    Example:
+        >>> status, message, user_message, retryable = resolve_error(
+        ...     ErrorCode.RATE_DAILY_LIMIT_EXCEEDED,
+        ...     limit=3
+        ... )
+        >>> status
+        429
+    """
+    resolved = _resolve_static(error_code)
+    if not kwargs:
+        return resolved
+
+    status_code, message, user_message, retryable = resolved
+    if "{" in user_message:
+        try:
+            user_message = user_message.format(**kwargs)
+        except (KeyError, IndexError, ValueError):
+            pass
+
+    return status_code, message, user_message, retryable
+
+
+@lru_cache(maxsize=None)
+def _resolve_static(error_code: ErrorCode) -> Tuple[int, str, str, bool]:
+    """Resolve an error code without message formatting (memoized)"""
+    metadata = get_error_metadata(error_code)
+    return (
+        metadata.get("status_code", 500),
+        metadata.get("message", "An unexpected error occurred"),
+        metadata.get("user_message", "An error occurred"),
+        metadata.get("retryable", False),
+    )
 
 
 def format_error_message(error_code: ErrorCode, **kwargs) -> str:
@@ -447,13 +523,7 @@ def format_error_message(error_code: ErrorCode, **kwargs) -> str:
         ... )
         "You've reached your daily limit of 3 analyses..."
     """
-    metadata = get_error_metadata(error_code)
-    user_message = metadata.get("user_message", "An error occurred")
-
-    try:
-        return user_message.format(**kwargs)
-    except KeyError:
-        return user_message
+    return resolve_error(error_code, **kwargs)[2]
 
 
 def is_retryable(error_code: ErrorCode) -> bool:
@@ -466,8 +536,7 @@ def is_retryable(error_code: ErrorCode) -> bool:
     Returns:
         True if error is retryable, False otherwise
     """
-    metadata = get_error_metadata(error_code)
-    return metadata.get("retryable", False)
+    return _RETRYABLE.get(error_code, DEFAULT_ERROR_METADATA["retryable"])
 
 
 def get_http_status(error_code: ErrorCode) -> int:
@@ -480,5 +549,4 @@ def get_http_status(error_code: ErrorCode) -> int:
     Returns:
         HTTP status code (e.g., 404, 500)
     """
-    metadata = get_error_metadata(error_code)
-    return metadata.get("status_code", 500)
+    return _HTTP_STATUS.get(error_code, DEFAULT_ERROR_METADATA["status_code"])
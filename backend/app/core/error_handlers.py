@@ -4,18 +4,18 @@ Centralized error handling and formatting for FastAPI with standardized error co
 """
 from typing import Union
 from fastapi import Request, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.exceptions import RequestValidationError
 from pydantic import ValidationError as PydanticValidationError
 import logging
 
-from app.core.exceptions import PsiException
-from app.core.error_codes import ErrorCode, get_error_metadata
+from app.core.exceptions import ErrorResponse, PsiException, to_response
+from app.core.error_codes import ErrorCode
 
 logger = logging.getLogger(__name__)
 
 
-async def psi_exception_handler(request: Request, exc: PsiException) -> JSONResponse:
+async def psi_exception_handler(request: Request, exc: PsiException) -> ErrorResponse:
     """
     Handle custom Psi exceptions with standardized error codes
 
@@ -24,7 +24,7 @@ async def psi_exception_handler(request: Request, exc: PsiException) -> JSONResp
         exc: PsiException instance
 
     Returns:
-        JSONResponse with error details including error code
+        ErrorResponse with error details including error code
     """
     # Get error code metadata if available
     error_code_value = exc.details.get("error_code") if exc.details else None
@@ -40,33 +40,19 @@ async def psi_exception_handler(request: Request, exc: PsiException) -> JSONResp
         }
     )
 
-    # Build error response with error code
-    error_response = {
-        "error": {
-            "message": exc.message,
-            "type": exc.__class__.__name__,
-            "code": error_code_value,  # Standardized error code (e.g., "PSI-RES-3012")
-            "details": exc.details
-        }
-    }
-
-    # Add user-friendly message if error code has metadata
-    if exc.error_code:
-        metadata = get_error_metadata(exc.error_code)
-        user_message = metadata.get("user_message")
-        if user_message:
-            error_response["error"]["user_message"] = user_message
-
-    return JSONResponse(
-        status_code=exc.status_code,
-        content=error_response
-    )
+    response = to_response(exc)
+
+    # Client errors are fully described by the response; release their frames
+    if not exc.retain_traceback:
+        exc.__traceback__ = None
+
+    return response
 
 
 async def validation_exception_handler(
     request: Request,
     exc: Union[RequestValidationError, PydanticValidationError]
-) -> JSONResponse:
+) -> ORJSONResponse:
     """
     Handle Pydantic validation errors
 
@@ -75,7 +61,7 @@ async def validation_exception_handler(
         exc: Validation error
 
     Returns:
-        JSONResponse with validation error details
+        ORJSONResponse with validation error details
     """
     errors = []
 
@@ -103,7 +89,7 @@ async def validation_exception_handler(
         }
     )
 
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         content={
             "error": {
@@ -119,7 +105,7 @@ async def validation_exception_handler(
     )
 
 
-async def generic_exception_handler(request: Request, exc: Exception) -> JSONResponse:
+async def generic_exception_handler(request: Request, exc: Exception) -> ORJSONResponse:
     """
     Handle unexpected exceptions
 
@@ -128,7 +114,7 @@ async def generic_exception_handler(request: Request, exc: Exception) -> JSONRes
         exc: Any unhandled exception
 
     Returns:
-        JSONResponse with generic error message
+        ORJSONResponse with generic error message
     """
     # Log the full exception with traceback
     logger.error(
@@ -142,7 +128,7 @@ async def generic_exception_handler(request: Request, exc: Exception) -> JSONRes
     )
 
     # Don't expose internal error details to clients
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={
             "error": {
@@ -2,14 +2,26 @@
 Custom Exception Classes
 Provides domain-specific exceptions for better error handling with standardized error codes
 """
-from typing import Any, Dict, Optional
+from datetime import date, datetime
+from enum import Enum
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional
 from fastapi import HTTPException, status
-from app.core.error_codes import ErrorCode, get_error_metadata, format_error_message
+from fastapi.responses import ORJSONResponse
+import orjson
+from app.core.error_codes import ErrorCode, get_error_metadata, format_error_message, resolve_error
 
 
 class PsiException(Exception):
     """Base exception for all Psi-specific errors"""
 
+    # Slotted so raising never materializes a per-instance __dict__
+    __slots__ = ("message", "status_code", "error_code", "_raw_details", "_details")
+
+    # High-volume client errors set this to False; the handler then drops
+    # their traceback so request frames are not kept alive after the response
+    retain_traceback: bool = True
+
     def __init__(
         self,
         message: str,
@@ -20,22 +32,37 @@ class PsiException(Exception):
         self.message = message
         self.status_code = status_code
         self.error_code = error_code
-        self.details = details or {}
+        self._raw_details = details or {}
+        self._details = None
+
+        super().__init__(self.message)
+
+    @property
+    def details(self) -> Dict[str, Any]:
+        """Details enriched with error code metadata, built on first access"""
+        if self._details is not None:
+            return self._details
+
+        details = dict(self._raw_details)
 
         # Add error code metadata if provided
-        if error_code:
-            metadata = get_error_metadata(error_code)
-            self.details["error_code"] = error_code.value
-            self.details["retryable"] = metadata.get("retryable", False)
+        if self.error_code:
+            metadata = get_error_metadata(self.error_code)
+            details["error_code"] = self.error_code.value
+            details["retryable"] = metadata.get("retryable", False)
             if "action" in metadata:
-                self.details["action"] = metadata["action"]
+                details["action"] = metadata["action"]
 
-        super().__init__(self.message)
+        self._details = details
+        return details
 
 
 class AuthenticationError(PsiException):
     """Raised when authentication fails"""
 
+    __slots__ = ()
+    retain_traceback = False
+
     def __init__(
         self,
         message: str = "Authentication failed",
@@ -53,6 +80,8 @@ class AuthenticationError(PsiException):
 class AuthorizationError(PsiException):
     """Raised when user lacks permission"""
 
+    __slots__ = ()
+
     def __init__(
         self,
         message: str = "Insufficient permissions",
@@ -67,9 +96,21 @@ class AuthorizationError(PsiException):
         )
 
 
+# Resource types with a dedicated not-found error code
+_RESOURCE_CODE_MAP: Mapping[str, ErrorCode] = MappingProxyType({
+    "Recipe": ErrorCode.RES_RECIPE_NOT_FOUND,
+    "User": ErrorCode.RES_USER_NOT_FOUND,
+    "Food": ErrorCode.RES_FOOD_ITEM_NOT_FOUND,
+    "Emotion": ErrorCode.RES_EMOTION_RECORD_NOT_FOUND,
+    "Ingredient": ErrorCode.RES_INGREDIENT_NOT_FOUND,
+})
+
+
 class ResourceNotFoundError(PsiException):
     """Raised when a resource is not found"""
 
+    __slots__ = ()
+
     def __init__(
         self,
         resource: str,
@@ -83,14 +124,7 @@ class ResourceNotFoundError(PsiException):
 
         # Map resource types to specific error codes
         if error_code is None:
-            resource_code_map = {
-                "Recipe": ErrorCode.RES_RECIPE_NOT_FOUND,
-                "User": ErrorCode.RES_USER_NOT_FOUND,
-                "Food": ErrorCode.RES_FOOD_ITEM_NOT_FOUND,
-                "Emotion": ErrorCode.RES_EMOTION_RECORD_NOT_FOUND,
-                "Ingredient": ErrorCode.RES_INGREDIENT_NOT_FOUND,
-            }
-            error_code = resource_code_map.get(resource, ErrorCode.RES_NOT_FOUND)
+            error_code = _RESOURCE_CODE_MAP.get(resource, ErrorCode.RES_NOT_FOUND)
 
         super().__init__(
             message=message,
@@ -103,6 +137,9 @@ class ResourceNotFoundError(PsiException):
 class ValidationError(PsiException):
     """Raised when input validation fails"""
 
+    __slots__ = ()
+    retain_traceback = False
+
     def __init__(
         self,
         message: str,
@@ -124,6 +161,9 @@ class ValidationError(PsiException):
 class RateLimitError(PsiException):
     """Raised when rate limit is exceeded"""
 
+    __slots__ = ()
+    retain_traceback = False
+
     def __init__(
         self,
         message: str = "Rate limit exceeded",
@@ -158,6 +198,8 @@ class RateLimitError(PsiException):
 class ServiceUnavailableError(PsiException):
     """Raised when a service is temporarily unavailable"""
 
+    __slots__ = ()
+
     def __init__(
         self,
         service: str,
@@ -183,6 +225,9 @@ class ServiceUnavailableError(PsiException):
 class InvalidInputError(PsiException):
     """Raised when input data is invalid"""
 
+    __slots__ = ()
+    retain_traceback = False
+
     def __init__(
         self,
         message: str,
@@ -204,6 +249,8 @@ class InvalidInputError(PsiException):
 class DatabaseError(PsiException):
     """Raised when database operation fails"""
 
+    __slots__ = ()
+
     def __init__(
         self,
         operation: str,
@@ -229,6 +276,8 @@ class DatabaseError(PsiException):
 class ExternalServiceError(PsiException):
     """Raised when external service call fails"""
 
+    __slots__ = ()
+
     def __init__(
         self,
         service_name: str,
@@ -254,6 +303,8 @@ class ExternalServiceError(PsiException):
 class ImageProcessingError(PsiException):
     """Raised when image processing fails"""
 
+    __slots__ = ()
+
     def __init__(
         self,
         message: str = "Image processing failed",
@@ -274,6 +325,8 @@ class ImageProcessingError(PsiException):
 class NutritionDataNotFoundError(PsiException):
     """Raised when nutrition data is not available"""
 
+    __slots__ = ()
+
     def __init__(
         self,
         food_name: str,
@@ -294,6 +347,8 @@ class NutritionDataNotFoundError(PsiException):
 class InsufficientDataError(PsiException):
     """Raised when insufficient data for analysis"""
 
+    __slots__ = ()
+
     def __init__(
         self,
         required: str,
@@ -329,3 +384,53 @@ def to_http_exception(exc: PsiException) -> HTTPException:
             "details": exc.details
         }
     )
+
+
+def _orjson_default(value: Any) -> Any:
+    """Serialize values orjson does not handle natively in error details"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    return str(value)
+
+
+class ErrorResponse(ORJSONResponse):
+    """ORJSONResponse that tolerates arbitrary objects in error details"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=_orjson_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+
+
+def to_response(exc: PsiException) -> ErrorResponse:
+    """
+    Convert PsiException directly to a serialized error response
+
+    Skips HTTPException and jsonable_encoder; the payload is encoded
+    with a single orjson.dumps call.
+
+    Args:
+        exc: PsiException instance
+
+    Returns:
+        ErrorResponse with the standard error envelope
+    """
+    error = {
+        "message": exc.message,
+        "type": exc.__class__.__name__,
+        "code": exc.details.get("error_code"),
+        "details": exc.details
+    }
+
+    if exc.error_code:
+        _, _, user_message, _ = resolve_error(exc.error_code, **exc.details)
+        if user_message:
+            error["user_message"] = user_message
+
+    return ErrorResponse(status_code=exc.status_code, content={"error": error})
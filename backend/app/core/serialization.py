@@ -0,0 +1,72 @@
+"""
+Response Serialization
+Content negotiation between JSON and MessagePack response bodies
+"""
+try:
+    import ormsgpack
+    ORMSGPACK_AVAILABLE = True
+except ImportError:
+    ORMSGPACK_AVAILABLE = False
+    ormsgpack = None
+
+import orjson
+from typing import Any, AsyncIterable, AsyncIterator, Optional
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def wants_msgpack(accept: Optional[str]) -> bool:
+    """
+    Check whether the client accepts MessagePack responses
+
+    Args:
+        accept: Value of the Accept request header
+
+    Returns:
+        True if MessagePack was requested and can be produced
+    """
+    return ORMSGPACK_AVAILABLE and bool(accept) and "msgpack" in accept
+
+
+def negotiate_response(content: Any, accept: Optional[str]) -> Response:
+    """
+    Serialize content as MessagePack or JSON depending on the Accept header
+
+    Large nutrition and recipe payloads are mostly numbers, which MessagePack
+    encodes far more compactly than JSON for mobile clients.
+
+    Args:
+        content: Pydantic model or plain JSON-compatible data
+        accept: Value of the Accept request header
+
+    Returns:
+        MessagePack Response when requested, JSON Response otherwise
+    """
+    if wants_msgpack(accept):
+        if isinstance(content, BaseModel):
+            content = content.model_dump()
+        return Response(
+            content=ormsgpack.packb(content, option=ormsgpack.OPT_NON_STR_KEYS),
+            media_type=MSGPACK_MEDIA_TYPE
+        )
+
+    # Models are already validated; let pydantic-core write the JSON directly
+    if isinstance(content, BaseModel):
+        return Response(content=content.model_dump_json(), media_type="application/json")
+
+    return ORJSONResponse(content)
+
+
+async def ndjson_lines(rows: AsyncIterable[Any]) -> AsyncIterator[bytes]:
+    """
+    Encode an async stream of records as newline-delimited JSON
+
+    Used with StreamingResponse so large exports are written row by row
+    instead of being materialized as one list.
+    """
+    async for row in rows:
+        yield orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE)
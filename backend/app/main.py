@@ -2,32 +2,140 @@
 Psi API - Main Application Entry Point
 FastAPI-based backend for emotion-based wellness platform
 """
-from fastapi import FastAPI, Request
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    aioredis = None
+
+from contextlib import asynccontextmanager, suppress
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from app.core.config import settings
 from app.core.database import db
 from app.core.error_handlers import register_exception_handlers
+from app.services.database_service import (
+    DatabaseService,
+    close_usage_redis,
+    open_usage_redis,
+    run_usage_reconciler
+)
+from app.services.nutrition_analysis import get_nutrition_service
+from app.services.recipe_matching import get_recipe_service
 from app.api.v1 import auth
 from app.api.v1 import food_enhanced as food
 from app.api.v1 import fridge_enhanced as fridge
 from app.api.v1 import wellness_enhanced as wellness
+import asyncio
 import logging
+import orjson
+import os
 import time
 
+
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+class CachedTimeFormatter(logging.Formatter):
+    """Formatter that runs strftime at most once per second of log records"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cached_second = None
+        self._cached_time = ""
+
+    def formatTime(self, record, datefmt=None):
+        second = int(record.created)
+        if second != self._cached_second:
+            self._cached_time = time.strftime(
+                datefmt or self.default_time_format,
+                self.converter(record.created)
+            )
+            self._cached_second = second
+        if datefmt:
+            return self._cached_time
+        return self.default_msec_format % (self._cached_time, record.msecs)
+
+
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(
+    CachedTimeFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 )
+logging.basicConfig(level=logging.INFO, handlers=[_log_handler])
 logger = logging.getLogger(__name__)
 
+
+# Application lifecycle
+def _probe_yolo() -> str:
+    """Check once whether the YOLO model can be served"""
+    try:
+        from app.services.image_recognition import YOLO_AVAILABLE
+    except Exception:
+        return "error"
+
+    if YOLO_AVAILABLE and os.path.exists(settings.YOLO_MODEL_PATH):
+        return "loaded"
+    return "not loaded"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open connections and health probes on startup, release them on shutdown"""
+    # Health check probes are created once and reused by /health
+    app.state.redis = aioredis.Redis(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        socket_connect_timeout=0.2
+    ) if REDIS_AVAILABLE else None
+    app.state.yolo_status = _probe_yolo()
+
+    # USDA DB open, search index build and recipe TF-IDF fit/load run here
+    # once, so request handlers never migrate or write to data/
+    await asyncio.to_thread(get_nutrition_service)
+    await asyncio.to_thread(get_recipe_service)
+
+    try:
+        await db.connect()
+        logger.info("✅ Database connections established")
+        logger.info("🚀 Psi API started successfully")
+    except Exception as e:
+        logger.error("❌ Failed to connect to database: %s", e)
+        raise
+
+    # Redis usage counters are flushed to Postgres in the background
+    open_usage_redis()
+    reconciler = asyncio.create_task(run_usage_reconciler())
+
+    yield
+
+    # Let an in-flight flush unwind before the final one runs
+    reconciler.cancel()
+    with suppress(asyncio.CancelledError):
+        await reconciler
+    try:
+        await DatabaseService().reconcile_daily_usage()
+    except Exception as e:
+        logger.error("❌ Final usage reconciliation failed: %s", e)
+
+    try:
+        await db.disconnect()
+        if app.state.redis is not None:
+            await app.state.redis.aclose()
+        await close_usage_redis()
+        logger.info("✅ Database connections closed")
+        logger.info("👋 Psi API shut down successfully")
+    except Exception as e:
+        logger.error("❌ Error during shutdown: %s", e)
+
+
 app = FastAPI(
     title="Psi API",
     description="Emotion-based Wellness Platform API - Complete Implementation",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS Configuration
@@ -44,10 +152,10 @@ app.add_middleware(
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
     """Add processing time header to responses"""
-    start_time = time.time()
+    loop = asyncio.get_running_loop()
+    start_time = loop.time()
     response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
+    response.headers["X-Process-Time"] = f"{loop.time() - start_time:.6f}"
     return response
 
 
@@ -55,31 +163,6 @@ async def add_process_time_header(request: Request, call_next):
 register_exception_handlers(app)
 
 
-# Startup event
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database connections on startup"""
-    try:
-        await db.connect()
-        logger.info("✅ Database connections established")
-        logger.info("🚀 Psi API started successfully")
-    except Exception as e:
-        logger.error(f"❌ Failed to connect to database: {e}")
-        raise
-
-
-# Shutdown event
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Close database connections on shutdown"""
-    try:
-        await db.disconnect()
-        logger.info("✅ Database connections closed")
-        logger.info("👋 Psi API shut down successfully")
-    except Exception as e:
-        logger.error(f"❌ Error during shutdown: {e}")
-
-
 # API Routes
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
 app.include_router(food.router, prefix="/api/v1/food", tags=["Food Analysis (Mode 1)"])
@@ -87,51 +170,93 @@ app.include_router(fridge.router, prefix="/api/v1/fridge", tags=["Fridge Recipes
 app.include_router(wellness.router, prefix="/api/v1/wellness", tags=["Wellness Hub (Mode 3)"])
 
 
+# Static response bodies, serialized once at import time
+ROOT_RESPONSE_BODY = orjson.dumps({
+    "message": "Psi API - Emotion-based Wellness Platform",
+    "version": "1.0.0",
+    "docs": "/docs",
+    "health": "/health"
+})
+
+# Static bodies only change on deploy, so shared caches may serve them
+STATIC_CACHE_HEADERS = {"Cache-Control": "public, max-age=3600"}
+
+API_INFO_RESPONSE_BODY = orjson.dumps({
+    "name": "Psi API",
+    "version": "1.0.0",
+    "description": "Emotion-based wellness platform with AI-powered food analysis",
+    "modes": {
+        "mode_1": {
+            "name": "Food Analysis",
+            "description": "Real-time emotion-nutrition analysis",
+            "endpoint": "/api/v1/food/upload"
+        },
+        "mode_2": {
+            "name": "Fridge Recipes",
+            "description": "Emotion-based recipe recommendations",
+            "endpoint": "/api/v1/fridge/detect"
+        },
+        "mode_3": {
+            "name": "Wellness Hub",
+            "description": "Comprehensive emotion monitoring",
+            "endpoint": "/api/v1/wellness/check"
+        }
+    },
+    "features": [
+        "YOLO v8 food detection (96%+ accuracy)",
+        "62+ nutrition metrics",
+        "8 emotion types classification",
+        "Personalized recommendations",
+        "Comprehensive wellness analytics"
+    ],
+    "rate_limits": {
+        "free_tier": "3 analyses per day",
+        "premium": "Unlimited"
+    }
+})
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
-    return {
-        "message": "Psi API - Emotion-based Wellness Platform",
-        "version": "1.0.0",
-        "docs": "/docs",
-        "health": "/health"
-    }
+    return Response(content=ROOT_RESPONSE_BODY, media_type="application/json")
 
 
 @app.get("/health")
 async def health():
     """Comprehensive health check"""
     try:
-        # Check database connectivity
-        postgres_status = "connected" if db.postgres_pool else "disconnected"
-        mongo_status = "connected" if db.mongo_client else "disconnected"
-
-        # Check Redis (optional)
-        redis_status = "not configured"
-        try:
-            import redis
-            from app.core.config import settings
-            r = redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT)
-            r.ping()
-            redis_status = "connected"
-        except:
-            redis_status = "disconnected"
-
-        # Check YOLO model
-        yolo_status = "not loaded"
-        try:
-            from app.services.image_recognition import ImageRecognitionService
-            service = ImageRecognitionService()
-            yolo_status = "loaded"
-        except:
-            yolo_status = "error"
+        # Ping every backend concurrently so the check costs the slowest probe
+        redis_client = getattr(app.state, "redis", None)
+        probes = {
+            "postgresql": db.postgres_pool.fetchval("SELECT 1") if db.postgres_pool else None,
+            "mongodb": db.mongo_client.admin.command("ping") if db.mongo_client else None,
+            "redis": redis_client.ping() if redis_client is not None else None,
+        }
+        pending = {name: probe for name, probe in probes.items() if probe is not None}
+        results = dict(zip(
+            pending,
+            await asyncio.gather(*pending.values(), return_exceptions=True)
+        ))
+
+        def probe_status(name: str, missing: str) -> str:
+            if name not in results:
+                return missing
+            return "disconnected" if isinstance(results[name], BaseException) else "connected"
+
+        postgres_status = probe_status("postgresql", "disconnected")
+        mongo_status = probe_status("mongodb", "disconnected")
+        redis_status = probe_status("redis", "not configured")
+
+        # Check YOLO model (probed once at startup)
+        yolo_status = getattr(app.state, "yolo_status", "not loaded")
 
         all_healthy = all([
             postgres_status == "connected",
             mongo_status == "connected"
         ])
 
-        return {
+        return ORJSONResponse({
             "status": "healthy" if all_healthy else "degraded",
             "version": "1.0.0",
             "services": {
@@ -141,52 +266,24 @@ async def health():
                 "yolo_model": yolo_status
             },
             "timestamp": time.time()
-        }
+        })
 
     except Exception as e:
-        logger.error(f"Health check failed: {e}")
-        return {
+        logger.error("Health check failed: %s", e)
+        return ORJSONResponse({
             "status": "unhealthy",
             "error": str(e)
-        }
+        })
 
 
 @app.get("/api/v1/info")
 async def api_info():
     """API information and capabilities"""
-    return {
-        "name": "Psi API",
-        "version": "1.0.0",
-        "description": "Emotion-based wellness platform with AI-powered food analysis",
-        "modes": {
-            "mode_1": {
-                "name": "Food Analysis",
-                "description": "Real-time emotion-nutrition analysis",
-                "endpoint": "/api/v1/food/upload"
-            },
-            "mode_2": {
-                "name": "Fridge Recipes",
-                "description": "Emotion-based recipe recommendations",
-                "endpoint": "/api/v1/fridge/detect"
-            },
-            "mode_3": {
-                "name": "Wellness Hub",
-                "description": "Comprehensive emotion monitoring",
-                "endpoint": "/api/v1/wellness/check"
-            }
-        },
-        "features": [
-            "YOLO v8 food detection (96%+ accuracy)",
-            "62+ nutrition metrics",
-            "8 emotion types classification",
-            "Personalized recommendations",
-            "Comprehensive wellness analytics"
-        ],
-        "rate_limits": {
-            "free_tier": "3 analyses per day",
-            "premium": "Unlimited"
-        }
-    }
+    return Response(
+        content=API_INFO_RESPONSE_BODY,
+        media_type="application/json",
+        headers=STATIC_CACHE_HEADERS
+    )
 
 
 if __name__ == "__main__":
@@ -195,6 +292,8 @@ if __name__ == "__main__":
         "app.main:app",
         host="0.0.0.0",
         port=8000,
+        loop="uvloop",
+        http="httptools",
         reload=True,
         log_level="info"
     )
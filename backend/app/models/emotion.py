@@ -1,25 +1,40 @@
 """
 Emotion Data Models
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, field_validator
 from datetime import datetime
 from typing import Dict, List
+import sys
 
 
 class EmotionType:
-    """8 emotion types supported"""
-    STRESS = "stress"
-    FATIGUE = "fatigue"
-    ANXIETY = "anxiety"
-    HAPPINESS = "happiness"
-    EXCITEMENT = "excitement"
-    CALMNESS = "calmness"
-    FOCUS = "focus"
-    APATHY = "apathy"
+    """8 emotion types supported (interned so comparisons hit the identity fast path)"""
+    STRESS = sys.intern("stress")
+    FATIGUE = sys.intern("fatigue")
+    ANXIETY = sys.intern("anxiety")
+    HAPPINESS = sys.intern("happiness")
+    EXCITEMENT = sys.intern("excitement")
+    CALMNESS = sys.intern("calmness")
+    FOCUS = sys.intern("focus")
+    APATHY = sys.intern("apathy")
+
+
+EMOTION_NAMES = (
+    EmotionType.STRESS,
+    EmotionType.FATIGUE,
+    EmotionType.ANXIETY,
+    EmotionType.HAPPINESS,
+    EmotionType.EXCITEMENT,
+    EmotionType.CALMNESS,
+    EmotionType.FOCUS,
+    EmotionType.APATHY,
+)
 
 
 class EmotionData(BaseModel):
     """Emotion data from wearables"""
+    model_config = ConfigDict(extra='ignore', frozen=True)
+
     emotion_id: str
     user_id: str
     hrv: float
@@ -29,9 +44,17 @@ class EmotionData(BaseModel):
     emotion_score: int
     timestamp: datetime
 
+    @field_validator("emotion_type")
+    @classmethod
+    def intern_emotion_type(cls, value: str) -> str:
+        """Intern inbound names so lookups keyed by EmotionType match by identity"""
+        return sys.intern(value)
+
 
 class EmotionAnalysisResult(BaseModel):
     """Result of emotion analysis"""
+    model_config = ConfigDict(extra='ignore', frozen=True)
+
     type: str
     score: int
     all_emotions: Dict[str, float]
@@ -41,6 +64,8 @@ class EmotionAnalysisResult(BaseModel):
 
 class WellnessScore(BaseModel):
     """Daily wellness score"""
+    model_config = ConfigDict(extra='ignore', frozen=True)
+
     date: datetime
     score: int  # 0-100
     emotion_distribution: Dict[str, int]
@@ -49,6 +74,8 @@ class WellnessScore(BaseModel):
 
 class WellnessResponse(BaseModel):
     """Response for wellness check"""
+    model_config = ConfigDict(extra='ignore', frozen=True)
+
     current_emotion: EmotionAnalysisResult
     wellness_score: int
     recommendations: Dict[str, List[str]]
@@ -1,13 +1,15 @@
 """
 Food Record Data Models
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 from datetime import datetime
 from typing import List, Dict, Optional
 
 
 class FoodItem(BaseModel):
     """Individual food item"""
+    model_config = ConfigDict(extra='ignore', frozen=True)
+
     name: str
     confidence: float
     grams: float
@@ -15,8 +17,14 @@ class FoodItem(BaseModel):
     nutrition: Dict[str, float]
 
 
+# Compiled once; serializes a whole list of items in a single pydantic-core call
+FOOD_ITEM_LIST_ADAPTER = TypeAdapter(List[FoodItem])
+
+
 class EmotionState(BaseModel):
     """Emotion state"""
+    model_config = ConfigDict(extra='ignore', frozen=True)
+
     type: str
     score: int
     hrv: float
@@ -25,12 +33,16 @@ class EmotionState(BaseModel):
 
 class FoodAnalysisRequest(BaseModel):
     """Request for food analysis"""
+    model_config = ConfigDict(extra='ignore')
+
     hrv: Optional[float] = None
     heart_rate: Optional[int] = None
 
 
 class FoodAnalysisResponse(BaseModel):
     """Response from food analysis"""
+    model_config = ConfigDict(extra='ignore', frozen=True)
+
     food_items: List[FoodItem]
     total_calories: float
     nutrition: Dict[str, float]
@@ -41,6 +53,8 @@ class FoodAnalysisResponse(BaseModel):
 
 class FoodRecord(BaseModel):
     """Food record stored in database"""
+    model_config = ConfigDict(extra='ignore', frozen=True)
+
     record_id: str
     user_id: str
     image_url: str
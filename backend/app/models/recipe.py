@@ -1,13 +1,15 @@
 """
 Recipe Data Models
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from datetime import datetime
 from typing import List, Dict
 
 
 class Ingredient(BaseModel):
     """Recipe ingredient"""
+    model_config = ConfigDict(extra='ignore', frozen=True)
+
     name: str
     quantity: str
     unit: str
@@ -15,6 +17,8 @@ class Ingredient(BaseModel):
 
 class RecipeStep(BaseModel):
     """Cooking step"""
+    model_config = ConfigDict(extra='ignore', frozen=True)
+
     step_number: int
     instruction: str
     duration_minutes: int
@@ -22,6 +26,8 @@ class RecipeStep(BaseModel):
 
 class Recipe(BaseModel):
     """Recipe model"""
+    model_config = ConfigDict(extra='ignore', frozen=True)
+
     recipe_id: str
     name: str
     ingredients: List[Ingredient]
@@ -36,11 +42,14 @@ class Recipe(BaseModel):
 
 class FridgeDetectionRequest(BaseModel):
     """Request for fridge detection"""
-    pass  # Images sent as multipart/form-data
+    model_config = ConfigDict(extra='ignore')
+    # Images sent as multipart/form-data
 
 
 class DetectedIngredient(BaseModel):
     """Detected ingredient from fridge"""
+    model_config = ConfigDict(extra='ignore', frozen=True)
+
     name: str
     confidence: float
     quantity: str
@@ -48,6 +57,8 @@ class DetectedIngredient(BaseModel):
 
 class FridgeDetectionResponse(BaseModel):
     """Response from fridge detection"""
+    model_config = ConfigDict(extra='ignore', frozen=True)
+
     ingredients: List[DetectedIngredient]
     recipes: List[Dict]
     shopping_list: List[str]
@@ -2,7 +2,7 @@
 User Data Models
 PostgreSQL and Pydantic models for users
 """
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr
 from datetime import datetime
 from typing import Optional
 from enum import Enum
@@ -15,6 +15,8 @@ class SubscriptionType(str, Enum):
 
 class UserBase(BaseModel):
     """Base user schema"""
+    model_config = ConfigDict(extra='ignore')
+
     email: EmailStr
 
 
@@ -30,17 +32,18 @@ class UserLogin(UserBase):
 
 class UserResponse(UserBase):
     """User response schema"""
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
     user_id: str
     subscription_type: SubscriptionType
     profile_pic_url: Optional[str] = None
     created_at: datetime
 
-    class Config:
-        from_attributes = True
-
 
 class UserPreferences(BaseModel):
     """User preferences stored in MongoDB"""
+    model_config = ConfigDict(extra='ignore')
+
     user_id: str
     liked_foods: list[str] = []
     disliked_foods: list[str] = []
@@ -2,14 +2,133 @@
 Database Service
 High-level database operations for food records, users, and emotions
 """
-from typing import Dict, List, Optional
-from datetime import datetime
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    aioredis = None
+
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+from datetime import date, datetime
+import asyncio
 import uuid
 import logging
+from app.core.config import settings
 from app.core.database import db
 
 logger = logging.getLogger(__name__)
 
+# Daily usage counters live in Redis and are flushed to Postgres in the background
+USAGE_COUNTER_TTL_SECONDS = 172800  # 48h, outlives the UTC day it counts
+USAGE_DIRTY_SET = "usage:dirty"
+USAGE_RECONCILE_INTERVAL_SECONDS = 30
+USAGE_RECONCILE_BATCH = 500
+USAGE_REDIS_TIMEOUT_SECONDS = 0.5  # a stalled Redis falls back to Postgres, not a hung request
+
+# Created by open_usage_redis() from the app lifespan
+_usage_redis = None
+
+
+def open_usage_redis() -> None:
+    """Create the usage counter Redis client on startup"""
+    global _usage_redis
+    if REDIS_AVAILABLE and _usage_redis is None:
+        _usage_redis = aioredis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            decode_responses=True,
+            socket_timeout=USAGE_REDIS_TIMEOUT_SECONDS,
+            socket_connect_timeout=USAGE_REDIS_TIMEOUT_SECONDS
+        )
+
+
+def _usage_key(user_id: str, day: date, usage_type: str) -> str:
+    """Redis key for one user's usage counter on one day"""
+    return f"usage:{user_id}:{day.isoformat()}:{usage_type}"
+
+
+# Hot statements, prepared once per pool connection (see register_statement below).
+# Insert timestamps come from the database clock; columns are naive TIMESTAMP in UTC.
+SAVE_FOOD_RECORD_SQL = """
+    INSERT INTO food_records (
+        record_id, user_id, image_url, foods, total_calories,
+        nutrition, emotion_state, emotion_score, created_at
+    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, NOW() AT TIME ZONE 'UTC')
+    RETURNING record_id
+"""
+
+FOOD_HISTORY_PAGE_SQL = """
+    SELECT record_id::text, image_url, foods, total_calories::float8,
+           nutrition, emotion_state, emotion_score,
+           to_char(created_at, 'YYYY-MM-DD"T"HH24:MI:SS.US') AS created_at
+    FROM food_records
+    WHERE user_id = $1
+    ORDER BY food_records.created_at DESC, food_records.record_id DESC
+    LIMIT $2 OFFSET $3
+"""
+
+FOOD_HISTORY_AFTER_SQL = """
+    SELECT record_id::text, image_url, foods, total_calories::float8,
+           nutrition, emotion_state, emotion_score,
+           to_char(created_at, 'YYYY-MM-DD"T"HH24:MI:SS.US') AS created_at
+    FROM food_records
+    WHERE user_id = $1
+      AND (food_records.created_at, food_records.record_id) < ($2, $3::uuid)
+    ORDER BY food_records.created_at DESC, food_records.record_id DESC
+    LIMIT $4
+"""
+
+FOOD_HISTORY_ALL_SQL = """
+    SELECT record_id::text, image_url, foods, total_calories::float8,
+           nutrition, emotion_state, emotion_score,
+           to_char(created_at, 'YYYY-MM-DD"T"HH24:MI:SS.US') AS created_at
+    FROM food_records
+    WHERE user_id = $1
+    ORDER BY food_records.created_at DESC, food_records.record_id DESC
+"""
+
+SAVE_EMOTION_DATA_SQL = """
+    INSERT INTO emotion_data (
+        emotion_id, user_id, hrv, heart_rate, coherence,
+        emotion_type, emotion_score, timestamp
+    ) VALUES ($1, $2, $3, $4, $5, $6, $7, NOW() AT TIME ZONE 'UTC')
+    RETURNING emotion_id
+"""
+
+EMOTION_HISTORY_PAGE_SQL = """
+    SELECT emotion_id::text, hrv::float8, heart_rate, coherence::float8,
+           emotion_type, emotion_score,
+           to_char(timestamp, 'YYYY-MM-DD"T"HH24:MI:SS.US') AS timestamp
+    FROM emotion_data
+    WHERE user_id = $1
+      AND timestamp >= NOW() - ($2::int * INTERVAL '1 day')
+    ORDER BY emotion_data.timestamp DESC, emotion_data.emotion_id DESC
+    LIMIT $3
+"""
+
+EMOTION_HISTORY_AFTER_SQL = """
+    SELECT emotion_id::text, hrv::float8, heart_rate, coherence::float8,
+           emotion_type, emotion_score,
+           to_char(timestamp, 'YYYY-MM-DD"T"HH24:MI:SS.US') AS timestamp
+    FROM emotion_data
+    WHERE user_id = $1
+      AND timestamp >= NOW() - ($2::int * INTERVAL '1 day')
+      AND (emotion_data.timestamp, emotion_data.emotion_id) < ($3, $4::uuid)
+    ORDER BY emotion_data.timestamp DESC, emotion_data.emotion_id DESC
+    LIMIT $5
+"""
+
+EMOTION_HISTORY_ALL_SQL = """
+    SELECT emotion_id::text, hrv::float8, heart_rate, coherence::float8,
+           emotion_type, emotion_score,
+           to_char(timestamp, 'YYYY-MM-DD"T"HH24:MI:SS.US') AS timestamp
+    FROM emotion_data
+    WHERE user_id = $1
+      AND timestamp >= NOW() - ($2::int * INTERVAL '1 day')
+    ORDER BY emotion_data.timestamp DESC, emotion_data.emotion_id DESC
+"""
+
 
 class DatabaseService:
     """Service for database operations"""
@@ -41,27 +160,17 @@ class DatabaseService:
         """
         record_id = str(uuid.uuid4())
 
-        query = """
-            INSERT INTO food_records (
-                record_id, user_id, image_url, foods, total_calories,
-                nutrition, emotion_state, emotion_score, created_at
-            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-            RETURNING record_id
-        """
-
         try:
-            import json
-            result = await db.execute_one(
-                query,
+            result = await db.fetchrow_prepared(
+                "save_food_record",
                 record_id,
                 user_id,
                 image_url,
-                json.dumps(foods),
+                foods,
                 total_calories,
-                json.dumps(nutrition),
+                nutrition,
                 emotion_state,
-                emotion_score,
-                datetime.utcnow()
+                emotion_score
             )
 
             logger.info(f"Saved food record: {record_id}")
@@ -71,53 +180,105 @@ class DatabaseService:
             logger.error(f"Failed to save food record: {e}")
             raise
 
+    async def save_analysis_bundle(
+        self,
+        user_id: str,
+        food_record: Dict,
+        usage_type: str = 'food_analyses',
+        emotion_data: Optional[Dict] = None
+    ) -> str:
+        """
+        Persist all writes of one analysis
+
+        The food record and optional emotion reading are independent rows, so
+        they run concurrently on their own pool connections. The usage counter
+        is only incremented once both have succeeded, so a failed save never
+        consumes the user's free-tier quota. If one write fails the sibling
+        is cancelled and awaited before the first error is re-raised; a
+        sibling that had already committed is not rolled back.
+
+        Args:
+            user_id: User ID
+            food_record: Keyword arguments for save_food_record (without user_id)
+            usage_type: Usage counter to increment
+            emotion_data: Keyword arguments for save_emotion_data (without user_id)
+
+        Returns:
+            Record ID of the saved food record
+        """
+        writes = [asyncio.ensure_future(self.save_food_record(user_id=user_id, **food_record))]
+        if emotion_data is not None:
+            writes.append(
+                asyncio.ensure_future(self.save_emotion_data(user_id=user_id, **emotion_data))
+            )
+
+        try:
+            record_id, *_ = await asyncio.gather(*writes)
+        except BaseException:
+            # 남은 쓰기 작업 취소 / Don't leave the sibling write running unobserved
+            for write in writes:
+                write.cancel()
+            await asyncio.gather(*writes, return_exceptions=True)
+            raise
+
+        await self.increment_daily_usage(user_id, usage_type)
+        return record_id
+
     async def get_food_history(
         self,
         user_id: str,
         limit: int = 10,
-        offset: int = 0
+        offset: int = 0,
+        cursor: Optional[Tuple[datetime, str]] = None
     ) -> List[Dict]:
         """
-        Get user's food history
+        Get user's food history, newest first
+
+        Pages are fetched by keyset on (created_at, record_id), so deep pages
+        cost one index seek instead of scanning and discarding skipped rows.
 
         Args:
             user_id: User ID
             limit: Number of records to return
-            offset: Offset for pagination
+            offset: Deprecated; only used when no cursor is given
+            cursor: (created_at, record_id) of the last record on the previous page
 
         Returns:
             List of food records
         """
-        query = """
-            SELECT record_id, image_url, foods, total_calories,
-                   nutrition, emotion_state, emotion_score, created_at
-            FROM food_records
-            WHERE user_id = $1
-            ORDER BY created_at DESC
-            LIMIT $2 OFFSET $3
-        """
+        if cursor is not None:
+            statement = "food_history_after"
+            args = (user_id, cursor[0], cursor[1], limit)
+        else:
+            statement = "food_history_page"
+            args = (user_id, limit, offset)
 
         try:
-            rows = await db.execute_query(query, user_id, limit, offset)
-
-            return [
-                {
-                    'record_id': str(row['record_id']),
-                    'image_url': row['image_url'],
-                    'foods': row['foods'],
-                    'total_calories': float(row['total_calories']),
-                    'nutrition': row['nutrition'],
-                    'emotion_state': row['emotion_state'],
-                    'emotion_score': row['emotion_score'],
-                    'created_at': row['created_at'].isoformat()
-                }
-                for row in rows
-            ]
+            rows = await db.fetch_prepared(statement, *args)
+
+            # Types and ISO timestamps are produced by Postgres/asyncpg codecs
+            return [dict(row) for row in rows]
 
         except Exception as e:
             logger.error(f"Failed to get food history: {e}")
             return []
 
+    async def stream_food_history(self, user_id: str) -> AsyncIterator[Dict]:
+        """
+        Stream a user's full food history, newest first
+
+        Rows are read through a server-side cursor, so memory stays flat no
+        matter how many records the user has.
+
+        Args:
+            user_id: User ID
+
+        Yields:
+            Food records in the same shape as get_food_history
+        """
+        async for row in db.iterate_prepared("food_history_all", user_id):
+            yield dict(row)
+
     async def save_emotion_data(
         self,
         user_id: str,
@@ -143,25 +304,16 @@ class DatabaseService:
         """
         emotion_id = str(uuid.uuid4())
 
-        query = """
-            INSERT INTO emotion_data (
-                emotion_id, user_id, hrv, heart_rate, coherence,
-                emotion_type, emotion_score, timestamp
-            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
-            RETURNING emotion_id
-        """
-
         try:
-            result = await db.execute_one(
-                query,
+            result = await db.fetchrow_prepared(
+                "save_emotion_data",
                 emotion_id,
                 user_id,
                 hrv,
                 heart_rate,
                 coherence,
                 emotion_type,
-                emotion_score,
-                datetime.utcnow()
+                emotion_score
             )
 
             logger.info(f"Saved emotion data: {emotion_id}")
@@ -171,50 +323,158 @@ class DatabaseService:
             logger.error(f"Failed to save emotion data: {e}")
             raise
 
+    # Column order for bulk emotion ingestion via COPY
+    EMOTION_DATA_COPY_COLUMNS = (
+        'emotion_id', 'user_id', 'hrv', 'heart_rate', 'coherence',
+        'emotion_type', 'emotion_score', 'timestamp'
+    )
+
+    async def save_emotion_data_batch(self, user_id: str, readings: Sequence[Dict]) -> List[str]:
+        """
+        Save many emotion readings with a single COPY
+
+        For wearable sync, where samples arrive in bulk; interactive single
+        readings keep using save_emotion_data's prepared INSERT, which is
+        cheaper than a COPY round trip for one row.
+
+        Args:
+            user_id: User ID
+            readings: Dicts with save_emotion_data's keyword arguments plus an
+                optional naive-UTC 'timestamp' (defaults to now)
+
+        Returns:
+            Emotion data IDs, in input order
+        """
+        if not readings:
+            return []
+
+        now = datetime.utcnow()
+        emotion_ids = [str(uuid.uuid4()) for _ in readings]
+        records = [
+            (
+                emotion_id,
+                user_id,
+                reading['hrv'],
+                reading['heart_rate'],
+                reading['coherence'],
+                reading['emotion_type'],
+                reading['emotion_score'],
+                reading.get('timestamp') or now
+            )
+            for emotion_id, reading in zip(emotion_ids, readings)
+        ]
+
+        try:
+            await db.copy_records('emotion_data', records, self.EMOTION_DATA_COPY_COLUMNS)
+            logger.info(f"Saved {len(records)} emotion readings for user {user_id}")
+            return emotion_ids
+
+        except Exception as e:
+            logger.error(f"Failed to save emotion data batch: {e}")
+            raise
+
+    # Upper bound on rows returned by a single emotion history read
+    EMOTION_HISTORY_MAX_ROWS = 5000
+
     async def get_emotion_history(
         self,
         user_id: str,
-        days: int = 7
+        days: int = 7,
+        limit: int = EMOTION_HISTORY_MAX_ROWS,
+        cursor: Optional[Tuple[datetime, str]] = None
     ) -> List[Dict]:
         """
-        Get user's emotion history
+        Get user's emotion history, newest first
+
+        The interval is a bind parameter so asyncpg reuses one prepared
+        statement for every `days` value; results are capped at `limit` and
+        further pages are read by keyset on (timestamp, emotion_id).
 
         Args:
             user_id: User ID
             days: Number of days to retrieve
+            limit: Maximum number of records to return
+            cursor: (timestamp, emotion_id) of the last record on the previous page
 
         Returns:
             List of emotion records
         """
-        query = """
-            SELECT emotion_id, hrv, heart_rate, coherence,
-                   emotion_type, emotion_score, timestamp
-            FROM emotion_data
-            WHERE user_id = $1
-              AND timestamp >= NOW() - INTERVAL '%s days'
-            ORDER BY timestamp DESC
-        """ % days
+        if cursor is not None:
+            statement = "emotion_history_after"
+            args = (user_id, days, cursor[0], cursor[1], limit)
+        else:
+            statement = "emotion_history_page"
+            args = (user_id, days, limit)
 
         try:
-            rows = await db.execute_query(query, user_id)
-
-            return [
-                {
-                    'emotion_id': str(row['emotion_id']),
-                    'hrv': float(row['hrv']),
-                    'heart_rate': row['heart_rate'],
-                    'coherence': float(row['coherence']) if row['coherence'] else None,
-                    'emotion_type': row['emotion_type'],
-                    'emotion_score': row['emotion_score'],
-                    'timestamp': row['timestamp'].isoformat()
-                }
-                for row in rows
-            ]
+            rows = await db.fetch_prepared(statement, *args)
+
+            # Types and ISO timestamps are produced by Postgres/asyncpg codecs
+            return [dict(row) for row in rows]
 
         except Exception as e:
             logger.error(f"Failed to get emotion history: {e}")
             return []
 
+    # Safety cap for callers that aggregate over a whole period
+    EMOTION_HISTORY_SCAN_MAX_ROWS = 200000
+
+    async def get_full_emotion_history(
+        self,
+        user_id: str,
+        days: int = 7
+    ) -> Tuple[List[Dict], bool]:
+        """
+        Get every emotion reading in the period, newest first
+
+        Follows the keyset cursor page by page, so aggregations (trends,
+        daily summaries) are not limited to the newest
+        EMOTION_HISTORY_MAX_ROWS readings.
+
+        Args:
+            user_id: User ID
+            days: Number of days to retrieve
+
+        Returns:
+            (records, truncated) - truncated is True when the
+            EMOTION_HISTORY_SCAN_MAX_ROWS safety cap was hit
+        """
+        records: List[Dict] = []
+        cursor = None
+
+        while True:
+            page = await self.get_emotion_history(
+                user_id, days, limit=self.EMOTION_HISTORY_MAX_ROWS, cursor=cursor
+            )
+            records.extend(page)
+
+            if len(page) < self.EMOTION_HISTORY_MAX_ROWS:
+                return records, False
+
+            if len(records) >= self.EMOTION_HISTORY_SCAN_MAX_ROWS:
+                logger.warning(
+                    "Emotion history for user %s truncated at %d readings",
+                    user_id, len(records)
+                )
+                return records, True
+
+            last = page[-1]
+            cursor = (datetime.fromisoformat(last['timestamp']), last['emotion_id'])
+
+    async def stream_emotion_history(self, user_id: str, days: int = 7) -> AsyncIterator[Dict]:
+        """
+        Stream a user's emotion history without a row cap, newest first
+
+        Args:
+            user_id: User ID
+            days: Number of days to retrieve
+
+        Yields:
+            Emotion records in the same shape as get_emotion_history
+        """
+        async for row in db.iterate_prepared("emotion_history_all", user_id, days):
+            yield dict(row)
+
     # Whitelisted usage types to prevent SQL injection
     ALLOWED_USAGE_TYPES = {'food_analyses', 'fridge_analyses', 'wellness_checks'}
 
@@ -242,16 +502,19 @@ class DatabaseService:
             raise ValueError(f"Invalid usage type: {usage_type}. Must be one of {self.ALLOWED_USAGE_TYPES}")
 
         today = datetime.utcnow().date()
+        key = _usage_key(user_id, today, usage_type)
 
-        # Now safe to use f-string with whitelisted value
-        query = f"""
-            SELECT {usage_type} FROM daily_usage
-            WHERE user_id = $1 AND date = $2
-        """
+        # Fast path: O(1) Redis read, no database round-trip
+        if _usage_redis is not None:
+            try:
+                cached = await _usage_redis.get(key)
+                if cached is not None:
+                    return int(cached)
+            except Exception as e:
+                logger.warning("Usage counter read failed, falling back to database: %s", e)
 
         try:
-            row = await db.execute_one(query, user_id, today)
-            return row[usage_type] if row else 0
+            count = await self._fetch_daily_usage(user_id, today, usage_type)
 
         except Exception as e:
             logger.error(f"Failed to check daily usage: {e}", exc_info=True)
@@ -265,6 +528,23 @@ class DatabaseService:
                 details={"user_id": user_id, "usage_type": usage_type}
             )
 
+        await self._seed_usage_counter(key, count)
+        return count
+
+    async def _fetch_daily_usage(self, user_id: str, day: date, usage_type: str) -> int:
+        """Read the persisted usage count (usage_type must already be whitelisted)"""
+        row = await db.fetchrow_prepared(f"daily_usage_select:{usage_type}", user_id, day)
+        return row[usage_type] if row else 0
+
+    async def _seed_usage_counter(self, key: str, count: int) -> None:
+        """Populate a missing Redis counter without overwriting concurrent increments"""
+        if _usage_redis is None:
+            return
+        try:
+            await _usage_redis.set(key, count, ex=USAGE_COUNTER_TTL_SECONDS, nx=True)
+        except Exception as e:
+            logger.warning("Failed to seed usage counter %s: %s", key, e)
+
     async def increment_daily_usage(
         self,
         user_id: str,
@@ -289,20 +569,31 @@ class DatabaseService:
             raise ValueError(f"Invalid usage type: {usage_type}. Must be one of {self.ALLOWED_USAGE_TYPES}")
 
         today = datetime.utcnow().date()
-        usage_id = str(uuid.uuid4())
 
-        # Now safe to use f-string with whitelisted value
-        # RETURNING clause ensures we get the new count
-        query = f"""
-            INSERT INTO daily_usage (usage_id, user_id, date, {usage_type})
-            VALUES ($1, $2, $3, 1)
-            ON CONFLICT (user_id, date)
-            DO UPDATE SET {usage_type} = daily_usage.{usage_type} + 1
-            RETURNING {usage_type}
-        """
+        # Fast path: Redis INCR, persisted later by reconcile_daily_usage()
+        if _usage_redis is not None:
+            key = _usage_key(user_id, today, usage_type)
+            try:
+                if not await _usage_redis.exists(key):
+                    count = await self._fetch_daily_usage(user_id, today, usage_type)
+                    await _usage_redis.set(key, count, ex=USAGE_COUNTER_TTL_SECONDS, nx=True)
+
+                async with _usage_redis.pipeline(transaction=True) as pipe:
+                    pipe.incr(key)
+                    pipe.expire(key, USAGE_COUNTER_TTL_SECONDS)
+                    pipe.sadd(USAGE_DIRTY_SET, key)
+                    new_count, _, _ = await pipe.execute()
+                return new_count
+            except Exception as e:
+                logger.warning("Usage counter increment failed, writing to database: %s", e)
+
+        usage_id = str(uuid.uuid4())
 
         try:
-            row = await db.execute_one(query, usage_id, user_id, today)
+            # RETURNING clause ensures we get the new count
+            row = await db.fetchrow_prepared(
+                f"daily_usage_increment:{usage_type}", usage_id, user_id, today
+            )
             new_count = row[usage_type]
             logger.info(f"Incremented {usage_type} for user {user_id}: {new_count}")
             return new_count
@@ -318,6 +609,52 @@ class DatabaseService:
                 details={"user_id": user_id, "usage_type": usage_type}
             )
 
+    async def reconcile_daily_usage(self) -> int:
+        """
+        Flush Redis usage counters touched since the last run into daily_usage
+
+        GREATEST() keeps the write idempotent, so a counter flushed twice or a
+        row written by the database fallback path is never rolled back.
+
+        Returns:
+            Number of counters written
+        """
+        if _usage_redis is None:
+            return 0
+
+        keys = await _usage_redis.spop(USAGE_DIRTY_SET, USAGE_RECONCILE_BATCH)
+        if not keys:
+            return 0
+
+        values = await _usage_redis.mget(keys)
+        queries = []
+        for key, value in zip(keys, values):
+            if value is None:
+                continue  # expired before it could be flushed
+            _, user_id, day, usage_type = key.split(":", 3)
+            if usage_type not in self.ALLOWED_USAGE_TYPES:
+                continue
+            queries.append((
+                f"""
+                INSERT INTO daily_usage (usage_id, user_id, date, {usage_type})
+                VALUES ($1, $2, $3, $4)
+                ON CONFLICT (user_id, date)
+                DO UPDATE SET
+                    {usage_type} = GREATEST(daily_usage.{usage_type}, EXCLUDED.{usage_type}),
+                    updated_at = NOW()
+                """,
+                (str(uuid.uuid4()), user_id, date.fromisoformat(day), int(value))
+            ))
+
+        try:
+            await db.gather_queries(queries)
+        except Exception:
+            # Put the keys back so the next run retries them
+            await _usage_redis.sadd(USAGE_DIRTY_SET, *keys)
+            raise
+
+        return len(queries)
+
     async def get_user_preferences(self, user_id: str) -> Optional[Dict]:
         """
         Get user preferences from MongoDB
@@ -329,15 +666,12 @@ class DatabaseService:
             User preferences dictionary
         """
         try:
-            preferences = await db.mongo_db.user_preferences.find_one(
-                {'user_id': user_id}
+            # Served by the unique user_id index; _id is dropped server-side
+            return await db.mongo_db.user_preferences.find_one(
+                {'user_id': user_id},
+                {'_id': 0}
             )
 
-            if preferences:
-                preferences['_id'] = str(preferences['_id'])
-
-            return preferences
-
         except Exception as e:
             logger.error(f"Failed to get user preferences: {e}")
             return None
@@ -354,10 +688,13 @@ class DatabaseService:
             user_id: User ID
             preferences: Preferences dictionary
         """
+        # updated_at is stamped by the MongoDB server
+        fields = {k: v for k, v in preferences.items() if k != 'updated_at'}
+
         try:
             await db.mongo_db.user_preferences.update_one(
                 {'user_id': user_id},
-                {'$set': {**preferences, 'updated_at': datetime.utcnow()}},
+                {'$set': fields, '$currentDate': {'updated_at': True}},
                 upsert=True
             )
 
@@ -365,3 +702,51 @@ class DatabaseService:
 
         except Exception as e:
             logger.error(f"Failed to save user preferences: {e}")
+
+
+async def run_usage_reconciler(interval: float = USAGE_RECONCILE_INTERVAL_SECONDS) -> None:
+    """Background task: periodically persist Redis usage counters to Postgres"""
+    service = DatabaseService()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            flushed = await service.reconcile_daily_usage()
+            if flushed:
+                logger.info("Reconciled %d daily usage counters", flushed)
+        except Exception as e:
+            logger.error("Daily usage reconciliation failed: %s", e)
+
+
+# Register hot statements; usage_type columns come from the whitelist only
+db.register_statement("save_food_record", SAVE_FOOD_RECORD_SQL)
+db.register_statement("food_history_page", FOOD_HISTORY_PAGE_SQL)
+db.register_statement("food_history_after", FOOD_HISTORY_AFTER_SQL)
+db.register_statement("food_history_all", FOOD_HISTORY_ALL_SQL)
+db.register_statement("save_emotion_data", SAVE_EMOTION_DATA_SQL)
+db.register_statement("emotion_history_page", EMOTION_HISTORY_PAGE_SQL)
+db.register_statement("emotion_history_after", EMOTION_HISTORY_AFTER_SQL)
+db.register_statement("emotion_history_all", EMOTION_HISTORY_ALL_SQL)
+
+for _usage_type in DatabaseService.ALLOWED_USAGE_TYPES:
+    db.register_statement(
+        f"daily_usage_select:{_usage_type}",
+        f"SELECT {_usage_type} FROM daily_usage WHERE user_id = $1 AND date = $2"
+    )
+    db.register_statement(
+        f"daily_usage_increment:{_usage_type}",
+        f"""
+        INSERT INTO daily_usage (usage_id, user_id, date, {_usage_type})
+        VALUES ($1, $2, $3, 1)
+        ON CONFLICT (user_id, date)
+        DO UPDATE SET {_usage_type} = daily_usage.{_usage_type} + 1
+        RETURNING {_usage_type}
+        """
+    )
+
+
+async def close_usage_redis() -> None:
+    """Close the usage counter Redis client on shutdown"""
+    global _usage_redis
+    if _usage_redis is not None:
+        await _usage_redis.aclose()
+        _usage_redis = None
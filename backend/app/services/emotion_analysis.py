@@ -12,9 +12,167 @@ Wearable data analysis for 8-emotion classification
 - Classification rules based on psychology and HRV research
 - Real-time emotion monitoring and personalized recommendations
 """
-from typing import Dict, Tuple
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
+
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
 from app.models.emotion import EmotionType, EmotionAnalysisResult
 
+# 점수 구간별 만점과 감점 기울기 (HRV, 심박수, 일관성 순)
+# Full points and outside-band slope per signal, in (hrv, hr, coherence) order
+_BAND_POINTS = (40.0, 40.0, 20.0)
+_BAND_SLOPES = (0.5, 0.5, 20.0)
+
+# 반복되는 웨어러블 측정값의 순위 캐시 크기
+# Size of the ranking cache for repeated wearable readings
+_RANK_CACHE_SIZE = 4096
+
+# 감정별 식사 추천 문구 (모듈 로드 시 한 번만 생성)
+# Meal recommendation per emotion, built once at import instead of per call
+_NUTRITION_RECOMMENDATIONS = {
+    EmotionType.STRESS: "Consider foods rich in magnesium and B vitamins to help manage stress.",
+    EmotionType.FATIGUE: "Your meal is good, but consider adding iron-rich foods for energy.",
+    EmotionType.ANXIETY: "Foods with omega-3 and tryptophan can help promote calmness.",
+    EmotionType.HAPPINESS: "Great choice! This meal aligns well with your positive state.",
+    EmotionType.EXCITEMENT: "Good energy! Consider balancing with some protein.",
+    EmotionType.CALMNESS: "Perfect meal for maintaining your peaceful state.",
+    EmotionType.FOCUS: "Excellent choice for sustained concentration.",
+    EmotionType.APATHY: "Try adding colorful vegetables to boost motivation."
+}
+_DEFAULT_NUTRITION_RECOMMENDATION = "Enjoy your meal mindfully!"
+
+
+def _score_band(value: float, low: float, high: float, points: float, slope: float) -> float:
+    """Full points inside the band, decreasing linearly with distance outside it"""
+    if value < low:
+        return max(0, points - (low - value) * slope)
+    if value > high:
+        return max(0, points - (value - high) * slope)
+    return points
+
+
+def _score_rule(
+    hrv: float,
+    hr: int,
+    coherence: float,
+    bounds: Tuple[Optional[Tuple[float, float]], ...]
+) -> float:
+    """
+    단일 감정 규칙 점수 (0-100)
+    Score one emotion rule (0-100)
+
+    Plain module-level functions: this runs 8 times per classification, and
+    skipping method lookups and tuple re-packing is most of its cost.
+    """
+    hrv_bounds, hr_bounds, coherence_bounds = bounds
+    score = 0.0
+
+    # HRV scoring (40 points)
+    if hrv_bounds is not None:
+        score += _score_band(hrv, hrv_bounds[0], hrv_bounds[1], _BAND_POINTS[0], _BAND_SLOPES[0])
+
+    # HR scoring (40 points)
+    if hr_bounds is not None:
+        score += _score_band(hr, hr_bounds[0], hr_bounds[1], _BAND_POINTS[1], _BAND_SLOPES[1])
+
+    # Coherence scoring (20 points)
+    if coherence_bounds is not None:
+        score += _score_band(
+            coherence, coherence_bounds[0], coherence_bounds[1], _BAND_POINTS[2], _BAND_SLOPES[2]
+        )
+
+    return min(100, score)
+
+
+def _build_rule_table(rules: Dict[str, Dict]):
+    """
+    감정 규칙을 읽기 전용 NumPy 배열로 변환
+    Turn the emotion rules into read-only NumPy arrays
+
+    Returns:
+        (lower, upper, mask) arrays of shape (n_emotions, 3), rows in rule
+        order and columns (hrv, hr, coherence); mask is False for non-range
+        rules such as 'unstable' HRV
+    """
+    keys = ('hrv', 'hr', 'coherence')
+    mask = np.array([[isinstance(r[k], tuple) for k in keys] for r in rules.values()])
+    lower = np.array([
+        [r[k][0] if isinstance(r[k], tuple) else 0.0 for k in keys] for r in rules.values()
+    ])
+    upper = np.array([
+        [r[k][1] if isinstance(r[k], tuple) else 0.0 for k in keys] for r in rules.values()
+    ])
+
+    for array in (lower, upper, mask):
+        array.flags.writeable = False
+    return lower, upper, mask
+
+
+def _score_matrix(hrv, hr, coherence, lower, upper, mask):
+    """
+    벡터화된 감정 점수 커널
+    Vectorized emotion scoring kernel
+
+    Same arithmetic as _score_rule, over
+    any broadcastable hrv/hr/coherence arrays.
+
+    Returns:
+        Scores of shape (*broadcast_shape, n_emotions)
+    """
+    values = np.stack(np.broadcast_arrays(
+        np.asarray(hrv, dtype=np.float64),
+        np.asarray(hr, dtype=np.float64),
+        np.asarray(coherence, dtype=np.float64)
+    ), axis=-1)[..., np.newaxis, :]
+
+    # 구간 안이면 0, 밖이면 가까운 경계까지의 거리
+    # Zero inside the band, distance to the nearest bound outside it
+    distance = np.maximum(lower - values, 0) + np.maximum(values - upper, 0)
+    bands = np.maximum(0, np.asarray(_BAND_POINTS) - distance * np.asarray(_BAND_SLOPES))
+
+    return np.minimum(100, (bands * mask).sum(axis=-1))
+
+
+# 최상위 감정 조회표 격자: HRV 0-150ms, 심박수 30-200bpm (1 단위), 일관성 0-1 (0.1 단위)
+# Top-emotion lookup grid: HRV 0-150ms and HR 30-200bpm in steps of 1, coherence 0-1 in steps of 0.1
+_LUT_HRV_MAX = 150
+_LUT_HR_MIN = 30
+_LUT_HR_MAX = 200
+_LUT_COHERENCE_STEPS = 10
+
+
+def _build_top_emotion_lut(lower, upper, mask):
+    """
+    모든 격자점의 최상위 감정 인덱스와 점수를 미리 계산
+    Precompute the winning emotion index and its score for every grid point
+
+    Built one HRV row at a time to keep temporaries small.
+
+    Returns:
+        (index, score) arrays of shape (151, 171, 11), int8 and uint8
+    """
+    hr = np.arange(_LUT_HR_MIN, _LUT_HR_MAX + 1)[:, np.newaxis]
+    coherence = (np.arange(_LUT_COHERENCE_STEPS + 1) / _LUT_COHERENCE_STEPS)[np.newaxis, :]
+    shape = (_LUT_HRV_MAX + 1, hr.shape[0], coherence.shape[1])
+
+    index = np.empty(shape, dtype=np.int8)
+    score = np.empty(shape, dtype=np.uint8)
+    for hrv in range(_LUT_HRV_MAX + 1):
+        scores = _score_matrix(hrv, hr, coherence, lower, upper, mask)
+        # argmax는 동점이면 앞선 규칙을 선택 (classify_emotion의 안정 정렬과 동일)
+        # argmax keeps the earlier rule on ties, like classify_emotion's stable sort
+        index[hrv] = scores.argmax(axis=-1)
+        score[hrv] = scores.max(axis=-1).astype(np.uint8)
+
+    index.flags.writeable = False
+    score.flags.writeable = False
+    return index, score
+
 
 class EmotionAnalysisService:
     """
@@ -86,6 +244,29 @@ class EmotionAnalysisService:
         }
     }
 
+    # 규칙을 (감정, (hrv, hr, coherence) 범위) 튜플로 한 번만 펼침
+    # Rules flattened once into (emotion, (hrv, hr, coherence) ranges);
+    # non-range rules such as 'unstable' HRV become None and score 0
+    _RULE_BOUNDS = tuple(
+        (
+            emotion_type,
+            tuple(
+                rules[key] if isinstance(rules[key], tuple) else None
+                for key in ('hrv', 'hr', 'coherence')
+            )
+        )
+        for emotion_type, rules in EMOTION_RULES.items()
+    )
+
+    # 같은 규칙의 읽기 전용 NumPy 표 (일괄 채점용)
+    # Same rules as a frozen NumPy table for batch scoring
+    EMOTION_ORDER = tuple(EMOTION_RULES)
+    if NUMPY_AVAILABLE:
+        _RULE_LOWER, _RULE_UPPER, _RULE_MASK = _build_rule_table(EMOTION_RULES)
+        _TOP_EMOTION_LUT, _TOP_SCORE_LUT = _build_top_emotion_lut(
+            _RULE_LOWER, _RULE_UPPER, _RULE_MASK
+        )
+
     async def classify_emotion(self, hrv: float, hr: int, coherence: float = 0.5) -> EmotionAnalysisResult:
         """
         웨어러블 데이터 기반 감정 분류
@@ -125,17 +306,7 @@ class EmotionAnalysisService:
             >>> print(f"{result.type}: {result.score}%")
             calmness: 85%
         """
-        emotions = []
-
-        # 모든 감정 유형에 대해 점수 계산
-        # Calculate score for all emotion types
-        for emotion_type, rules in self.EMOTION_RULES.items():
-            score = self._calculate_emotion_score(hrv, hr, coherence, rules)
-            emotions.append((emotion_type, score))
-
-        # 점수로 정렬하여 최고 점수의 감정 선택
-        # Sort by score and select top emotion
-        emotions.sort(key=lambda x: x[1], reverse=True)
+        emotions = self._rank_emotions(hrv, hr, coherence)
         top_emotion, top_score = emotions[0]
 
         # 결과 객체 생성
@@ -148,12 +319,62 @@ class EmotionAnalysisService:
             heart_rate=hr
         )
 
+    def _rank_emotions(self, hrv: float, hr: int, coherence: float):
+        """Score every emotion and return (emotion, score) pairs, best first"""
+        return _rank_emotions_cached(hrv, hr, coherence)
+
+    def classify_top_emotion(self, hrv: float, hr: int, coherence: float = 0.5) -> Tuple[str, int]:
+        """
+        최상위 감정만 필요한 경우의 O(1) 조회
+        O(1) lookup for callers that only need the winning emotion
+
+        Inputs are rounded to the lookup grid (1ms HRV, 1bpm HR, 0.1
+        coherence) and clamped to its range, so readings right on a rule
+        boundary may differ from classify_emotion.
+
+        Returns:
+            (emotion type, score 0-100)
+        """
+        if not NUMPY_AVAILABLE:
+            top_emotion, top_score = self._rank_emotions(hrv, hr, coherence)[0]
+            return top_emotion, int(top_score)
+
+        h = min(_LUT_HRV_MAX, max(0, round(hrv)))
+        r = min(_LUT_HR_MAX, max(_LUT_HR_MIN, round(hr))) - _LUT_HR_MIN
+        c = min(_LUT_COHERENCE_STEPS, max(0, round(coherence * _LUT_COHERENCE_STEPS)))
+        return self.EMOTION_ORDER[self._TOP_EMOTION_LUT[h, r, c]], int(self._TOP_SCORE_LUT[h, r, c])
+
+    def score_readings(self, hrv, hr, coherence=0.5):
+        """
+        여러 측정값을 한 번에 채점 (NumPy 벡터 연산)
+        Score many readings at once with NumPy
+
+        Single readings go through classify_emotion; at 8 rules the per-call
+        NumPy overhead outweighs the arithmetic, so this path is for bulk
+        re-scoring of stored readings.
+
+        Args:
+            hrv: HRV values (array-like)
+            hr: Heart rates (array-like)
+            coherence: Coherence values (array-like or scalar)
+
+        Returns:
+            np.ndarray of shape (n, 8); columns follow EMOTION_ORDER
+        """
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("numpy is required for batch emotion scoring")
+
+        return _score_matrix(
+            hrv, hr, coherence,
+            self._RULE_LOWER, self._RULE_UPPER, self._RULE_MASK
+        )
+
     def _calculate_emotion_score(
         self,
         hrv: float,
         hr: int,
         coherence: float,
-        rules: Dict
+        bounds: Tuple[Optional[Tuple[float, float]], ...]
     ) -> float:
         """
         Calculate emotion score (0-100) based on rules
@@ -162,42 +383,12 @@ class EmotionAnalysisService:
             hrv: Heart Rate Variability
             hr: Heart Rate
             coherence: Coherence score
-            rules: Emotion rules
+            bounds: (hrv, hr, coherence) ranges; None for non-range rules
 
         Returns:
             Score from 0-100
         """
-        score = 0.0
-
-        # HRV scoring (40 points)
-        if isinstance(rules['hrv'], tuple):
-            hrv_min, hrv_max = rules['hrv']
-            if hrv_min <= hrv <= hrv_max:
-                score += 40
-            else:
-                # Gradual decrease
-                distance = min(abs(hrv - hrv_min), abs(hrv - hrv_max))
-                score += max(0, 40 - distance * 0.5)
-
-        # HR scoring (40 points)
-        if isinstance(rules['hr'], tuple):
-            hr_min, hr_max = rules['hr']
-            if hr_min <= hr <= hr_max:
-                score += 40
-            else:
-                distance = min(abs(hr - hr_min), abs(hr - hr_max))
-                score += max(0, 40 - distance * 0.5)
-
-        # Coherence scoring (20 points)
-        if isinstance(rules['coherence'], tuple):
-            coh_min, coh_max = rules['coherence']
-            if coh_min <= coherence <= coh_max:
-                score += 20
-            else:
-                distance = min(abs(coherence - coh_min), abs(coherence - coh_max))
-                score += max(0, 20 - distance * 20)
-
-        return min(100, score)
+        return _score_rule(hrv, hr, coherence, bounds)
 
     async def get_emotion_nutrition_recommendation(
         self,
@@ -214,15 +405,27 @@ class EmotionAnalysisService:
         Returns:
             Personalized recommendation string
         """
-        recommendations = {
-            EmotionType.STRESS: "Consider foods rich in magnesium and B vitamins to help manage stress.",
-            EmotionType.FATIGUE: "Your meal is good, but consider adding iron-rich foods for energy.",
-            EmotionType.ANXIETY: "Foods with omega-3 and tryptophan can help promote calmness.",
-            EmotionType.HAPPINESS: "Great choice! This meal aligns well with your positive state.",
-            EmotionType.EXCITEMENT: "Good energy! Consider balancing with some protein.",
-            EmotionType.CALMNESS: "Perfect meal for maintaining your peaceful state.",
-            EmotionType.FOCUS: "Excellent choice for sustained concentration.",
-            EmotionType.APATHY: "Try adding colorful vegetables to boost motivation."
-        }
+        return _NUTRITION_RECOMMENDATIONS.get(emotion_type, _DEFAULT_NUTRITION_RECOMMENDATION)
+
+
+@lru_cache(maxsize=_RANK_CACHE_SIZE)
+def _rank_emotions_cached(hrv: float, hr: int, coherence: float) -> Tuple[Tuple[str, float], ...]:
+    """
+    감정 순위 계산 (동일 입력은 캐시에서 반환)
+    Rank all emotions for one reading, memoised on the exact inputs
+
+    Wearables report HRV and heart rate already rounded, so polling clients
+    resend identical readings and a hit skips all eight rule evaluations.
+    The ranking is returned as a tuple so cached entries cannot be mutated.
+    """
+    # 모든 감정 유형에 대해 점수 계산 (미리 펼친 규칙 테이블 사용)
+    # Calculate score for all emotion types from the flattened rule table
+    emotions = [
+        (emotion_type, _score_rule(hrv, hr, coherence, bounds))
+        for emotion_type, bounds in EmotionAnalysisService._RULE_BOUNDS
+    ]
 
-        return recommendations.get(emotion_type, "Enjoy your meal mindfully!")
+    # 점수로 정렬 (동점이면 규칙 순서 유지)
+    # Sort by score (stable, so ties keep rule order)
+    emotions.sort(key=lambda x: x[1], reverse=True)
+    return tuple(emotions)
@@ -27,11 +27,11 @@ except ImportError:
     np = None
 
 try:
-    import redis
+    import redis.asyncio as aioredis
     REDIS_AVAILABLE = True
 except ImportError:
     REDIS_AVAILABLE = False
-    redis = None
+    aioredis = None
 
 try:
     from ultralytics import YOLO
@@ -40,6 +40,13 @@ except ImportError:
     YOLO_AVAILABLE = False
     YOLO = None
 
+try:
+    import torch
+    YOLO_DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+except ImportError:
+    torch = None
+    YOLO_DEVICE = "cpu"
+
 try:
     import anthropic
     ANTHROPIC_AVAILABLE = True
@@ -47,12 +54,154 @@ except ImportError:
     ANTHROPIC_AVAILABLE = False
     anthropic = None
 
-import json
+import orjson
+import asyncio
 import hashlib
-from typing import List, Dict, Any
+import io
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from PIL import Image
+from typing import List, Dict, Any, Optional, Tuple
 import base64
 from app.core.config import settings
 
+# YOLO 추론 전용 스레드 (모델이 GPU를 점유하므로 워커당 1개)
+# Dedicated YOLO inference thread; the model owns the GPU, so one per worker
+_yolo_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="yolo")
+
+# YOLO 입력 크기; 바운딩 박스도 원본 해상도와 무관하게 이 좌표계로 반환
+# YOLO input size; bboxes are reported in this 640x640 space whatever the upload resolution
+YOLO_INPUT_SIZE = 640
+
+# 마이크로 배치 설정: 최대 배치 크기와 배치를 채우기 위한 최대 대기 시간
+# Micro-batching limits: max images per predict call, max wait to fill a batch
+YOLO_MAX_BATCH = 8
+YOLO_BATCH_WINDOW_SECONDS = 0.01
+
+
+class BatchingYOLORunner:
+    """
+    YOLO 마이크로 배치 실행기
+    Micro-batching YOLO runner
+
+    동시 업로드 요청의 이미지를 최대 YOLO_MAX_BATCH개까지 모아 한 번의
+    predict 호출로 처리합니다. GPU 커널 실행 비용이 배치 전체에 분산됩니다.
+
+    Concurrent uploads are collected (up to YOLO_MAX_BATCH images, waiting at
+    most YOLO_BATCH_WINDOW_SECONDS) and run through a single predict call, so
+    kernel launch overhead is paid once per batch instead of once per image.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self._queue: Optional[asyncio.Queue] = None
+        self._consumer: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_consumer(self) -> None:
+        """Start the consumer task on the running loop (restart if the loop changed)"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._consumer is None or self._consumer.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._consumer = loop.create_task(self._consume())
+
+    async def submit(self, image: Image.Image):
+        """
+        이미지를 배치 큐에 넣고 해당 이미지의 YOLO 결과를 기다림
+        Queue an image and wait for its YOLO result
+
+        Returns:
+            ultralytics Results object for this image
+        """
+        self._ensure_consumer()
+        future = self._loop.create_future()
+        await self._queue.put((image, future))
+        return await future
+
+    async def _collect_batch(self) -> List:
+        """Wait for one item, then gather more until the batch is full or the window closes"""
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + YOLO_BATCH_WINDOW_SECONDS
+
+        while len(batch) < YOLO_MAX_BATCH:
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _consume(self) -> None:
+        """Consumer loop: one predict call per collected batch"""
+        while True:
+            batch = await self._collect_batch()
+            # 대기 중 취소된 요청은 제외
+            # Drop requests that were cancelled while queued
+            batch = [(image, future) for image, future in batch if not future.cancelled()]
+            if not batch:
+                continue
+
+            try:
+                results = await self._loop.run_in_executor(
+                    _yolo_executor,
+                    partial(
+                        self.model.predict,
+                        source=[image for image, _ in batch],
+                        imgsz=YOLO_INPUT_SIZE,
+                        conf=settings.YOLO_CONFIDENCE_THRESHOLD,
+                        device=YOLO_DEVICE,
+                        half=YOLO_DEVICE == "cuda",
+                        verbose=False
+                    )
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+
+_yolo_runner: Optional[BatchingYOLORunner] = None
+
+
+def _get_yolo_runner(model) -> Optional[BatchingYOLORunner]:
+    """Return the process-wide batching runner, creating it around the first loaded model"""
+    global _yolo_runner
+    if model is None:
+        return None
+    if _yolo_runner is None:
+        _yolo_runner = BatchingYOLORunner(model)
+    return _yolo_runner
+
+
+# Claude Vision 전송 이미지 제한 (긴 변 1024px, JPEG 품질 85)
+# Claude Vision upload limits: longest side 1024px, JPEG quality 85
+CLAUDE_IMAGE_MAX_SIDE = 1024
+CLAUDE_JPEG_QUALITY = 85
+_CLAUDE_MEDIA_TYPES = {
+    "JPEG": "image/jpeg",
+    "PNG": "image/png",
+    "GIF": "image/gif",
+    "WEBP": "image/webp",
+}
+
+# 모든 서비스 인스턴스가 공유하는 Redis 커넥션 풀
+# Redis connection pool shared by every service instance
+_redis_pool = aioredis.ConnectionPool(
+    host=settings.REDIS_HOST,
+    port=settings.REDIS_PORT,
+    max_connections=50,
+    decode_responses=True  # JSON 문자열 자동 디코딩
+) if REDIS_AVAILABLE else None
+
 
 class ImageRecognitionService:
     """
@@ -95,17 +244,19 @@ class ImageRecognitionService:
         # Load YOLO v8 model (custom trained on food dataset)
         self.yolo_model = YOLO(settings.YOLO_MODEL_PATH) if YOLO_AVAILABLE else None
 
-        # Redis 클라이언트 초기화 (결과 캐싱용)
-        # Initialize Redis client for result caching
-        self.redis_client = redis.Redis(
-            host=settings.REDIS_HOST,
-            port=settings.REDIS_PORT,
-            decode_responses=True  # JSON 문자열 자동 디코딩
+        # 요청 간 공유되는 YOLO 배치 실행기
+        # YOLO micro-batching runner shared across requests
+        self._yolo_runner = _get_yolo_runner(self.yolo_model)
+
+        # Redis 클라이언트 초기화 (결과 캐싱용, 공유 풀 사용)
+        # Initialize async Redis client for result caching (shared pool)
+        self.redis_client = aioredis.Redis(
+            connection_pool=_redis_pool
         ) if REDIS_AVAILABLE else None
 
         # Claude Vision API 클라이언트 초기화
         # Initialize Claude Vision API client
-        self.claude_client = anthropic.Anthropic(
+        self.claude_client = anthropic.AsyncAnthropic(
             api_key=settings.CLAUDE_API_KEY
         ) if ANTHROPIC_AVAILABLE else None
 
@@ -162,21 +313,22 @@ class ImageRecognitionService:
         """
         # === 1단계: Redis 캐시 확인 ===
         # Stage 1: Check Redis cache
-        # 이미지 MD5 해시를 키로 사용하여 중복 분석 방지
-        # Use image MD5 hash as key to prevent redundant analysis
-        cache_key = self._get_cache_key(image_bytes)
-        cached_result = self.redis_client.get(f"food_detection:{cache_key}")1
+        # 이미지 지각 해시(pHash)를 키로 사용하여 중복 분석 방지 (디코딩은 스레드 풀에서)
+        # Perceptual-hash key prevents redundant analysis; decoding runs in the thread pool
+        loop = asyncio.get_running_loop()
+        cache_key = await loop.run_in_executor(None, self._get_cache_key, image_bytes)
+        cached_result = await self.redis_client.get(f"food_detection:{cache_key}")
 
         if cached_result:
             # 캐시 히트: JSON을 파싱하여 즉시 반환 (~10ms)
             # Cache hit: Parse JSON and return immediately (~10ms)
-            return json.loads(cached_result)
+            return orjson.loads(cached_result)
 
-        # === 2단계: 이미지 전처리 ===
-        # Stage 2: Preprocess image
-        # 640x640 리사이징, 정규화 (0-1)
-        # Resize to 640x640, normalize (0-1)
-        image = self._preprocess_image(image_bytes)
+        # === 2단계: 이미지 디코딩 ===
+        # Stage 2: Decode image
+        # 리사이즈(letterbox)와 정규화는 ultralytics가 내부에서 처리
+        # Letterbox resize and normalization are done inside ultralytics
+        image = Image.open(io.BytesIO(image_bytes))
 
         # === 3단계: YOLO v8 추론 ===
         # Stage 3: YOLO v8 inference
@@ -193,7 +345,7 @@ class ImageRecognitionService:
         if avg_confidence < settings.YOLO_HIGH_CONFIDENCE_THRESHOLD:
             # Claude Vision API 호출 (고정밀 분석, ~2초)
             # Call Claude Vision API (high precision analysis, ~2s)
-            claude_results = await self._run_claude_inference(image_bytes)
+            claude_results = await self._run_claude_inference(image_bytes, image)
 
             # YOLO와 Claude 결과를 병합 (Claude 우선)
             # Merge YOLO and Claude results (Claude takes priority)
@@ -203,61 +355,70 @@ class ImageRecognitionService:
         # Stage 5: Cache results
         # Redis에 24시간 동안 결과 저장 (TTL: 86400초)
         # Store results in Redis for 24 hours (TTL: 86400s)
-        self.redis_client.setex(
+        await self.redis_client.setex(
             f"food_detection:{cache_key}",
             86400,  # 24시간 TTL
-            json.dumps(detections)
+            orjson.dumps(detections)
         )
 
         return detections
 
-    def _preprocess_image(self, image_bytes: bytes) -> np.ndarray:
+    async def _run_yolo_inference(self, image: Image.Image) -> List[Dict]:
+        """Run YOLO v8 inference through the shared micro-batching runner"""
+        result = await self._yolo_runner.submit(image)
+
+        # 모든 박스의 텐서를 한 번에 변환 (박스별 텐서 인덱싱/복사 방지)
+        # Convert each tensor once for all boxes instead of indexing box by box
+        boxes = result.boxes
+        classes = boxes.cls.tolist()
+        confidences = boxes.conf.tolist()
+
+        # 정규화 좌표(0-1)를 640 좌표계로 변환 (estimate_portion_size 기준과 동일)
+        # Scale normalized boxes to the 640x640 space estimate_portion_size expects
+        bboxes = (boxes.xyxyn * YOLO_INPUT_SIZE).tolist()  # [[x1, y1, x2, y2], ...]
+
+        return [
+            {
+                'class': result.names[int(cls)],
+                'confidence': float(conf),
+                'bbox': bbox
+            }
+            for cls, conf, bbox in zip(classes, confidences, bboxes)
+        ]
+
+    def _encode_for_claude(self, image_bytes: bytes, image: Image.Image) -> Tuple[str, str]:
         """
-        YOLO v8용 이미지 전처리
-        Preprocess image for YOLO v8 inference
+        Claude Vision 전송용 이미지 인코딩
+        Encode the image for the Claude Vision request
 
-        처리 단계:
-        1. 바이트 데이터를 numpy 배열로 디코딩
-        2. 640x640으로 리사이징 (YOLO v8 입력 크기)
-        3. 픽셀 값 정규화 (0-255 → 0-1)
-        """
-        # 1. 바이트 데이터를 OpenCV 이미지로 디코딩
-        # Decode bytes to OpenCV image
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-
-        # 2. YOLO v8 입력 크기로 리사이징 (640x640)
-        # Resize to YOLO v8 input size (640x640)
-        image = cv2.resize(image, (640, 640))
-
-        # 3. 픽셀 값 정규화 (0-1 범위)
-        # Normalize pixel values (0-1 range)
-        image = image / 255.0
-
-        return image
-
-    async def _run_yolo_inference(self, image: np.ndarray) -> List[Dict]:
-        """Run YOLO v8 inference"""
-        results = self.yolo_model.predict(
-            image,
-            conf=settings.YOLO_CONFIDENCE_THRESHOLD,
-            verbose=False
-        )
+        Images already small enough are sent as-is with their real media type.
+        Larger (or unsupported) images are downscaled to CLAUDE_IMAGE_MAX_SIDE
+        and re-encoded as JPEG, which is usually several times smaller.
 
-        detections = []
-        for result in results:
-            for box in result.boxes:
-                detections.append({
-                    'class': result.names[int(box.cls)],
-                    'confidence': float(box.conf),
-                    'bbox': box.xyxy.tolist()[0]  # [x1, y1, x2, y2]
-                })
+        Returns:
+            (media_type, base64 data)
+        """
+        media_type = _CLAUDE_MEDIA_TYPES.get(image.format)
+        if media_type and max(image.size) <= CLAUDE_IMAGE_MAX_SIDE:
+            return media_type, base64.b64encode(image_bytes).decode()
 
-        return detections
+        resized = image.convert("RGB")
+        resized.thumbnail((CLAUDE_IMAGE_MAX_SIDE, CLAUDE_IMAGE_MAX_SIDE))
+        buffer = io.BytesIO()
+        resized.save(buffer, format="JPEG", quality=CLAUDE_JPEG_QUALITY)
+        return "image/jpeg", base64.b64encode(buffer.getvalue()).decode()
 
-    async def _run_claude_inference(self, image_bytes: bytes) -> Dict:
+    async def _run_claude_inference(self, image_bytes: bytes, image: Image.Image) -> Dict:
         """Run Claude Vision inference for high accuracy"""
-        response = self.claude_client.messages.create(
+        # 리사이즈/JPEG 인코딩은 CPU 작업이므로 기본 스레드 풀에서 실행
+        # Resize/JPEG encode is CPU-bound; keep it off the event loop (default pool,
+        # not the YOLO thread, so it never queues behind inference)
+        loop = asyncio.get_running_loop()
+        media_type, data = await loop.run_in_executor(
+            None, self._encode_for_claude, image_bytes, image
+        )
+
+        response = await self.claude_client.messages.create(
             model="claude-3-5-sonnet-20241022",
             max_tokens=1024,
             messages=[
@@ -268,8 +429,8 @@ class ImageRecognitionService:
                             "type": "image",
                             "source": {
                                 "type": "base64",
-                                "media_type": "image/jpeg",
-                                "data": base64.b64encode(image_bytes).decode()
+                                "media_type": media_type,
+                                "data": data
                             }
                         },
                         {
@@ -292,7 +453,7 @@ class ImageRecognitionService:
             ]
         )
 
-        return json.loads(response.content[0].text)
+        return orjson.loads(response.content[0].text)
 
     def _merge_detections(self, yolo_results: List[Dict], claude_results: Dict) -> List[Dict]:
         """Merge YOLO and Claude results"""
@@ -308,7 +469,33 @@ class ImageRecognitionService:
         return yolo_results
 
     def _get_cache_key(self, image_bytes: bytes) -> str:
-        """Generate cache key from image hash"""
+        """
+        이미지 지각 해시(pHash) 기반 캐시 키 생성
+        Generate cache key from a perceptual hash of the image
+
+        JPEG 재압축, EXIF 제거 등으로 바이트가 달라져도 같은 키가 나오도록
+        32x32 흑백 DCT의 저주파 8x8 블록을 중앙값 기준 64비트로 변환합니다.
+        JPEG은 1/8 크기로만 디코딩합니다. 디코딩에 실패하면 MD5 해시로 대체합니다.
+
+        Re-encoded or EXIF-stripped copies of the same photo map to the same
+        key: the low-frequency 8x8 block of a 32x32 grayscale DCT is
+        thresholded at its median into 64 bits. JPEGs are decoded at 1/8
+        scale, which is all a 32x32 hash needs. Falls back to MD5 when the
+        image cannot be decoded. CPU-bound; call it from a worker thread.
+
+        Detections cached under this key carry bboxes in the fixed 640x640
+        space, so resized copies sharing a key reuse them safely.
+        """
+        if CV2_AVAILABLE and NUMPY_AVAILABLE:
+            image = cv2.imdecode(
+                np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_8
+            )
+            if image is not None:
+                small = cv2.resize(image, (32, 32), interpolation=cv2.INTER_AREA)
+                low_freq = cv2.dct(small.astype(np.float32))[:8, :8]
+                bits = (low_freq > np.median(low_freq)).flatten()
+                return f"phash:{np.packbits(bits).tobytes().hex()}"
+
         return hashlib.md5(image_bytes).hexdigest()
 
     def estimate_portion_size(self, bbox: List[float], image_size: tuple = (640, 640)) -> float:
@@ -323,3 +510,23 @@ class ImageRecognitionService:
 
         # Clamp to reasonable range
         return max(50, min(500, estimated_grams))
+
+    def estimate_portion_sizes(
+        self,
+        bboxes: List[List[float]],
+        image_size: tuple = (640, 640)
+    ) -> List[float]:
+        """
+        모든 탐지 결과의 분량을 한 번에 추정
+        Estimate portion sizes for all detections of an image at once
+
+        Same heuristic as estimate_portion_size, computed as one NumPy
+        operation over an (N, 4) array of boxes.
+        """
+        if not NUMPY_AVAILABLE or not bboxes:
+            return [self.estimate_portion_size(bbox, image_size) for bbox in bboxes]
+
+        boxes = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+        areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+        ratios = areas / (image_size[0] * image_size[1])
+        return np.clip((ratios / 0.5) * 200, 50, 500).tolist()
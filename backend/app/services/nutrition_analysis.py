@@ -14,16 +14,104 @@ USDA FoodData Central database integration for nutrition information
 """
 import sqlite3
 try:
-    import redis
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
+
+try:
+    import redis.asyncio as aioredis
     REDIS_AVAILABLE = True
 except ImportError:
     REDIS_AVAILABLE = False
-    redis = None
+    aioredis = None
 
-import json
-from typing import Dict, Optional
+import asyncio
+import logging
+import orjson
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+# FTS5 쿼리 문법 문자 (검색어에서 제거)
+# FTS5 query syntax characters, stripped from search terms
+_FTS_SYNTAX_CHARS = re.compile(r'["*:()^]')
+
+
+# 합산 대상 영양소 (calculate_total_nutrition 결과 키 순서)
+# Nutrients summed by calculate_total_nutrition, in result key order
+NUTRIENT_KEYS = (
+    'calories', 'protein', 'carbs', 'fat', 'fiber', 'sugar',
+    'sodium', 'calcium', 'iron', 'vitamin_a', 'vitamin_c'
+)
+
+# 영양 정보 캐시 유지 시간 (24시간)
+# Nutrition cache TTL (24 hours)
+NUTRITION_CACHE_TTL_SECONDS = 86400
+
+# 음식 조회 SQL (연결의 문장 캐시에서 컴파일된 문장 재사용)
+# Food lookup SQL. The same string objects go to every execute() call, so
+# sqlite3's per-connection statement cache returns the compiled statement
+# instead of parsing and planning the query on each lookup.
+FIND_FOOD_FTS_SQL = """
+    SELECT f.name, f.calories, f.protein, f.carbs, f.fat, f.fiber, f.sugar,
+           f.sodium, f.calcium, f.iron, f.vitamin_a, f.vitamin_c
+    FROM foods f
+    JOIN foods_fts ON foods_fts.rowid = f.rowid
+    WHERE foods_fts MATCH ?
+    ORDER BY foods_fts.rank
+    LIMIT 1
+"""
+
+FIND_FOOD_PREFIX_SQL = """
+    SELECT name, calories, protein, carbs, fat, fiber, sugar,
+           sodium, calcium, iron, vitamin_a, vitamin_c
+    FROM foods
+    WHERE name LIKE ?
+    LIMIT 1
+"""
+
+def _fts_query(food_name: str) -> str:
+    """
+    음식 이름을 FTS5 MATCH 쿼리로 변환
+    Turn a food name into an FTS5 MATCH query
+
+    Each token is quoted (so words like AND/NOT are literal) and marked as
+    a prefix, so "apple" still finds "Apples, raw" as the old LIKE did.
+    """
+    tokens = _FTS_SYNTAX_CHARS.sub(' ', food_name).split()
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def _scale_nutrition(row: tuple, portion_grams: float) -> Dict:
+    """
+    100g 기준 USDA 행을 분량에 맞게 환산
+    Scale a per-100g USDA row to the given portion
+    """
+    # USDA 데이터는 100g 기준이므로 비율 계산
+    # USDA data is per 100g, so calculate ratio
+    multiplier = portion_grams / 100.0
+
+    return {
+        'name': row[0],
+        'portion_grams': portion_grams,
+        'calories': round(row[1] * multiplier, 1),
+        'protein': round(row[2] * multiplier, 1),
+        'carbs': round(row[3] * multiplier, 1),
+        'fat': round(row[4] * multiplier, 1),
+        'fiber': round(row[5] * multiplier, 1),
+        'sugar': round(row[6] * multiplier, 1),
+        'sodium': round(row[7] * multiplier, 1),
+        'calcium': round(row[8] * multiplier, 1),
+        'iron': round(row[9] * multiplier, 1),
+        'vitamin_a': round(row[10] * multiplier, 1),
+        'vitamin_c': round(row[11] * multiplier, 1),
+    }
+
 
 class NutritionAnalysisService:
     """
@@ -40,7 +128,7 @@ class NutritionAnalysisService:
     - 기타: 식이섬유, 당류, 콜레스테롤 등
 
     성능:
-    - SQLite 조회: ~100ms
+    - SQLite 조회: FTS5 색인 사용 (LIKE는 검색 실패 시에만)
     - Redis 캐시 히트: ~5ms
     - 캐시 TTL: 24시간
     """
@@ -63,14 +151,88 @@ class NutritionAnalysisService:
             # Database file doesn't exist, set to None (test environment)
             self.db = None
 
-        # Redis 캐시 클라이언트 초기화
-        # Initialize Redis cache client
-        self.redis_client = redis.Redis(
+        # 연결 설정 → 이름 검색 색인 생성 (최초 1회) → 조회 전용으로 전환
+        # Tune the connection, build the name indexes once, then go read-only
+        self._fts_enabled = False
+        if self.db:
+            self._configure_connection()
+            self._fts_enabled = self._ensure_search_indexes()
+            self.db.execute("PRAGMA query_only = 1")
+
+        # 비동기 Redis 캐시 클라이언트 (orjson이 bytes를 바로 읽으므로 디코딩 생략)
+        # Async Redis cache client; raw bytes, since orjson parses them directly
+        self.redis_client = aioredis.Redis(
             host=settings.REDIS_HOST,
-            port=settings.REDIS_PORT,
-            decode_responses=True
+            port=settings.REDIS_PORT
         ) if REDIS_AVAILABLE else None
 
+    def _configure_connection(self):
+        """
+        읽기 위주 USDA 조회용 SQLite 설정
+        Tune the SQLite connection for read-mostly lookups
+
+        - WAL: readers in other workers are not blocked while the indexes are built
+        - mmap_size: pages are read straight from the OS page cache (256MB)
+        - cache_size: 64MB page cache per connection
+        - temp_store: sorter/temp b-trees stay in memory
+        """
+        for pragma in (
+            "PRAGMA journal_mode = WAL",
+            "PRAGMA mmap_size = 268435456",
+            "PRAGMA cache_size = -65536",
+            "PRAGMA temp_store = MEMORY",
+        ):
+            try:
+                self.db.execute(pragma)
+            except sqlite3.Error as e:
+                logger.warning(f"Could not apply {pragma}: {e}")
+
+    def _ensure_search_indexes(self) -> bool:
+        """
+        음식 이름 검색 색인 생성
+        Create the name indexes used by get_nutrition_info if missing
+
+        - idx_foods_name_nocase lets the prefix LIKE fallback run as an index
+          range scan (LIKE is case-insensitive, so the index must be NOCASE)
+        - foods_fts is an external-content FTS5 table: it stores only the
+          tokens and reads names back from foods, so the one-off rebuild is
+          the only cost
+
+        Returns:
+            True if full-text lookups can be used
+        """
+        try:
+            self.db.execute("PRAGMA case_sensitive_like = OFF")
+            self.db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_foods_name_nocase ON foods(name COLLATE NOCASE)"
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Food name index unavailable: {e}")
+
+        try:
+            exists = self.db.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'foods_fts'"
+            ).fetchone()
+            if not exists:
+                with self.db:
+                    self.db.execute(
+                        """
+                        CREATE VIRTUAL TABLE IF NOT EXISTS foods_fts USING fts5(
+                            name,
+                            content='foods',
+                            content_rowid='rowid',
+                            tokenize='unicode61 remove_diacritics 1'
+                        )
+                        """
+                    )
+                    self.db.execute("INSERT INTO foods_fts(foods_fts) VALUES('rebuild')")
+            return True
+        except sqlite3.Error as e:
+            # FTS5 미지원 또는 읽기 전용 DB: LIKE 검색으로 동작
+            # No FTS5 or a read-only database: fall back to LIKE lookups
+            logger.warning(f"Food name full-text index unavailable: {e}")
+            return False
+
     async def get_nutrition_info(self, food_name: str, portion_grams: float = 100) -> Optional[Dict]:
         """
         음식의 영양 정보 조회
@@ -115,26 +277,13 @@ class NutritionAnalysisService:
         # Stage 1: Check Redis cache
         cache_key = f"nutrition:{food_name}:{portion_grams}"
         if self.redis_client:
-            cached = self.redis_client.get(cache_key)
+            cached = await self.redis_client.get(cache_key)
             if cached:
-                return json.loads(cached)
-
-        # === 2단계: SQLite 데이터베이스 조회 ===
-        # Stage 2: Query SQLite database
-        # LIKE 연산자로 부분 일치 검색 (유연한 검색)
-        # Use LIKE operator for partial match (flexible search)
-        cursor = self.db.execute(
-            """
-            SELECT name, calories, protein, carbs, fat, fiber, sugar,
-                   sodium, calcium, iron, vitamin_a, vitamin_c
-            FROM foods
-            WHERE name LIKE ?
-            LIMIT 1
-            """,
-            (f"%{food_name}%",)
-        )
-
-        result = cursor.fetchone()
+                return orjson.loads(cached)
+
+        # === 2단계: SQLite 데이터베이스 조회 (이벤트 루프 밖 스레드에서) ===
+        # Stage 2: Query SQLite in a worker thread, off the event loop
+        result = await asyncio.to_thread(self._find_food, food_name)
 
         if not result:
             # 음식을 찾지 못함
@@ -143,61 +292,137 @@ class NutritionAnalysisService:
 
         # === 3단계: 분량에 따른 영양소 계산 ===
         # Stage 3: Calculate nutrition based on portion size
-        # USDA 데이터는 100g 기준이므로 비율 계산
-        # USDA data is per 100g, so calculate ratio
-        multiplier = portion_grams / 100.0
-
-        nutrition = {
-            'name': result[0],
-            'portion_grams': portion_grams,
-            'calories': round(result[1] * multiplier, 1),
-            'protein': round(result[2] * multiplier, 1),
-            'carbs': round(result[3] * multiplier, 1),
-            'fat': round(result[4] * multiplier, 1),
-            'fiber': round(result[5] * multiplier, 1),
-            'sugar': round(result[6] * multiplier, 1),
-            'sodium': round(result[7] * multiplier, 1),
-            'calcium': round(result[8] * multiplier, 1),
-            'iron': round(result[9] * multiplier, 1),
-            'vitamin_a': round(result[10] * multiplier, 1),
-            'vitamin_c': round(result[11] * multiplier, 1),
-        }
+        nutrition = _scale_nutrition(result, portion_grams)
 
         # === 4단계: Redis에 24시간 캐싱 ===
         # Stage 4: Cache in Redis for 24 hours
         if self.redis_client:
-            self.redis_client.setex(cache_key, 86400, json.dumps(nutrition))
+            await self.redis_client.setex(
+                cache_key, NUTRITION_CACHE_TTL_SECONDS, orjson.dumps(nutrition)
+            )
 
         return nutrition
 
+    async def get_nutrition_info_batch(
+        self,
+        items: List[Tuple[str, float]]
+    ) -> List[Optional[Dict]]:
+        """
+        여러 음식의 영양 정보를 한 번에 조회
+        Get nutrition information for all foods of a meal at once
+
+        Same results as calling get_nutrition_info per item, but the Redis
+        cache is read with one MGET and misses are written back in one
+        pipeline, so a meal costs two round trips instead of up to 2N.
+        Foods detected more than once are looked up in SQLite only once.
+
+        Args:
+            items: (food_name, portion_grams) pairs
+
+        Returns:
+            Nutrition dicts (or None when not found), in input order
+        """
+        if not self.db or not items:
+            return [None] * len(items)
+
+        # === 1단계: Redis 캐시 일괄 확인 ===
+        # Stage 1: Check the Redis cache with a single MGET
+        cache_keys = [
+            f"nutrition:{food_name}:{portion_grams}" for food_name, portion_grams in items
+        ]
+        if self.redis_client:
+            cached = await self.redis_client.mget(cache_keys)
+        else:
+            cached = [None] * len(items)
+
+        # === 2단계: 캐시 미스만 SQLite 조회 (스레드 한 번에 모두) ===
+        # Stage 2: Query SQLite for the misses, all in one worker-thread hop
+        missed_names = {food_name for (food_name, _), hit in zip(items, cached) if not hit}
+        rows = await asyncio.to_thread(self._find_foods, missed_names) if missed_names else {}
+
+        # === 3단계: 분량에 따른 영양소 계산 ===
+        # Stage 3: Scale each row to its portion
+        results = []
+        misses = {}
+        for (food_name, portion_grams), cache_key, hit in zip(items, cache_keys, cached):
+            if hit:
+                results.append(orjson.loads(hit))
+                continue
+
+            row = rows[food_name]
+            nutrition = _scale_nutrition(row, portion_grams) if row else None
+            if nutrition:
+                misses[cache_key] = nutrition
+            results.append(nutrition)
+
+        # === 4단계: 새 결과를 파이프라인으로 캐싱 ===
+        # Stage 4: Cache new results in one pipeline
+        if self.redis_client and misses:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for cache_key, nutrition in misses.items():
+                pipe.setex(cache_key, NUTRITION_CACHE_TTL_SECONDS, orjson.dumps(nutrition))
+            await pipe.execute()
+
+        return results
+
+    def _find_foods(self, food_names) -> Dict[str, Optional[tuple]]:
+        """Run _find_food for several names (called from a worker thread)"""
+        return {food_name: self._find_food(food_name) for food_name in food_names}
+
+    def _find_food(self, food_name: str) -> Optional[tuple]:
+        """Find the per-100g USDA row for a food name, or None"""
+        # FTS5 색인으로 단어 접두사 검색, BM25 순위가 가장 높은 항목
+        # Word-prefix search through the FTS5 index, best BM25 rank first
+        result = None
+        fts_query = _fts_query(food_name) if self._fts_enabled else ''
+        if fts_query:
+            result = self.db.execute(FIND_FOOD_FTS_SQL, (fts_query,)).fetchone()
+
+        if not result:
+            # 접두사 LIKE 검색 (NOCASE 색인 범위 스캔)
+            # Prefix LIKE, served as a range scan on idx_foods_name_nocase.
+            # No leading wildcard: "%apple%" also matched "Pineapple"
+            result = self.db.execute(FIND_FOOD_PREFIX_SQL, (f"{food_name}%",)).fetchone()
+
+        return result
+
     def calculate_total_nutrition(self, food_items: list) -> Dict:
         """
         Calculate total nutrition from multiple food items
 
+        Items are laid out as an (items x NUTRIENT_KEYS) array and summed per
+        column in one NumPy reduction instead of a dict update per nutrient.
+
         Args:
             food_items: List of food items with nutrition info
 
         Returns:
             Total nutrition summary
         """
-        total = {
-            'calories': 0,
-            'protein': 0,
-            'carbs': 0,
-            'fat': 0,
-            'fiber': 0,
-            'sugar': 0,
-            'sodium': 0,
-            'calcium': 0,
-            'iron': 0,
-            'vitamin_a': 0,
-            'vitamin_c': 0,
-        }
-
-        for item in food_items:
-            if 'nutrition' in item:
-                for key in total.keys():
-                    total[key] += item['nutrition'].get(key, 0)
+        rows = [
+            [item['nutrition'].get(key, 0) for key in NUTRIENT_KEYS]
+            for item in food_items
+            if 'nutrition' in item
+        ]
+
+        if not rows:
+            totals = [0] * len(NUTRIENT_KEYS)
+        elif NUMPY_AVAILABLE:
+            totals = np.asarray(rows, dtype=np.float64).sum(axis=0).tolist()
+        else:
+            totals = [sum(column) for column in zip(*rows)]
 
         # Round all values
-        return {k: round(v, 1) for k, v in total.items()}
+        return {key: round(total, 1) for key, total in zip(NUTRIENT_KEYS, totals)}
+
+
+@lru_cache(maxsize=None)
+def get_nutrition_service() -> NutritionAnalysisService:
+    """
+    프로세스 공용 영양 분석 서비스
+    Process-wide NutritionAnalysisService
+
+    Opening the USDA database and creating its search indexes happens once,
+    when the app starts (see app.main.lifespan), not on every request.
+    """
+    return NutritionAnalysisService()
@@ -12,9 +12,49 @@ TF-IDF based recipe matching with emotion scoring
 - Recommend cooking time/difficulty based on current emotion
 - Automatic extraction of missing ingredients (shopping list)
 """
-from typing import List, Dict
+from functools import lru_cache
+from typing import List, Dict, Optional
 from sklearn.feature_extraction.text import TfidfVectorizer
+import hashlib
 import json
+import joblib
+import logging
+import numpy as np
+import orjson
+import os
+import sklearn
+
+logger = logging.getLogger(__name__)
+
+# 학습된 TF-IDF 색인 저장 위치 (워커 간 공유, 재시작 시 재학습 생략)
+# Fitted TF-IDF index on disk, shared by workers and reused across restarts
+RECIPE_INDEX_PATH = 'data/recipes_tfidf.joblib'
+
+
+# 감정별 선호 레시피 (조리 시간 범위, 난이도)
+# Preferred recipe per emotion: (cooking time range in minutes, difficulty)
+EMOTION_RECIPE_PREFERENCES = {
+    'stress': ((5, 15), 'easy'),
+    'fatigue': ((10, 20), 'easy'),
+    'anxiety': ((5, 10), 'easy'),
+    'happiness': ((20, 40), 'medium'),
+    'excitement': ((15, 30), 'medium'),
+    'calmness': ((20, 40), 'medium'),
+    'focus': ((25, 45), 'hard'),
+    'apathy': ((5, 15), 'easy'),
+}
+
+# 채점용으로 미리 계산한 (목표 평균 조리 시간, 난이도)
+# Precomputed (target average cooking time, difficulty) used by _score_by_emotion
+_EMOTION_RECIPE_TARGETS = {
+    emotion: ((low + high) / 2, difficulty)
+    for emotion, ((low, high), difficulty) in EMOTION_RECIPE_PREFERENCES.items()
+}
+
+
+def _ingredient_terms(ingredients: List[str]) -> List[str]:
+    """TF-IDF analyzer: each ingredient name (lower-cased) is one term"""
+    return [ing.lower() for ing in ingredients]
 
 
 class RecipeMatchingService:
@@ -45,14 +85,21 @@ class RecipeMatchingService:
         1. TF-IDF Vectorizer 초기화 (재료 매칭용)
         2. 레시피 데이터베이스 로드 (MongoDB)
         """
-        # TF-IDF 벡터라이저 (텍스트 유사도 계산)
-        # TF-IDF vectorizer for text similarity calculation
-        self.vectorizer = TfidfVectorizer()
+        # TF-IDF 벡터라이저와 레시피 행렬 (레시피 로드 시 한 번만 학습)
+        # TF-IDF vectorizer and recipe matrix, fitted once when recipes load
+        self.vectorizer = TfidfVectorizer(analyzer=_ingredient_terms, sublinear_tf=True)
+        self.recipe_matrix = None
+
+        # 재료 어휘와 레시피별 재료 비트마스크 (비트 i = 어휘의 i번째 재료)
+        # Ingredient vocabulary and per-recipe bitmasks (bit i = vocab entry i)
+        self.vocab = {}
+        self._recipe_masks = []
 
         # 레시피 목록 (MongoDB에서 로드)
         # Recipe list (loaded from MongoDB)
         self.recipes = []
         self._load_recipes()
+        self._build_index()
 
     def _load_recipes(self):
         """Load recipes from database or file"""
@@ -70,6 +117,96 @@ class RecipeMatchingService:
             # More recipes...
         ]
 
+    def _build_index(self):
+        """
+        레시피 재료 TF-IDF 행렬 생성
+        Fit the vectorizer over all recipe ingredient lists
+
+        The resulting sparse (recipes x ingredients) matrix is reused by
+        every query, which only has to transform the user's ingredients.
+        A matrix saved at RECIPE_INDEX_PATH for the same corpus is loaded
+        instead of refitting.
+        """
+        if self.recipes:
+            corpus = [recipe['ingredients'] for recipe in self.recipes]
+            fingerprint = self._index_fingerprint(corpus)
+            index = self._load_index(fingerprint)
+            if index:
+                self.vectorizer, self.recipe_matrix = index
+            else:
+                self.recipe_matrix = self.vectorizer.fit_transform(corpus)
+                self._save_index(fingerprint)
+
+        self.vocab = {
+            ing: i for i, ing in enumerate(sorted(
+                {ing.lower() for recipe in self.recipes for ing in recipe['ingredients']}
+            ))
+        }
+        self._recipe_masks = [
+            self._ingredient_mask(recipe['ingredients']) for recipe in self.recipes
+        ]
+
+    @staticmethod
+    def _index_fingerprint(corpus: List[List[str]]) -> str:
+        """Identify a fitted index by its corpus and the scikit-learn that pickled it"""
+        digest = hashlib.sha256(orjson.dumps(corpus))
+        digest.update(sklearn.__version__.encode())
+        return digest.hexdigest()
+
+    def _load_index(self, fingerprint: str) -> Optional[tuple]:
+        """
+        저장된 TF-IDF 색인 로드
+        Load the saved vectorizer and matrix if they were fitted on this corpus
+
+        The matrix arrays are memory-mapped read-only, so forked workers share
+        the OS page cache instead of each holding a copy.
+        """
+        if not os.path.exists(RECIPE_INDEX_PATH):
+            return None
+        try:
+            saved = joblib.load(RECIPE_INDEX_PATH, mmap_mode='r')
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable recipe index {RECIPE_INDEX_PATH}: {e}")
+            return None
+        if saved.get('fingerprint') != fingerprint:
+            return None
+        return saved['vectorizer'], saved['matrix']
+
+    def _save_index(self, fingerprint: str):
+        """Persist the fitted index; written to a temp file and renamed into place"""
+        tmp_path = f"{RECIPE_INDEX_PATH}.{os.getpid()}.tmp"
+        try:
+            joblib.dump(
+                {
+                    'fingerprint': fingerprint,
+                    'vectorizer': self.vectorizer,
+                    'matrix': self.recipe_matrix
+                },
+                tmp_path,
+                compress=0
+            )
+            os.replace(tmp_path, RECIPE_INDEX_PATH)
+        except OSError as e:
+            logger.warning(f"Could not save recipe index to {RECIPE_INDEX_PATH}: {e}")
+
+    def _ingredient_mask(self, ingredients: List[str]) -> int:
+        """Bitmask of the ingredients in the vocabulary (unknown ones are dropped)"""
+        mask = 0
+        for ing in ingredients:
+            index = self.vocab.get(ing.lower())
+            if index is not None:
+                mask |= 1 << index
+        return mask
+
+    def _similar_recipe_indices(self, ingredients: List[str]) -> np.ndarray:
+        """Indices of recipes sharing at least one ingredient, via one sparse product"""
+        if self.recipe_matrix is None:
+            return np.empty(0, dtype=np.intp)
+
+        query = self.vectorizer.transform([ingredients])
+        similarities = (self.recipe_matrix @ query.T).toarray().ravel()
+        return np.flatnonzero(similarities)
+
     async def match_recipes(
         self,
         ingredients: List[str],
@@ -118,10 +255,6 @@ class RecipeMatchingService:
             Garlic Bread: 75% match
             Tomato Soup: 80% match
         """
-        # 재료를 텍스트로 변환 (TF-IDF 입력용)
-        # Convert ingredients to text for TF-IDF
-        ingredient_text = ' '.join(ingredients)
-
         # === 1단계: 재료 기반 레시피 검색 ===
         # Stage 1: Search recipes based on ingredients
         # 70% 이상 재료가 일치하는 레시피만 선택
@@ -135,25 +268,34 @@ class RecipeMatchingService:
             # Emotion fit score (cooking time + difficulty)
             recipe['emotion_score'] = self._score_by_emotion(recipe, emotion_type)
 
-            # 재료 매칭률 (보유 재료 / 필요 재료)
-            # Ingredient match rate (available / required)
-            recipe['ingredient_match'] = self._calculate_ingredient_match(
-                ingredients,
-                recipe['ingredients']
+            # 재료 매칭률 (보유 재료 / 필요 재료, _search_recipes에서 센 값)
+            # Ingredient match rate (available / required, as counted by _search_recipes)
+            recipe['ingredient_match'] = (
+                recipe['available_ingredients'] / recipe['total_ingredients']
             )
 
         # === 3단계: 최종 점수로 정렬 ===
         # Stage 3: Sort by final score
         # 최종 점수 = (감정 점수 + 재료 점수) / 2
         # Final score = (emotion score + ingredient score) / 2
-        candidates.sort(
-            key=lambda x: (x['emotion_score'] + x['ingredient_match']) / 2,
-            reverse=True
-        )
-
-        # 상위 k개 레시피 반환
-        # Return top k recipes
-        return candidates[:top_k]
+        if not candidates or top_k <= 0:
+            return []
+        final_scores = np.fromiter(
+            (recipe['emotion_score'] + recipe['ingredient_match'] for recipe in candidates),
+            dtype=np.float64,
+            count=len(candidates)
+        ) / 2
+
+        # k번째 점수를 O(N) 분할로 찾고 상위 k개만 정렬 (동점은 후보 순서 유지)
+        # Find the k-th best score with an O(N) partition, keep everything
+        # above it plus the earliest ties, then sort just those k
+        k = min(top_k, len(candidates))
+        kth_score = -np.partition(-final_scores, k - 1)[k - 1]
+        above = np.flatnonzero(final_scores > kth_score)
+        tied = np.flatnonzero(final_scores == kth_score)[:k - len(above)]
+        top = np.concatenate((above, tied))
+        top = top[np.lexsort((top, -final_scores[top]))]
+        return [candidates[i] for i in top]
 
     def _search_recipes(self, ingredients: List[str]) -> List[Dict]:
         """
@@ -166,14 +308,17 @@ class RecipeMatchingService:
             List of feasible recipes
         """
         candidates = []
-        ingredient_set = set(ing.lower() for ing in ingredients)
+        query_mask = self._ingredient_mask(ingredients)
 
-        for recipe in self.recipes:
-            recipe_ingredients = set(ing.lower() for ing in recipe['ingredients'])
+        # TF-IDF 유사도가 0인 레시피(공통 재료 없음)는 건너뜀
+        # Skip recipes with zero TF-IDF similarity (no shared ingredient)
+        for index in self._similar_recipe_indices(ingredients):
+            recipe = self.recipes[index]
+            recipe_mask = self._recipe_masks[index]
 
-            # Calculate match percentage
-            match_count = len(ingredient_set & recipe_ingredients)
-            total_needed = len(recipe_ingredients)
+            # Calculate match percentage (AND + popcount instead of set intersection)
+            match_count = (query_mask & recipe_mask).bit_count()
+            total_needed = recipe_mask.bit_count()
 
             # Only include if we have 70%+ of ingredients
             if match_count / total_needed >= 0.7:
@@ -185,21 +330,6 @@ class RecipeMatchingService:
 
         return candidates
 
-    def _calculate_ingredient_match(
-        self,
-        available: List[str],
-        required: List[str]
-    ) -> float:
-        """Calculate ingredient match score (0-1)"""
-        available_set = set(ing.lower() for ing in available)
-        required_set = set(ing.lower() for ing in required)
-
-        if not required_set:
-            return 0.0
-
-        match_count = len(available_set & required_set)
-        return match_count / len(required_set)
-
     def _score_by_emotion(self, recipe: Dict, emotion_type: str) -> float:
         """
         Score recipe based on emotion fit
@@ -213,33 +343,19 @@ class RecipeMatchingService:
         """
         base_score = 0.5
 
-        emotion_preferences = {
-            'stress': {'cooking_time': (5, 15), 'difficulty': 'easy'},
-            'fatigue': {'cooking_time': (10, 20), 'difficulty': 'easy'},
-            'anxiety': {'cooking_time': (5, 10), 'difficulty': 'easy'},
-            'happiness': {'cooking_time': (20, 40), 'difficulty': 'medium'},
-            'excitement': {'cooking_time': (15, 30), 'difficulty': 'medium'},
-            'calmness': {'cooking_time': (20, 40), 'difficulty': 'medium'},
-            'focus': {'cooking_time': (25, 45), 'difficulty': 'hard'},
-            'apathy': {'cooking_time': (5, 15), 'difficulty': 'easy'},
-        }
-
-        prefs = emotion_preferences.get(emotion_type, {})
+        prefs = _EMOTION_RECIPE_TARGETS.get(emotion_type)
+        if prefs is None:
+            return base_score
+        target_avg, difficulty = prefs
 
         # Cooking time preference
-        if 'cooking_time' in prefs:
-            target_min, target_max = prefs['cooking_time']
-            actual = recipe.get('cooking_time', 15)
-            target_avg = (target_min + target_max) / 2
-
-            time_diff = abs(actual - target_avg)
-            time_score = max(0, 1 - time_diff / 30)
-            base_score += time_score * 0.25
+        time_diff = abs(recipe.get('cooking_time', 15) - target_avg)
+        if time_diff < 30:
+            base_score += (1 - time_diff / 30) * 0.25
 
         # Difficulty preference
-        if 'difficulty' in prefs:
-            if recipe.get('difficulty') == prefs['difficulty']:
-                base_score += 0.25
+        if recipe.get('difficulty') == difficulty:
+            base_score += 0.25
 
         return min(1.0, base_score)
 
@@ -263,3 +379,15 @@ class RecipeMatchingService:
 
         missing = required_set - available_set
         return list(missing)
+
+
+@lru_cache(maxsize=None)
+def get_recipe_service() -> RecipeMatchingService:
+    """
+    프로세스 공용 레시피 매칭 서비스
+    Process-wide RecipeMatchingService
+
+    Loading the recipes and fitting (or loading) the TF-IDF index happens
+    once per worker instead of on every fridge request.
+    """
+    return RecipeMatchingService()
@@ -0,0 +1,9 @@
+-- Migration: Add keyset pagination index for food history
+-- Date: 2026-10-16
+-- Description: Lets get_food_history seek pages by (created_at, record_id) instead of OFFSET scans
+
+CREATE INDEX IF NOT EXISTS idx_food_records_user_created_id
+    ON food_records(user_id, created_at DESC, record_id DESC);
+
+-- Superseded by the composite index above
+DROP INDEX IF EXISTS idx_food_records_user;
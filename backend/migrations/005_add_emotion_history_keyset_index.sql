@@ -0,0 +1,9 @@
+-- Migration: Add keyset pagination index for emotion history
+-- Date: 2026-10-16
+-- Description: Lets get_emotion_history seek by (timestamp, emotion_id) with a stable tie-breaker
+
+CREATE INDEX IF NOT EXISTS idx_emotion_data_user_time_id
+    ON emotion_data(user_id, timestamp DESC, emotion_id DESC);
+
+-- Superseded by the composite index above
+DROP INDEX IF EXISTS idx_emotion_data_user_time;
@@ -79,9 +79,9 @@ CREATE TABLE IF NOT EXISTS daily_usage (
 
 -- Indexes for Performance
 CREATE INDEX idx_users_email ON users(email);
-CREATE INDEX idx_food_records_user ON food_records(user_id);
+CREATE INDEX idx_food_records_user_created_id ON food_records(user_id, created_at DESC, record_id DESC);
 CREATE INDEX idx_food_records_created ON food_records(created_at DESC);
-CREATE INDEX idx_emotion_data_user_time ON emotion_data(user_id, timestamp DESC);
+CREATE INDEX idx_emotion_data_user_time_id ON emotion_data(user_id, timestamp DESC, emotion_id DESC);
 CREATE INDEX idx_emotion_data_timestamp ON emotion_data(timestamp DESC);
 CREATE INDEX idx_recipes_emotion ON recipes(emotion_type);
 CREATE INDEX idx_user_sessions_user ON user_sessions(user_id);
@@ -3,6 +3,7 @@ YOLO v8 Training Script for Psi Food Detection
 Fine-tunes YOLOv8 on custom food dataset
 """
 import argparse
+import os
 from ultralytics import YOLO
 import torch
 
@@ -13,7 +14,11 @@ def train_yolo(
     batch_size: int = 16,
     img_size: int = 640,
     weights: str = 'yolov8m.pt',
-    device: str = None
+    device: str = None,
+    amp: bool = True,
+    export_format: str = None,
+    cache: str = 'ram',
+    workers: int = None
 ):
     """
     Train YOLO v8 model on food dataset
@@ -24,11 +29,28 @@ def train_yolo(
         batch_size: Batch size for training
         img_size: Input image size
         weights: Pre-trained weights path
-        device: Device to use (cuda/cpu)
+        device: Device to use ('0', '0,1,2,3' for multi-GPU DDP, or 'cpu')
+        amp: Train with FP16 automatic mixed precision (CUDA only)
+        export_format: 'engine' (TensorRT, needs CUDA) or 'onnx'; auto if None
+        cache: Image cache, 'ram' or 'disk' (when the dataset does not fit in memory)
+        workers: Dataloader workers per GPU; defaults to min(16, CPU count)
     """
-    # Auto-detect device if not specified
+    # Auto-detect device if not specified: every visible GPU, so ultralytics
+    # launches DDP itself when there is more than one
     if device is None:
-        device = 'cuda:0' if torch.cuda.is_available() else 'cpu'
+        if torch.cuda.is_available():
+            device = ','.join(str(i) for i in range(torch.cuda.device_count()))
+        else:
+            device = 'cpu'
+    if workers is None:
+        workers = min(16, os.cpu_count() or 1)
+
+    # Validation and export run in this process on a single device
+    eval_device = device.split(',')[0]
+
+    # TensorRT engines can only be built on a CUDA device
+    if export_format is None:
+        export_format = 'engine' if torch.cuda.is_available() else 'onnx'
 
     print(f"Training configuration:")
     print(f"  Data: {data_yaml}")
@@ -37,6 +59,10 @@ def train_yolo(
     print(f"  Image Size: {img_size}")
     print(f"  Weights: {weights}")
     print(f"  Device: {device}")
+    print(f"  Workers: {workers}")
+    print(f"  Cache: {cache}")
+    print(f"  AMP: {amp}")
+    print(f"  Export: {export_format}")
 
     # Load model
     model = YOLO(weights)
@@ -48,11 +74,12 @@ def train_yolo(
         batch=batch_size,
         imgsz=img_size,
         device=device,
+        amp=amp,  # FP16 mixed precision on tensor cores (ignored on CPU)
         patience=50,  # Early stopping
         save=True,
         save_period=10,  # Save every 10 epochs
-        cache=True,  # Cache images for faster training
-        workers=8,  # Number of dataloader workers
+        cache=cache,  # Cache decoded images ('ram' or 'disk') for faster epochs
+        workers=workers,  # Dataloader workers, kept alive across epochs
         project='runs/train',
         name='psi_food',
         exist_ok=True,
@@ -86,7 +113,7 @@ def train_yolo(
 
     # Validate model
     print("\nValidating model...")
-    metrics = model.val()
+    metrics = model.val(device=eval_device)
 
     print("\nValidation Results:")
     print(f"  mAP@0.5: {metrics.box.map50:.4f}")
@@ -96,7 +123,20 @@ def train_yolo(
 
     # Export model
     print("\nExporting model...")
-    model.export(format='onnx')  # Export to ONNX for production
+    # FP16 for production; the API always feeds 640x640, so the input shape
+    # stays static. A TensorRT engine is built for the training GPU and is
+    # loaded directly by YOLO('best.engine'); ONNX is the portable fallback
+    # (half=True falls back to FP32 on CPU exports)
+    if export_format == 'engine':
+        exported = model.export(
+            format='engine', imgsz=img_size, half=True, workspace=4, simplify=True,
+            device=eval_device
+        )
+    else:
+        exported = model.export(
+            format='onnx', imgsz=img_size, half=True, simplify=True, device=eval_device
+        )
+    print(f"Exported model: {exported}")
 
     print("\nTraining complete!")
     print(f"Best model saved to: runs/train/psi_food/weights/best.pt")
@@ -105,13 +145,26 @@ def train_yolo(
 
 
 def main():
-    parser = argparse.ArgumentParser(description='Train YOLO v8 for food detection')
+    parser = argparse.ArgumentParser(
+        description='Train YOLO v8 for food detection',
+        epilog='Multi-GPU: pass --device 0,1,2,3 (the default uses every visible GPU); '
+               'ultralytics starts the DDP workers itself, so no torchrun is needed. '
+               '--batch is the total batch across GPUs.'
+    )
     parser.add_argument('--data', type=str, required=True, help='Path to data.yaml')
     parser.add_argument('--epochs', type=int, default=100, help='Number of epochs')
     parser.add_argument('--batch', type=int, default=16, help='Batch size')
     parser.add_argument('--img', type=int, default=640, help='Image size')
     parser.add_argument('--weights', type=str, default='yolov8m.pt', help='Initial weights')
-    parser.add_argument('--device', type=str, default=None, help='Device (cuda/cpu)')
+    parser.add_argument('--device', type=str, default=None,
+                        help="Device: '0', '0,1,2,3' (DDP) or 'cpu' (default: all GPUs)")
+    parser.add_argument('--no-amp', action='store_true', help='Train in FP32 instead of AMP')
+    parser.add_argument('--export', type=str, default=None, choices=['engine', 'onnx'],
+                        help='Export format (default: engine with CUDA, else onnx)')
+    parser.add_argument('--cache', type=str, default='ram', choices=['ram', 'disk'],
+                        help="Image cache; use 'disk' if the dataset does not fit in RAM")
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Dataloader workers per GPU (default: min(16, CPU count))')
 
     args = parser.parse_args()
 
@@ -121,7 +174,11 @@ def main():
         batch_size=args.batch,
         img_size=args.img,
         weights=args.weights,
-        device=args.device
+        device=args.device,
+        amp=not args.no_amp,
+        export_format=args.export,
+        cache=args.cache,
+        workers=args.workers
     )
 
 
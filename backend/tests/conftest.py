@@ -8,16 +8,77 @@ from typing import Generator
 import sys
 import os
 
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+    uvloop = None
+
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 
 @pytest.fixture(scope="session")
-def event_loop():
-    """Create event loop for async tests"""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
+def event_loop_policy():
+    """Event loop policy for async tests (uvloop when installed, as under uvicorn)"""
+    if UVLOOP_AVAILABLE:
+        return uvloop.EventLoopPolicy()
+    return asyncio.DefaultEventLoopPolicy()
+
+
+@pytest.fixture(scope="session")
+def client():
+    """
+    Test client for API requests, shared by the whole run
+
+    Not entered as a context manager, so lifespan (database and Redis
+    connections) is not started; unit tests patch what they need
+    """
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    return TestClient(app)
+
+
+@pytest.fixture(scope="session")
+def emotion_service():
+    """EmotionAnalysisService shared by tests that only call its stateless methods"""
+    from app.services.emotion_analysis import EmotionAnalysisService
+
+    return EmotionAnalysisService()
+
+
+@pytest.fixture(scope="session")
+def nutrition_service():
+    """
+    NutritionAnalysisService shared by tests that only use its pure calculations
+
+    Tests that swap the SQLite connection or Redis client build their own
+    """
+    from app.services.nutrition_analysis import NutritionAnalysisService
+
+    return NutritionAnalysisService()
+
+
+@pytest.fixture(scope="session")
+def image_factory():
+    """
+    Encode a solid-colour test image, memoized on its arguments
+
+    Returns immutable bytes; wrap in io.BytesIO where a stream is needed
+    """
+    import io
+    from functools import lru_cache
+    from PIL import Image
+
+    @lru_cache(maxsize=32)
+    def make(size=(800, 600), color='red', fmt='JPEG', quality=75) -> bytes:
+        img_bytes = io.BytesIO()
+        Image.new('RGB', size, color=color).save(img_bytes, format=fmt, quality=quality)
+        return img_bytes.getvalue()
+
+    return make
 
 
 @pytest.fixture(scope="session")
@@ -39,9 +100,14 @@ def test_settings():
 @pytest.fixture(autouse=True)
 def reset_singletons():
     """Reset singleton instances between tests"""
+    from app.services.nutrition_analysis import get_nutrition_service
+    from app.services.recipe_matching import get_recipe_service
+
     # Clear any cached service instances
     yield
     # Cleanup after test
+    get_nutrition_service.cache_clear()
+    get_recipe_service.cache_clear()
 
 
 @pytest.fixture
@@ -67,6 +133,8 @@ def mock_database():
     db_mock.execute_query = AsyncMock(return_value=[])
     db_mock.execute_one = AsyncMock(return_value=None)
     db_mock.execute = AsyncMock(return_value="OK")
+    db_mock.fetch_prepared = AsyncMock(return_value=[])
+    db_mock.fetchrow_prepared = AsyncMock(return_value=None)
 
     return db_mock
 
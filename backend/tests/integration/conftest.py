@@ -0,0 +1,229 @@
+"""
+Integration test fixtures
+The app client, test user, bearer token and sample images are created once
+per test run and shared read-only by every integration test
+"""
+import httpx
+import io
+import pytest
+from datetime import datetime
+from functools import lru_cache
+from PIL import Image
+from typing import Dict
+from unittest.mock import AsyncMock
+from fastapi import Security
+from fastapi.security import HTTPAuthorizationCredentials
+from fastapi.testclient import TestClient
+from app.main import app
+from app.api.v1.food_enhanced import FoodUploadService, get_food_service
+from app.api.v1.fridge_enhanced import FridgeDetectionService, get_fridge_service
+from app.core.security import create_access_token, security, verify_token
+
+# Canned YOLO/Claude Vision output; the integration tests check response shape, not accuracy
+MOCK_DETECTIONS = [
+    {'class': 'apple', 'confidence': 0.95, 'bbox': [100, 150, 300, 350]},
+    {'class': 'banana', 'confidence': 0.87, 'bbox': [320, 180, 450, 380]},
+]
+
+
+@pytest.fixture(scope="session", autouse=True)
+def mock_image_recognition():
+    """
+    Serve the food and fridge handlers with services whose model inference
+    returns canned detections; nutrition, recipe and emotion logic stay real
+    """
+    food_service = FoodUploadService()
+    food_service.image_service.analyze_food_image = AsyncMock(return_value=MOCK_DETECTIONS)
+    fridge_service = FridgeDetectionService()
+    fridge_service.image_service.analyze_food_image = AsyncMock(return_value=MOCK_DETECTIONS)
+
+    app.dependency_overrides[get_food_service] = lambda: food_service
+    app.dependency_overrides[get_fridge_service] = lambda: fridge_service
+    yield food_service, fridge_service
+    app.dependency_overrides.pop(get_food_service, None)
+    app.dependency_overrides.pop(get_fridge_service, None)
+
+
+@lru_cache(maxsize=16)
+def _user_id_for_token(token: str) -> str:
+    """Decode each distinct bearer token once; failures raise and are not cached"""
+    return verify_token(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token))
+
+
+def _cached_verify_token(
+    credentials: HTTPAuthorizationCredentials = Security(security)
+) -> str:
+    return _user_id_for_token(credentials.credentials)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def cache_token_verification():
+    """
+    Verify the session's bearer token once instead of on every request
+
+    Expiry is not re-checked for a cached token, which is fine for a
+    single test run
+    """
+    app.dependency_overrides[verify_token] = _cached_verify_token
+    yield
+    app.dependency_overrides.pop(verify_token, None)
+    _user_id_for_token.cache_clear()
+
+
+@pytest.fixture(scope="session")
+def test_client():
+    """Create test client for the FastAPI app with startup/shutdown events"""
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def async_client(test_client):
+    """
+    In-process async client for requests that must actually overlap
+
+    Coroutines using it run on test_client's event loop, where lifespan
+    opened the database pools: test_client.portal.call(coroutine_function)
+    """
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+    yield client
+    test_client.portal.call(client.aclose)
+
+
+@pytest.fixture(scope="session")
+def test_user_credentials():
+    """Test user credentials for integration tests"""
+    return {
+        "email": f"integration_test_{datetime.now().timestamp()}@test.com",
+        "password": "SecureTestPassword123!",
+        "full_name": "Integration Test User"
+    }
+
+
+@pytest.fixture(scope="session")
+def test_user_token(test_client, test_user_credentials) -> str:
+    """Register a test user and return authentication token"""
+    # Register user
+    register_response = test_client.post(
+        "/api/v1/auth/register",
+        json=test_user_credentials
+    )
+
+    if register_response.status_code in [200, 201]:
+        # User created successfully
+        user_data = register_response.json()
+        # Handle both token structures
+        if "access_token" in user_data:
+            return user_data["access_token"]
+        elif "token" in user_data:
+            return user_data["token"]
+        else:
+            # Return a mock token for testing
+            return create_access_token(test_user_credentials["email"])
+    elif register_response.status_code == 400:
+        # User might already exist, try login
+        login_response = test_client.post(
+            "/api/v1/auth/login",
+            data={
+                "username": test_user_credentials["email"],
+                "password": test_user_credentials["password"]
+            }
+        )
+        if login_response.status_code == 200:
+            login_data = login_response.json()
+            return login_data.get("access_token", create_access_token(test_user_credentials["email"]))
+        else:
+            # Generate token directly for testing
+            return create_access_token(test_user_credentials["email"])
+    else:
+        # Generate token directly for testing (auth endpoints may not be fully configured)
+        return create_access_token(test_user_credentials["email"])
+
+
+@pytest.fixture(scope="session")
+def auth_headers(test_user_token) -> Dict[str, str]:
+    """Generate authentication headers"""
+    return {"Authorization": f"Bearer {test_user_token}"}
+
+
+@pytest.fixture(scope="session")
+def sample_food_image() -> bytes:
+    """Generate a sample food image for testing"""
+    # Create a small test image
+    img = Image.new('RGB', (300, 300), color='red')
+    img_bytes = io.BytesIO()
+    img.save(img_bytes, format='JPEG')
+    img_bytes.seek(0)
+    return img_bytes.read()
+
+
+@pytest.fixture(scope="session")
+def fridge_image_bytes() -> list:
+    """Encode the fridge test images once (JPEG bytes per shelf color)"""
+    blobs = []
+    colors = ['green', 'blue', 'yellow']
+
+    for color in colors:
+        img_bytes = io.BytesIO()
+        Image.new('RGB', (400, 400), color=color).save(img_bytes, format='JPEG')
+        blobs.append(img_bytes.getvalue())
+
+    return blobs
+
+
+@pytest.fixture(scope="session")
+def fridge_image_factory(fridge_image_bytes):
+    """
+    Build the multipart fridge image list for one request
+
+    Each call wraps the pre-encoded bytes in fresh streams, so every POST
+    sends full images even though a file stream can only be read once
+    """
+    def make() -> list:
+        return [
+            ("files", (f"fridge_{i}.jpg", io.BytesIO(blob), "image/jpeg"))
+            for i, blob in enumerate(fridge_image_bytes)
+        ]
+
+    return make
+
+
+# ============================================================================
+# First-use results, produced once and read by every test that needs them
+# ============================================================================
+
+@pytest.fixture(scope="session")
+def first_food_analysis(test_client, auth_headers, sample_food_image) -> httpx.Response:
+    """Upload the sample food image once (Mode 1)"""
+    return test_client.post(
+        "/api/v1/food/upload",
+        headers=auth_headers,
+        files={"file": ("food.jpg", sample_food_image, "image/jpeg")},
+        data={
+            "hrv": "65.5",
+            "heart_rate": "72"
+        }
+    )
+
+
+@pytest.fixture(scope="session")
+def first_fridge_detection(test_client, auth_headers, fridge_image_factory) -> httpx.Response:
+    """Run ingredient detection on the sample fridge images once (Mode 2)"""
+    return test_client.post(
+        "/api/v1/fridge/detect",
+        headers=auth_headers,
+        files=fridge_image_factory(),
+        data={
+            "hrv": "58.3",
+            "heart_rate": "78"
+        }
+    )
+
+
+@pytest.fixture(scope="session")
+def first_wellness_check(test_client, auth_headers) -> httpx.Response:
+    """Perform the first wellness check once (Mode 3)"""
+    return test_client.get(
+        "/api/v1/wellness/check?hrv=62.1&heart_rate=70",
+        headers=auth_headers
+    )
@@ -4,124 +4,55 @@ End-to-end testing of complete user workflows across all 3 modes
 
 Coverage Target: 85%
 Test Scenarios: Complete user journeys from registration to all features
+
+Each class is an xdist group, so the classes can run on separate workers:
+    pytest tests/integration -n 4 --dist=loadgroup
+Every worker registers its own test user, and the rate limit tests share one
+group so their quota counts are not split across workers
 """
 import pytest
 import asyncio
 import io
-from datetime import datetime, timedelta
-from typing import Dict, Optional
+import statistics
+import time
+from typing import Optional
+from unittest.mock import AsyncMock, patch
 from PIL import Image
-from fastapi.testclient import TestClient
-from app.main import app
-from app.core.security import create_access_token
+from app.models.emotion import WellnessResponse
+from app.models.food import FoodAnalysisResponse
 from app.services.database_service import DatabaseService
 
+# Timed requests per latency benchmark, after one warm-up request
+HISTORY_BENCHMARK_ROUNDS = 20
 
-# ============================================================================
-# Test Fixtures and Setup
-# ============================================================================
+# Statuses a partially configured deployment returns instead of 200
+# (no auth backend, missing database/models, or upload validation differences)
+DEGRADED_READ_STATUSES = (401, 500)
+DEGRADED_WRITE_STATUSES = (401, 422, 500)
 
-@pytest.fixture(scope="module")
-def test_client():
-    """Create test client for the FastAPI app with startup/shutdown events"""
-    with TestClient(app) as client:
-        yield client
-
-
-@pytest.fixture(scope="module")
-def test_user_credentials():
-    """Test user credentials for integration tests"""
-    return {
-        "email": f"integration_test_{datetime.now().timestamp()}@test.com",
-        "password": "SecureTestPassword123!",
-        "full_name": "Integration Test User"
-    }
-
-
-@pytest.fixture(scope="module")
-def test_user_token(test_client, test_user_credentials) -> str:
-    """Register a test user and return authentication token"""
-    # Register user
-    register_response = test_client.post(
-        "/api/v1/auth/register",
-        json=test_user_credentials
-    )
-
-    if register_response.status_code in [200, 201]:
-        # User created successfully
-        user_data = register_response.json()
-        # Handle both token structures
-        if "access_token" in user_data:
-            return user_data["access_token"]
-        elif "token" in user_data:
-            return user_data["token"]
-        else:
-            # Return a mock token for testing
-            return create_access_token(test_user_credentials["email"])
-    elif register_response.status_code == 400:
-        # User might already exist, try login
-        login_response = test_client.post(
-            "/api/v1/auth/login",
-            data={
-                "username": test_user_credentials["email"],
-                "password": test_user_credentials["password"]
-            }
-        )
-        if login_response.status_code == 200:
-            login_data = login_response.json()
-            return login_data.get("access_token", create_access_token(test_user_credentials["email"]))
-        else:
-            # Generate token directly for testing
-            return create_access_token(test_user_credentials["email"])
-    else:
-        # Generate token directly for testing (auth endpoints may not be fully configured)
-        return create_access_token(test_user_credentials["email"])
-
-
-@pytest.fixture
-def auth_headers(test_user_token) -> Dict[str, str]:
-    """Generate authentication headers"""
-    return {"Authorization": f"Bearer {test_user_token}"}
-
-
-@pytest.fixture
-def sample_food_image() -> bytes:
-    """Generate a sample food image for testing"""
-    # Create a small test image
-    img = Image.new('RGB', (300, 300), color='red')
-    img_bytes = io.BytesIO()
-    img.save(img_bytes, format='JPEG')
-    img_bytes.seek(0)
-    return img_bytes.read()
-
-
-@pytest.fixture
-def sample_fridge_images() -> list:
-    """Generate multiple fridge images for testing"""
-    images = []
-    colors = ['green', 'blue', 'yellow']
-
-    for color in colors:
-        img = Image.new('RGB', (400, 400), color=color)
-        img_bytes = io.BytesIO()
-        img.save(img_bytes, format='JPEG')
-        img_bytes.seek(0)
-        images.append(("files", ("fridge.jpg", img_bytes.read(), "image/jpeg")))
 
-    return images
+def _ok_json(response, degraded_statuses):
+    """Return the body of a 200 response; xfail on a known degraded status"""
+    if response.status_code in degraded_statuses:
+        pytest.xfail(f"service degraded: HTTP {response.status_code}")
+    assert response.status_code == 200
+    return response.json()
 
 
 # ============================================================================
 # Test Class: Complete User Journey
 # ============================================================================
 
+@pytest.mark.xdist_group(name="journey")
 class TestCompleteUserJourney:
     """
     Test complete user journey from registration to using all modes
     This simulates a real user's first day with the app
     """
 
-    def test_01_user_registration_and_authentication(self, test_client, test_user_credentials):
+    def test_01_user_registration_and_authentication(
+        self, test_client, test_user_credentials, test_user_token
+    ):
         """
         Test user can register and authenticate
 
@@ -155,12 +86,7 @@ class TestCompleteUserJourney:
         # May return 401 if auth not fully configured
         assert response.status_code in [200, 401]
 
-    def test_03_mode1_food_analysis_first_use(
-        self,
-        test_client,
-        auth_headers,
-        sample_food_image
-    ):
+    def test_03_mode1_food_analysis_first_use(self, first_food_analysis):
         """
         Test user's first food analysis (Mode 1)
 
@@ -170,83 +96,22 @@ class TestCompleteUserJourney:
         3. Get emotion-based recommendation
         4. Earn XP points
         """
-        response = test_client.post(
-            "/api/v1/food/upload",
-            headers=auth_headers,
-            files={"file": ("food.jpg", sample_food_image, "image/jpeg")},
-            data={
-                "hrv": "65.5",
-                "heart_rate": "72"
-            }
-        )
+        response = first_food_analysis
 
         # May fail if auth not working, but should work if properly configured
-        if response.status_code == 200:
-            data = response.json()
-
-            # Verify response structure
-            assert "food_items" in data
-            assert "total_calories" in data
-            assert "emotion" in data
-            assert "recommendation" in data
-            assert "xp_gained" in data
-
-            # Verify XP earned
-            assert data["xp_gained"] >= 15
-
-            # Store for later tests
-            self.first_food_record = data
-        else:
-            # If it fails, it should be due to missing dependencies
-            assert response.status_code in [422, 500, 401]
-
-    def test_04_mode1_view_food_history(self, test_client, auth_headers):
-        """
-        Test user can view food history after uploading
+        data = _ok_json(response, DEGRADED_WRITE_STATUSES)
 
-        Workflow:
-        1. Request food history
-        2. Verify previous upload appears in history
-        """
-        response = test_client.get(
-            "/api/v1/food/history?limit=10&offset=0",
-            headers=auth_headers
-        )
-
-        if response.status_code == 200:
-            data = response.json()
-            assert "history" in data
-            assert isinstance(data["history"], list)
-        else:
-            assert response.status_code in [401, 500]
-
-    def test_05_mode1_view_statistics(self, test_client, auth_headers):
-        """
-        Test user can view food statistics
-
-        Workflow:
-        1. Request 7-day statistics
-        2. Verify stats include uploaded food
-        """
-        response = test_client.get(
-            "/api/v1/food/stats?days=7",
-            headers=auth_headers
-        )
+        # Verify response structure
+        assert "food_items" in data
+        assert "total_calories" in data
+        assert "emotion" in data
+        assert "recommendation" in data
+        assert "xp_gained" in data
 
-        if response.status_code == 200:
-            data = response.json()
-            assert "total_meals" in data
-            assert "total_calories" in data
-            assert "average_calories_per_meal" in data
-        else:
-            assert response.status_code in [401, 500]
+        # Verify XP earned
+        assert data["xp_gained"] >= 15
 
-    def test_06_mode2_fridge_detection_first_use(
-        self,
-        test_client,
-        auth_headers,
-        sample_fridge_images
-    ):
+    def test_06_mode2_fridge_detection_first_use(self, first_fridge_detection):
         """
         Test user's first fridge detection (Mode 2)
 
@@ -256,31 +121,22 @@ class TestCompleteUserJourney:
         3. Receive emotion-based recipe recommendations
         4. Get shopping list for missing ingredients
         """
-        response = test_client.post(
-            "/api/v1/fridge/detect",
-            headers=auth_headers,
-            files=sample_fridge_images,
-            data={
-                "hrv": "58.3",
-                "heart_rate": "78"
-            }
-        )
+        response = first_fridge_detection
 
-        if response.status_code == 200:
-            data = response.json()
+        data = _ok_json(response, DEGRADED_WRITE_STATUSES)
 
-            # Verify response structure
-            assert "ingredients" in data
-            assert "recipes" in data
-            assert "shopping_list" in data
-            assert "emotion_type" in data
+        # Verify response structure
+        assert "ingredients" in data
+        assert "recipes" in data
+        assert "shopping_list" in data
+        assert "emotion_type" in data
 
-            # Store for later tests
-            self.fridge_detection = data
-        else:
-            assert response.status_code in [422, 500, 401]
-
-    def test_07_mode2_get_recipe_details(self, test_client, auth_headers):
+    def test_07_mode2_get_recipe_details(
+        self,
+        test_client,
+        auth_headers,
+        first_fridge_detection
+    ):
         """
         Test user can get detailed recipe information
 
@@ -289,11 +145,12 @@ class TestCompleteUserJourney:
         2. Get full recipe details
         """
         # Skip if fridge detection didn't work
-        if not hasattr(self, 'fridge_detection'):
+        if first_fridge_detection.status_code != 200:
             pytest.skip("Fridge detection not available")
 
-        if self.fridge_detection.get("recipes"):
-            recipe_id = self.fridge_detection["recipes"][0].get("recipe_id")
+        fridge_detection = first_fridge_detection.json()
+        if fridge_detection.get("recipes"):
+            recipe_id = fridge_detection["recipes"][0].get("recipe_id")
             if recipe_id:
                 response = test_client.get(
                     f"/api/v1/fridge/recipes/{recipe_id}",
@@ -307,7 +164,7 @@ class TestCompleteUserJourney:
                     assert "ingredients" in data
                     assert "instructions" in data
 
-    def test_08_mode3_wellness_check_first_use(self, test_client, auth_headers):
+    def test_08_mode3_wellness_check_first_use(self, first_wellness_check):
         """
         Test user's first wellness check (Mode 3)
 
@@ -318,79 +175,100 @@ class TestCompleteUserJourney:
         4. Get personalized recommendations
         5. Receive daily psychology tip
         """
-        response = test_client.get(
-            "/api/v1/wellness/check?hrv=62.1&heart_rate=70",
-            headers=auth_headers
-        )
+        response = first_wellness_check
 
-        if response.status_code == 200:
-            data = response.json()
+        data = _ok_json(response, DEGRADED_WRITE_STATUSES)
 
-            # Verify response structure
-            assert "current_emotion" in data
-            assert "wellness_score" in data
-            assert "recommendations" in data
-            assert "daily_tip" in data
+        # Verify response structure
+        assert "current_emotion" in data
+        assert "wellness_score" in data
+        assert "recommendations" in data
+        assert "daily_tip" in data
 
-            # Verify wellness score is valid
-            assert 0 <= data["wellness_score"] <= 100
+        # Verify wellness score is valid
+        assert 0 <= data["wellness_score"] <= 100
 
-            # Verify recommendations structure
-            recommendations = data["recommendations"]
-            assert "food" in recommendations
-            assert "exercise" in recommendations
-            assert "content" in recommendations
+        # Verify recommendations structure
+        recommendations = data["recommendations"]
+        assert "food" in recommendations
+        assert "exercise" in recommendations
+        assert "content" in recommendations
 
-            # Store for later tests
-            self.wellness_check = data
-        else:
-            assert response.status_code in [422, 500, 401]
 
-    def test_09_mode3_view_wellness_history(self, test_client, auth_headers):
-        """
-        Test user can view wellness history
+# ============================================================================
+# Test Class: Read-Only Views
+# ============================================================================
 
-        Workflow:
-        1. Request 7-day wellness history
-        2. Verify daily summaries
-        """
-        response = test_client.get(
-            "/api/v1/wellness/history?days=7",
-            headers=auth_headers
-        )
+READ_ONLY_VIEWS = {
+    "food_history": "/api/v1/food/history?limit=10&offset=0",
+    "food_stats": "/api/v1/food/stats?days=7",
+    "wellness_history": "/api/v1/wellness/history?days=7",
+    "emotion_trends": "/api/v1/wellness/trends?period=week",
+}
 
-        if response.status_code == 200:
-            data = response.json()
-            assert "daily_summary" in data
-            assert "total_readings" in data
-        else:
-            assert response.status_code in [401, 500]
 
-    def test_10_mode3_analyze_emotion_trends(self, test_client, auth_headers):
-        """
-        Test user can analyze emotion trends
+@pytest.fixture(scope="class")
+def read_only_views(
+    test_client, async_client, auth_headers, first_food_analysis, first_wellness_check
+):
+    """Fetch every read-only view once, all requests in flight together"""
+    async def fetch_all():
+        responses = await asyncio.gather(*(
+            async_client.get(url, headers=auth_headers) for url in READ_ONLY_VIEWS.values()
+        ))
+        return dict(zip(READ_ONLY_VIEWS, responses))
 
-        Workflow:
-        1. Request trend analysis
-        2. Get insights and patterns
-        """
-        response = test_client.get(
-            "/api/v1/wellness/trends?period=week",
-            headers=auth_headers
-        )
+    return test_client.portal.call(fetch_all)
+
+
+@pytest.mark.xdist_group(name="journey")
+class TestReadOnlyViews:
+    """
+    Test the history, statistics and trend views after the first-use journey
+
+    The views are plain GETs with no ordering between them, so they are
+    fetched concurrently by one fixture and checked one per test
+    """
+
+    def test_view_food_history(self, read_only_views):
+        """Test user can view food history after uploading"""
+        response = read_only_views["food_history"]
+
+        data = _ok_json(response, DEGRADED_READ_STATUSES)
+        assert "history" in data
+        assert isinstance(data["history"], list)
+
+    def test_view_food_statistics(self, read_only_views):
+        """Test user can view 7-day food statistics"""
+        response = read_only_views["food_stats"]
 
-        if response.status_code == 200:
-            data = response.json()
-            # Response structure varies based on available data
-            assert isinstance(data, dict)
-        else:
-            assert response.status_code in [401, 500]
+        data = _ok_json(response, DEGRADED_READ_STATUSES)
+        assert "total_meals" in data
+        assert "total_calories" in data
+        assert "average_calories_per_meal" in data
+
+    def test_view_wellness_history(self, read_only_views):
+        """Test user can view 7-day wellness history with daily summaries"""
+        response = read_only_views["wellness_history"]
+
+        data = _ok_json(response, DEGRADED_READ_STATUSES)
+        assert "daily_summary" in data
+        assert "total_readings" in data
+
+    def test_analyze_emotion_trends(self, read_only_views):
+        """Test user can analyze emotion trends"""
+        response = read_only_views["emotion_trends"]
+
+        data = _ok_json(response, DEGRADED_READ_STATUSES)
+        # Response structure varies based on available data
+        assert isinstance(data, dict)
 
 
 # ============================================================================
 # Test Class: Cross-Mode Integration
 # ============================================================================
 
+@pytest.mark.xdist_group(name="crossmode")
 class TestCrossModeIntegration:
     """
     Test that data flows correctly between different modes
@@ -402,27 +280,18 @@ class TestCrossModeIntegration:
         self,
         test_client,
         auth_headers,
-        sample_food_image
+        sample_food_image,
+        first_wellness_check
     ):
         """
         Test that emotion data recorded in one mode affects other modes
 
         Workflow:
-        1. Record high stress emotion in wellness check
-        2. Upload food - should get stress-reducing recommendations
-        3. Detect fridge ingredients - should get calming recipes
+        1. Wellness check is available (shared first-use result)
+        2. Upload food with stress indicators - should get stress-reducing recommendations
         """
-        # Step 1: Record stress emotion
-        wellness_response = test_client.get(
-            "/api/v1/wellness/check?hrv=35.0&heart_rate=95",  # Stress indicators
-            headers=auth_headers
-        )
-
-        if wellness_response.status_code == 200:
-            wellness_data = wellness_response.json()
-            emotion_type = wellness_data["current_emotion"].get("type")
-
-            # Step 2: Upload food with same stress indicators
+        if first_wellness_check.status_code == 200:
+            # Upload food with stress indicators
             food_response = test_client.post(
                 "/api/v1/food/upload",
                 headers=auth_headers,
@@ -492,6 +361,7 @@ class TestCrossModeIntegration:
 # Test Class: Rate Limiting and Quota Management
 # ============================================================================
 
+@pytest.mark.xdist_group(name="ratelimit")
 class TestRateLimitingAndQuotas:
     """
     Test that free tier limits are enforced correctly
@@ -537,7 +407,7 @@ class TestRateLimitingAndQuotas:
         self,
         test_client,
         auth_headers,
-        sample_fridge_images
+        fridge_image_factory
     ):
         """
         Test that daily limit (3 scans) is enforced for fridge detection
@@ -552,7 +422,7 @@ class TestRateLimitingAndQuotas:
             response = test_client.post(
                 "/api/v1/fridge/detect",
                 headers=auth_headers,
-                files=sample_fridge_images,
+                files=fridge_image_factory(),
                 data={
                     "hrv": "60.0",
                     "heart_rate": "75"
@@ -572,63 +442,63 @@ class TestRateLimitingAndQuotas:
     def test_wellness_check_no_rate_limit(
         self,
         test_client,
+        async_client,
         auth_headers
     ):
         """
         Test that wellness checks have no rate limit
 
         Workflow:
-        1. Make multiple wellness checks (>10)
-        2. All should succeed (no 429 errors)
-        """
-        success_count = 0
+        1. Make several wellness checks, all in flight at once
+        2. None should consult the daily usage quota
+        3. None should be rejected with 429
+        """
+        async def check_all():
+            return await asyncio.gather(*(
+                async_client.get(
+                    f"/api/v1/wellness/check?hrv={60 + i}&heart_rate={70 + i}",
+                    headers=auth_headers
+                )
+                for i in range(3)
+            ))
 
-        for i in range(10):
-            response = test_client.get(
-                f"/api/v1/wellness/check?hrv={60 + i}&heart_rate={70 + i}",
-                headers=auth_headers
-            )
+        with patch.object(
+            DatabaseService, "check_daily_usage", new_callable=AsyncMock
+        ) as check_daily_usage:
+            responses = test_client.portal.call(check_all)
 
-            if response.status_code == 200:
-                success_count += 1
+        # The free-tier quota only applies to food and fridge analyses
+        check_daily_usage.assert_not_awaited()
+        assert all(response.status_code != 429 for response in responses)
 
-        # Most checks should succeed (at least 5 out of 10)
-        assert success_count >= 5
+        # Most checks should succeed (at least 2 out of 3)
+        success_count = sum(1 for response in responses if response.status_code == 200)
+        assert success_count >= 2
 
 
 # ============================================================================
 # Test Class: Error Handling and Edge Cases
 # ============================================================================
 
+@pytest.mark.xdist_group(name="errors")
 class TestErrorHandlingAndEdgeCases:
     """
     Test system behavior under error conditions and edge cases
     """
 
-    def test_unauthenticated_access_denied(self, test_client, sample_food_image):
-        """
-        Test that all protected endpoints require authentication
-
-        Workflow:
-        1. Try to access each mode without token
-        2. Should receive 401 Unauthorized
-        """
+    @pytest.mark.parametrize("method,url,kwargs", [
         # Food upload without auth
-        response = test_client.post(
-            "/api/v1/food/upload",
-            files={"file": ("food.jpg", sample_food_image, "image/jpeg")}
-        )
-        assert response.status_code == 401
-
+        ("post", "/api/v1/food/upload", {"files": {"file": ("food.jpg", b"x", "image/jpeg")}}),
         # Fridge detection without auth
-        response = test_client.post(
-            "/api/v1/fridge/detect",
-            files=[("files", ("fridge.jpg", sample_food_image, "image/jpeg"))]
-        )
-        assert response.status_code == 401
-
+        ("post", "/api/v1/fridge/detect", {
+            "files": [("files", ("fridge.jpg", b"x", "image/jpeg"))]
+        }),
         # Wellness check without auth
-        response = test_client.get("/api/v1/wellness/check")
+        ("get", "/api/v1/wellness/check", {}),
+    ])
+    def test_unauthenticated_access_denied(self, test_client, method, url, kwargs):
+        """Test that every protected mode endpoint returns 401 without a token"""
+        response = getattr(test_client, method)(url, **kwargs)
         assert response.status_code == 401
 
     def test_invalid_file_type_rejected(self, test_client, auth_headers):
@@ -658,52 +528,37 @@ class TestErrorHandlingAndEdgeCases:
         2. Upload should be rejected with 400
         """
         # Create a large file (simulated - actual 11MB would be too slow)
-        # Instead, test the validation logic with a smaller example
+        # Instead, test the validation logic with a tiny image
 
-        # Create 1MB image (this should pass)
-        large_img = Image.new('RGB', (1000, 1000), color='blue')
+        # Create a small image (this should pass)
         img_bytes = io.BytesIO()
-        large_img.save(img_bytes, format='JPEG', quality=95)
+        Image.new('RGB', (10, 10), color='blue').save(img_bytes, format='JPEG')
         img_bytes.seek(0)
 
         response = test_client.post(
             "/api/v1/food/upload",
             headers=auth_headers,
-            files={"file": ("large.jpg", img_bytes.read(), "image/jpeg")}
+            files={"file": ("large.jpg", img_bytes, "image/jpeg")}
         )
 
         # Should succeed (under 10MB)
         assert response.status_code in [200, 400, 422, 500, 401]
 
-    def test_invalid_wearable_data_validation(self, test_client, auth_headers, sample_food_image):
-        """
-        Test that invalid HRV/heart rate values are rejected
-
-        Workflow:
-        1. Send negative HRV
-        2. Send impossible heart rate (e.g., 300)
-        3. Should receive 422 validation error
-        """
-        # Test negative HRV
-        response = test_client.post(
-            "/api/v1/food/upload",
-            headers=auth_headers,
-            files={"file": ("food.jpg", sample_food_image, "image/jpeg")},
-            data={
-                "hrv": "-50.0",  # Invalid: negative
-                "heart_rate": "72"
-            }
-        )
-        assert response.status_code == 422  # Validation error
-
-        # Test extreme heart rate
+    @pytest.mark.parametrize("hrv,heart_rate", [
+        ("-50.0", "72"),  # Invalid: negative HRV
+        ("65.0", "300"),  # Invalid: heart rate too high
+    ])
+    def test_invalid_wearable_data_validation(
+        self, test_client, auth_headers, sample_food_image, hrv, heart_rate
+    ):
+        """Test that invalid HRV/heart rate values are rejected with 422"""
         response = test_client.post(
             "/api/v1/food/upload",
             headers=auth_headers,
             files={"file": ("food.jpg", sample_food_image, "image/jpeg")},
             data={
-                "hrv": "65.0",
-                "heart_rate": "300"  # Invalid: too high
+                "hrv": hrv,
+                "heart_rate": heart_rate
             }
         )
         assert response.status_code == 422  # Validation error
@@ -716,14 +571,14 @@ class TestErrorHandlingAndEdgeCases:
         1. Upload 6 images
         2. Should receive 400 error
         """
-        # Create 6 small images
-        images = []
-        for i in range(6):
-            img = Image.new('RGB', (200, 200), color='red')
-            img_bytes = io.BytesIO()
-            img.save(img_bytes, format='JPEG')
-            img_bytes.seek(0)
-            images.append(("files", (f"fridge_{i}.jpg", img_bytes.read(), "image/jpeg")))
+        # Encode one small image and send it 6 times
+        img_bytes = io.BytesIO()
+        Image.new('RGB', (200, 200), color='red').save(img_bytes, format='JPEG')
+        blob = img_bytes.getvalue()
+        images = [
+            ("files", (f"fridge_{i}.jpg", io.BytesIO(blob), "image/jpeg"))
+            for i in range(6)
+        ]
 
         response = test_client.post(
             "/api/v1/fridge/detect",
@@ -733,27 +588,13 @@ class TestErrorHandlingAndEdgeCases:
 
         assert response.status_code in [400, 422]
 
-    def test_invalid_query_parameters_rejected(self, test_client, auth_headers):
-        """
-        Test that invalid query parameters are rejected
-
-        Workflow:
-        1. Request history with invalid limit
-        2. Request stats with invalid days
-        3. Should receive 422 validation error
-        """
-        # Invalid limit (>100)
-        response = test_client.get(
-            "/api/v1/food/history?limit=500&offset=0",
-            headers=auth_headers
-        )
-        assert response.status_code in [400, 422]
-
-        # Invalid days (>90)
-        response = test_client.get(
-            "/api/v1/food/stats?days=365",
-            headers=auth_headers
-        )
+    @pytest.mark.parametrize("url", [
+        "/api/v1/food/history?limit=500&offset=0",  # Invalid limit (>100)
+        "/api/v1/food/stats?days=365",  # Invalid days (>90)
+    ])
+    def test_invalid_query_parameters_rejected(self, test_client, auth_headers, url):
+        """Test that out-of-range query parameters are rejected"""
+        response = test_client.get(url, headers=auth_headers)
         assert response.status_code in [400, 422]
 
     def test_nonexistent_recipe_404(self, test_client, auth_headers):
@@ -778,13 +619,13 @@ class TestErrorHandlingAndEdgeCases:
 # Test Class: Data Persistence and Consistency
 # ============================================================================
 
+@pytest.mark.xdist_group(name="persistence")
 class TestDataPersistenceAndConsistency:
     """
     Test that data is correctly stored and retrieved from database
     """
 
-    @pytest.mark.asyncio
-    async def test_food_record_persisted_to_database(
+    def test_food_record_persisted_to_database(
         self,
         test_client,
         auth_headers,
@@ -812,8 +653,8 @@ class TestDataPersistenceAndConsistency:
         if upload_response.status_code == 200:
             upload_data = upload_response.json()
 
-            # Wait a moment for database write
-            await asyncio.sleep(0.5)
+            # The upload handler awaits the database write before it
+            # responds, so the record is already visible
 
             # Retrieve history
             history_response = test_client.get(
@@ -831,8 +672,7 @@ class TestDataPersistenceAndConsistency:
                     assert "foods" in latest_record
                     assert "total_calories" in latest_record
 
-    @pytest.mark.asyncio
-    async def test_emotion_data_persisted_across_sessions(
+    def test_emotion_data_persisted_across_sessions(
         self,
         test_client,
         auth_headers
@@ -842,9 +682,8 @@ class TestDataPersistenceAndConsistency:
 
         Workflow:
         1. Perform wellness check
-        2. Wait briefly
-        3. Request wellness history
-        4. Verify check appears in history
+        2. Request wellness history
+        3. Verify check appears in history
         """
         # Perform wellness check
         check_response = test_client.get(
@@ -856,8 +695,7 @@ class TestDataPersistenceAndConsistency:
             check_data = check_response.json()
             emotion_type = check_data["current_emotion"].get("type")
 
-            # Wait for database write
-            await asyncio.sleep(0.5)
+            # /wellness/check saves the reading before it responds
 
             # Get history
             history_response = test_client.get(
@@ -875,30 +713,16 @@ class TestDataPersistenceAndConsistency:
         self,
         test_client,
         auth_headers,
-        sample_food_image
+        first_food_analysis
     ):
         """
-        Test that statistics correctly aggregate multiple records
+        Test that statistics correctly aggregate the user's records
 
         Workflow:
-        1. Upload 2 food items
+        1. First food upload guarantees at least one record (session fixture)
         2. Request statistics
         3. Verify aggregations are correct
         """
-        # Upload first food
-        test_client.post(
-            "/api/v1/food/upload",
-            headers=auth_headers,
-            files={"file": ("food1.jpg", sample_food_image, "image/jpeg")}
-        )
-
-        # Upload second food
-        test_client.post(
-            "/api/v1/food/upload",
-            headers=auth_headers,
-            files={"file": ("food2.jpg", sample_food_image, "image/jpeg")}
-        )
-
         # Get statistics
         stats_response = test_client.get(
             "/api/v1/food/stats?days=7",
@@ -928,15 +752,16 @@ class TestDataPersistenceAndConsistency:
 # Test Class: Performance and Scalability
 # ============================================================================
 
+@pytest.mark.xdist_group(name="performance")
 class TestPerformanceAndScalability:
     """
     Test system performance under various loads
     """
 
-    @pytest.mark.asyncio
-    async def test_concurrent_food_uploads(
+    def test_concurrent_food_uploads(
         self,
         test_client,
+        async_client,
         auth_headers,
         sample_food_image
     ):
@@ -944,19 +769,23 @@ class TestPerformanceAndScalability:
         Test system can handle multiple concurrent uploads
 
         Workflow:
-        1. Submit 5 food uploads concurrently
+        1. Submit 3 food uploads concurrently
         2. All should complete successfully or hit rate limit
         """
         async def upload_food(index):
-            return test_client.post(
+            return await async_client.post(
                 "/api/v1/food/upload",
                 headers=auth_headers,
                 files={"file": (f"food_{index}.jpg", sample_food_image, "image/jpeg")}
             )
 
-        # Create concurrent uploads (limited to avoid rate limit)
-        tasks = [upload_food(i) for i in range(3)]
-        responses = await asyncio.gather(*tasks, return_exceptions=True)
+        async def upload_all():
+            # Create concurrent uploads (limited to avoid rate limit)
+            tasks = [upload_food(i) for i in range(3)]
+            return await asyncio.gather(*tasks, return_exceptions=True)
+
+        # Run on the app's own loop so the uploads really overlap
+        responses = test_client.portal.call(upload_all)
 
         success_count = sum(
             1 for r in responses
@@ -969,29 +798,35 @@ class TestPerformanceAndScalability:
     def test_large_history_query_performance(
         self,
         test_client,
+        async_client,
         auth_headers
     ):
         """
-        Test that querying large history doesn't timeout
+        Test that querying large history stays fast
 
         Workflow:
-        1. Request maximum allowed history (limit=100)
-        2. Should complete in reasonable time (<5s)
+        1. Request maximum allowed history (limit=100), once to warm up
+        2. Time HISTORY_BENCHMARK_ROUNDS further requests
+        3. 95th percentile latency should stay under 1s
         """
-        import time
-
-        start_time = time.time()
+        async def timed_rounds():
+            url = "/api/v1/food/history?limit=100&offset=0"
+            first = await async_client.get(url, headers=auth_headers)
+            timings = []
+            for _ in range(HISTORY_BENCHMARK_ROUNDS):
+                start = time.perf_counter()
+                await async_client.get(url, headers=auth_headers)
+                timings.append(time.perf_counter() - start)
+            return first, timings
 
-        response = test_client.get(
-            "/api/v1/food/history?limit=100&offset=0",
-            headers=auth_headers
+        response, timings = test_client.portal.call(timed_rounds)
+        p95 = statistics.quantiles(timings, n=20)[-1]
+        print(
+            f"history limit=100: mean {statistics.mean(timings) * 1000:.1f}ms, "
+            f"p95 {p95 * 1000:.1f}ms over {len(timings)} rounds"
         )
 
-        end_time = time.time()
-        elapsed = end_time - start_time
-
-        # Should complete within 5 seconds
-        assert elapsed < 5.0
+        assert p95 < 1.0
 
         # Should either succeed or fail gracefully
         assert response.status_code in [200, 401, 500]
@@ -1001,19 +836,15 @@ class TestPerformanceAndScalability:
 # Test Class: API Contract and Response Validation
 # ============================================================================
 
+@pytest.mark.xdist_group(name="contract")
 class TestAPIContractValidation:
     """
     Test that API responses match documented schemas
     """
 
-    def test_food_upload_response_schema(
-        self,
-        test_client,
-        auth_headers,
-        sample_food_image
-    ):
+    def test_food_upload_response_schema(self, first_food_analysis):
         """
-        Verify food upload response matches expected schema
+        Verify food upload response matches FoodAnalysisResponse
 
         Expected fields:
         - food_items: List[FoodItem]
@@ -1023,35 +854,14 @@ class TestAPIContractValidation:
         - recommendation: str
         - xp_gained: int
         """
-        response = test_client.post(
-            "/api/v1/food/upload",
-            headers=auth_headers,
-            files={"file": ("food.jpg", sample_food_image, "image/jpeg")},
-            data={"hrv": "65.0", "heart_rate": "72"}
-        )
+        _ok_json(first_food_analysis, DEGRADED_WRITE_STATUSES)
 
-        if response.status_code == 200:
-            data = response.json()
+        # Strict: no string-to-number coercion hides a wrongly typed field
+        FoodAnalysisResponse.model_validate_json(first_food_analysis.content, strict=True)
 
-            # Required fields
-            assert "food_items" in data
-            assert "total_calories" in data
-            assert "recommendation" in data
-            assert "xp_gained" in data
-
-            # Types
-            assert isinstance(data["food_items"], list)
-            assert isinstance(data["total_calories"], (int, float))
-            assert isinstance(data["recommendation"], str)
-            assert isinstance(data["xp_gained"], int)
-
-    def test_wellness_check_response_schema(
-        self,
-        test_client,
-        auth_headers
-    ):
+    def test_wellness_check_response_schema(self, first_wellness_check):
         """
-        Verify wellness check response matches expected schema
+        Verify wellness check response matches WellnessResponse
 
         Expected fields:
         - current_emotion: EmotionAnalysisResult
@@ -1059,30 +869,13 @@ class TestAPIContractValidation:
         - recommendations: Dict[str, List[str]]
         - daily_tip: str
         """
-        response = test_client.get(
-            "/api/v1/wellness/check?hrv=65.0&heart_rate=72",
-            headers=auth_headers
-        )
+        _ok_json(first_wellness_check, DEGRADED_WRITE_STATUSES)
+
+        data = WellnessResponse.model_validate_json(first_wellness_check.content, strict=True)
 
-        if response.status_code == 200:
-            data = response.json()
-
-            # Required fields
-            assert "current_emotion" in data
-            assert "wellness_score" in data
-            assert "recommendations" in data
-            assert "daily_tip" in data
-
-            # Types and ranges
-            assert isinstance(data["wellness_score"], int)
-            assert 0 <= data["wellness_score"] <= 100
-            assert isinstance(data["daily_tip"], str)
-
-            # Recommendations structure
-            recs = data["recommendations"]
-            assert "food" in recs
-            assert "exercise" in recs
-            assert "content" in recs
+        # Ranges and recommendation sections the schema does not pin down
+        assert 0 <= data.wellness_score <= 100
+        assert {"food", "exercise", "content"} <= data.recommendations.keys()
 
 
 # ============================================================================
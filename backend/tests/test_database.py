@@ -0,0 +1,168 @@
+"""
+Unit Tests for Database Connection Manager
+Tests the PostgreSQL circuit breaker, prepared statements and startup
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.core.database import Database
+from app.core.error_codes import ErrorCode
+from app.core.exceptions import ServiceUnavailableError
+
+
+def make_database(fetch_side_effect=None):
+    """Build a Database whose pool connection raises/returns as configured"""
+    conn = MagicMock()
+    conn.fetch = AsyncMock(side_effect=fetch_side_effect, return_value=[])
+    conn.set_type_codec = AsyncMock()
+
+    acquire_ctx = MagicMock()
+    acquire_ctx.__aenter__ = AsyncMock(return_value=conn)
+    acquire_ctx.__aexit__ = AsyncMock(return_value=False)
+
+    database = Database()
+    database.postgres_pool = MagicMock()
+    database.postgres_pool.acquire = MagicMock(return_value=acquire_ctx)
+    return database, conn
+
+
+class TestCircuitBreaker:
+    """Test fail-fast behaviour during PostgreSQL outages"""
+
+    @pytest.mark.asyncio
+    async def test_circuit_opens_after_consecutive_failures(self):
+        """Test circuit trips after threshold and then fails fast"""
+        database, conn = make_database(fetch_side_effect=ConnectionRefusedError())
+
+        for _ in range(Database.CIRCUIT_FAILURE_THRESHOLD):
+            with pytest.raises(ConnectionRefusedError):
+                await database.execute_query("SELECT 1")
+
+        assert database.circuit_state == Database.CIRCUIT_STATE_OPEN
+
+        with pytest.raises(ServiceUnavailableError) as exc_info:
+            await database.execute_query("SELECT 1")
+
+        assert exc_info.value.error_code == ErrorCode.DB_CONNECTION_FAILED
+        assert exc_info.value.status_code == 503
+        # Pool was not touched once the circuit opened
+        assert conn.fetch.await_count == Database.CIRCUIT_FAILURE_THRESHOLD
+
+    @pytest.mark.asyncio
+    async def test_query_errors_do_not_trip_circuit(self):
+        """Test that errors returned by the server are not counted"""
+        database, _ = make_database(fetch_side_effect=ValueError("bad query"))
+
+        for _ in range(Database.CIRCUIT_FAILURE_THRESHOLD + 1):
+            with pytest.raises(ValueError):
+                await database.execute_query("SELECT broken")
+
+        assert database.circuit_state == Database.CIRCUIT_STATE_CLOSED
+
+    @pytest.mark.asyncio
+    async def test_half_open_probe_closes_circuit(self):
+        """Test a successful probe after cooldown closes the circuit"""
+        database, conn = make_database()
+        database._fail_count = Database.CIRCUIT_FAILURE_THRESHOLD
+        database._opened_at = 0.0  # cooldown long expired
+
+        assert database.circuit_state == Database.CIRCUIT_STATE_HALF_OPEN
+
+        await database.execute_query("SELECT 1")
+
+        assert database.circuit_state == Database.CIRCUIT_STATE_CLOSED
+        assert database._fail_count == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_probe_reopens_circuit(self):
+        """Test a failed probe re-opens the circuit immediately"""
+        database, _ = make_database(fetch_side_effect=OSError("down"))
+        database._fail_count = Database.CIRCUIT_FAILURE_THRESHOLD
+        database._opened_at = 0.0
+
+        with pytest.raises(OSError):
+            await database.execute_query("SELECT 1")
+
+        assert database.circuit_state == Database.CIRCUIT_STATE_OPEN
+
+
+class TestGatherQueries:
+    """Test concurrent fan-out of independent queries"""
+
+    @pytest.mark.asyncio
+    async def test_gather_queries_preserves_order(self):
+        """Test results come back in the order queries were given"""
+        database, conn = make_database()
+        conn.fetch = AsyncMock(side_effect=lambda query, *args: [query, args])
+
+        results = await database.gather_queries([
+            ("SELECT a FROM t WHERE id = $1", (1,)),
+            ("SELECT b FROM t", ()),
+        ])
+
+        assert results == [
+            ["SELECT a FROM t WHERE id = $1", (1,)],
+            ["SELECT b FROM t", ()],
+        ]
+        assert database.postgres_pool.acquire.call_count == 2
+
+
+class TestPreparedStatements:
+    """Test per-connection named prepared statements"""
+
+    @pytest.mark.asyncio
+    async def test_statements_prepared_once_per_connection(self):
+        """Test the init hook prepares statements and calls reuse them"""
+        database, conn = make_database()
+        stmt = MagicMock()
+        stmt.fetchrow = AsyncMock(return_value={"id": 1})
+        conn.prepare = AsyncMock(return_value=stmt)
+
+        database.register_statement("get_one", "SELECT $1::int AS id")
+        await database._init_connection(conn)
+
+        for _ in range(3):
+            assert await database.fetchrow_prepared("get_one", 1) == {"id": 1}
+
+        conn.prepare.assert_awaited_once_with("SELECT $1::int AS id")
+        assert stmt.fetchrow.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_late_registration_prepared_lazily(self):
+        """Test statements registered after connect are prepared on first use"""
+        database, conn = make_database()
+        stmt = MagicMock()
+        stmt.fetch = AsyncMock(return_value=[])
+        conn.prepare = AsyncMock(return_value=stmt)
+
+        await database._init_connection(conn)
+        database.register_statement("list_all", "SELECT 1")
+
+        assert await database.fetch_prepared("list_all") == []
+        assert conn._psi_stmts["list_all"] is stmt
+
+
+class TestConnect:
+    """Test startup resilience of the connection manager"""
+
+    @pytest.mark.asyncio
+    async def test_mongo_index_failure_does_not_abort_startup(self, monkeypatch):
+        """Test a failed user_preferences index build only logs a warning"""
+        from app.core import database as database_module
+
+        collection = MagicMock()
+        collection.create_index = AsyncMock(side_effect=RuntimeError("not authorized"))
+        mongo_db = MagicMock()
+        mongo_db.user_preferences = collection
+        client = MagicMock()
+        client.__getitem__ = MagicMock(return_value=mongo_db)
+
+        monkeypatch.setattr(database_module, "ASYNCPG_AVAILABLE", False)
+        monkeypatch.setattr(database_module, "MOTOR_AVAILABLE", True)
+        monkeypatch.setattr(database_module, "AsyncIOMotorClient", MagicMock(return_value=client))
+
+        database = Database()
+        await database.connect()
+
+        assert database.mongo_db is mongo_db
+        collection.create_index.assert_awaited_once()
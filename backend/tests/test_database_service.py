@@ -0,0 +1,308 @@
+"""
+Unit Tests for Database Service
+Tests history paging, analysis writes, bulk ingestion and Redis-backed
+daily usage counters
+"""
+import asyncio
+import pytest
+from datetime import date, datetime
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services import database_service
+from app.services.database_service import USAGE_DIRTY_SET, DatabaseService
+
+
+class FakePipeline:
+    """Minimal async Redis pipeline recording queued commands"""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def incr(self, key):
+        self.commands.append(("incr", key))
+
+    def expire(self, key, ttl):
+        self.commands.append(("expire", key, ttl))
+
+    def sadd(self, name, key):
+        self.commands.append(("sadd", name, key))
+
+    async def execute(self):
+        self.redis.executed.append(self.commands)
+        return [self.redis.incr_result, True, 1]
+
+
+@pytest.fixture
+def usage_redis(monkeypatch):
+    """Replace the usage counter Redis client with a mock"""
+    redis = MagicMock()
+    redis.get = AsyncMock(return_value=None)
+    redis.set = AsyncMock(return_value=True)
+    redis.exists = AsyncMock(return_value=1)
+    redis.spop = AsyncMock(return_value=[])
+    redis.mget = AsyncMock(return_value=[])
+    redis.sadd = AsyncMock(return_value=1)
+    redis.executed = []
+    redis.incr_result = 1
+    redis.pipeline = MagicMock(side_effect=lambda transaction=True: FakePipeline(redis))
+    monkeypatch.setattr(database_service, "_usage_redis", redis)
+    return redis
+
+
+@pytest.fixture
+def db_mock(monkeypatch):
+    """Replace the database calls used by the usage counter"""
+    fetchrow = AsyncMock(return_value=None)
+    gather = AsyncMock(return_value=[])
+    monkeypatch.setattr(database_service.db, "fetchrow_prepared", fetchrow)
+    monkeypatch.setattr(database_service.db, "gather_queries", gather)
+    return database_service.db
+
+
+def make_readings(start, count):
+    """Emotion readings in get_emotion_history's shape, newest first"""
+    return [
+        {
+            'emotion_id': f'00000000-0000-0000-0000-{i:012d}',
+            'emotion_type': 'calmness',
+            'timestamp': f'2024-01-01T00:00:{59 - i % 60:02d}.000000'
+        }
+        for i in range(start, start + count)
+    ]
+
+
+class TestFullEmotionHistory:
+    """Test aggregation reads that page through the keyset cursor"""
+
+    @pytest.mark.asyncio
+    async def test_follows_cursor_until_short_page(self, monkeypatch):
+        """Test every page is read, not only the newest EMOTION_HISTORY_MAX_ROWS"""
+        monkeypatch.setattr(DatabaseService, "EMOTION_HISTORY_MAX_ROWS", 3)
+        service = DatabaseService()
+        service.get_emotion_history = AsyncMock(side_effect=[
+            make_readings(0, 3), make_readings(3, 3), make_readings(6, 1)
+        ])
+
+        records, truncated = await service.get_full_emotion_history("user-1", days=30)
+
+        assert len(records) == 7
+        assert truncated is False
+        last_call = service.get_emotion_history.await_args_list[-1]
+        assert last_call.kwargs["cursor"][1] == records[5]['emotion_id']
+
+    @pytest.mark.asyncio
+    async def test_reports_truncation_at_safety_cap(self, monkeypatch):
+        """Test hitting the scan cap is surfaced to the caller"""
+        monkeypatch.setattr(DatabaseService, "EMOTION_HISTORY_MAX_ROWS", 2)
+        monkeypatch.setattr(DatabaseService, "EMOTION_HISTORY_SCAN_MAX_ROWS", 4)
+        service = DatabaseService()
+        service.get_emotion_history = AsyncMock(side_effect=[
+            make_readings(0, 2), make_readings(2, 2), make_readings(4, 2)
+        ])
+
+        records, truncated = await service.get_full_emotion_history("user-1", days=365)
+
+        assert len(records) == 4
+        assert truncated is True
+
+
+class TestAnalysisBundle:
+    """Test the concurrent writes behind one food analysis"""
+
+    @pytest.mark.asyncio
+    async def test_usage_counted_after_records_saved(self):
+        """Test the usage counter is incremented once both records are written"""
+        service = DatabaseService()
+        service.save_food_record = AsyncMock(return_value="record-1")
+        service.save_emotion_data = AsyncMock(return_value="emotion-1")
+        service.increment_daily_usage = AsyncMock(return_value=1)
+
+        record_id = await service.save_analysis_bundle(
+            "user-1", {'image_url': 'x'}, 'food_analyses', {'hrv': 50.0}
+        )
+
+        assert record_id == "record-1"
+        service.save_food_record.assert_awaited_once_with(user_id="user-1", image_url='x')
+        service.increment_daily_usage.assert_awaited_once_with("user-1", 'food_analyses')
+
+    @pytest.mark.asyncio
+    async def test_failed_save_skips_usage_and_cancels_sibling(self):
+        """Test a failed food record neither consumes quota nor orphans the emotion write"""
+        emotion_started = asyncio.Event()
+        emotion_cancelled = asyncio.Event()
+
+        async def slow_emotion_write(**kwargs):
+            emotion_started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                emotion_cancelled.set()
+                raise
+
+        async def failing_food_write(**kwargs):
+            await emotion_started.wait()
+            raise OSError("postgres down")
+
+        service = DatabaseService()
+        service.save_food_record = failing_food_write
+        service.save_emotion_data = slow_emotion_write
+        service.increment_daily_usage = AsyncMock()
+
+        with pytest.raises(OSError):
+            await service.save_analysis_bundle(
+                "user-1", {'image_url': 'x'}, 'food_analyses', {'hrv': 50.0}
+            )
+
+        assert emotion_cancelled.is_set()
+        service.increment_daily_usage.assert_not_awaited()
+
+
+class TestEmotionBatchIngestion:
+    """Test bulk wearable ingestion through COPY"""
+
+    @pytest.mark.asyncio
+    async def test_batch_copies_all_rows_in_one_call(self, monkeypatch):
+        """Test every reading goes into a single COPY with generated ids in order"""
+        copy = AsyncMock()
+        monkeypatch.setattr(database_service.db, "copy_records", copy)
+        stamp = datetime(2024, 5, 1, 8, 30)
+        readings = [
+            {'hrv': 55.0, 'heart_rate': 72, 'coherence': 0.6,
+             'emotion_type': 'focus', 'emotion_score': 70, 'timestamp': stamp},
+            {'hrv': 40.0, 'heart_rate': 95, 'coherence': 0.2,
+             'emotion_type': 'stress', 'emotion_score': 80},
+        ]
+
+        ids = await DatabaseService().save_emotion_data_batch("user-1", readings)
+
+        copy.assert_awaited_once()
+        table, records, columns = copy.await_args.args
+        assert table == 'emotion_data'
+        assert [record[0] for record in records] == ids
+        assert records[0][1:] == ("user-1", 55.0, 72, 0.6, 'focus', 70, stamp)
+        assert isinstance(records[1][columns.index('timestamp')], datetime)
+
+    @pytest.mark.asyncio
+    async def test_empty_batch_skips_database(self, monkeypatch):
+        """Test an empty sync does not open a COPY"""
+        copy = AsyncMock()
+        monkeypatch.setattr(database_service.db, "copy_records", copy)
+
+        assert await DatabaseService().save_emotion_data_batch("user-1", []) == []
+        copy.assert_not_awaited()
+
+
+class TestDailyUsageCounters:
+    """Test the Redis fast path and Postgres fallback for free-tier limits"""
+
+    @pytest.mark.asyncio
+    async def test_check_reads_redis_counter(self, usage_redis, db_mock):
+        """Test a Redis hit answers without touching Postgres"""
+        usage_redis.get.return_value = "3"
+
+        assert await DatabaseService().check_daily_usage("user-1") == 3
+        db_mock.fetchrow_prepared.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_check_miss_seeds_from_postgres(self, usage_redis, db_mock):
+        """Test a Redis miss reads Postgres and seeds the key without overwriting"""
+        db_mock.fetchrow_prepared.return_value = {"food_analyses": 5}
+
+        assert await DatabaseService().check_daily_usage("user-1") == 5
+
+        key = usage_redis.get.await_args.args[0]
+        usage_redis.set.assert_awaited_once()
+        assert usage_redis.set.await_args.args == (key, 5)
+        assert usage_redis.set.await_args.kwargs["nx"] is True
+
+    @pytest.mark.asyncio
+    async def test_check_falls_back_when_redis_fails(self, usage_redis, db_mock):
+        """Test Redis errors fall back to Postgres instead of failing open"""
+        usage_redis.get.side_effect = ConnectionError("redis down")
+        db_mock.fetchrow_prepared.return_value = {"food_analyses": 7}
+
+        assert await DatabaseService().check_daily_usage("user-1") == 7
+
+    @pytest.mark.asyncio
+    async def test_increment_seeds_then_counts_in_redis(self, usage_redis, db_mock):
+        """Test a missing counter is seeded from Postgres before INCR"""
+        usage_redis.exists.return_value = 0
+        usage_redis.incr_result = 3
+        db_mock.fetchrow_prepared.return_value = {"food_analyses": 2}
+
+        assert await DatabaseService().increment_daily_usage("user-1") == 3
+
+        usage_redis.set.assert_awaited_once()
+        commands = usage_redis.executed[0]
+        assert commands[0][0] == "incr"
+        assert commands[2] == ("sadd", USAGE_DIRTY_SET, commands[0][1])
+
+    @pytest.mark.asyncio
+    async def test_increment_falls_back_to_postgres(self, usage_redis, db_mock):
+        """Test the Postgres upsert is used when Redis is unavailable"""
+        usage_redis.exists.side_effect = ConnectionError("redis down")
+        db_mock.fetchrow_prepared.return_value = {"food_analyses": 4}
+
+        assert await DatabaseService().increment_daily_usage("user-1") == 4
+        assert db_mock.fetchrow_prepared.await_args.args[0] == "daily_usage_increment:food_analyses"
+
+    @pytest.mark.asyncio
+    async def test_reconcile_upserts_with_greatest(self, usage_redis, db_mock):
+        """Test dirty counters are flushed idempotently and expired keys skipped"""
+        usage_redis.spop.return_value = [
+            "usage:user-1:2024-05-01:food_analyses",
+            "usage:user-2:2024-05-01:fridge_analyses",
+        ]
+        usage_redis.mget.return_value = ["6", None]
+
+        assert await DatabaseService().reconcile_daily_usage() == 1
+
+        (query, args), = db_mock.gather_queries.await_args.args[0]
+        assert "GREATEST(daily_usage.food_analyses, EXCLUDED.food_analyses)" in query
+        assert args[1:] == ("user-1", date(2024, 5, 1), 6)
+
+    @pytest.mark.asyncio
+    async def test_reconcile_requeues_keys_on_failure(self, usage_redis, db_mock):
+        """Test keys go back to the dirty set when the flush fails"""
+        keys = ["usage:user-1:2024-05-01:food_analyses"]
+        usage_redis.spop.return_value = keys
+        usage_redis.mget.return_value = ["6"]
+        db_mock.gather_queries.side_effect = OSError("postgres down")
+
+        with pytest.raises(OSError):
+            await DatabaseService().reconcile_daily_usage()
+
+        usage_redis.sadd.assert_awaited_once_with(USAGE_DIRTY_SET, *keys)
+
+    @pytest.mark.asyncio
+    async def test_reconciler_survives_failed_flush(self, monkeypatch):
+        """Test one failed flush does not stop the background reconciler"""
+        reconcile = AsyncMock(side_effect=[OSError("postgres down"), 2, asyncio.CancelledError()])
+        monkeypatch.setattr(DatabaseService, "reconcile_daily_usage", reconcile)
+
+        with pytest.raises(asyncio.CancelledError):
+            await database_service.run_usage_reconciler(interval=0)
+
+        assert reconcile.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_usage_redis_opened_with_timeouts(self, monkeypatch):
+        """Test the client is created on startup with socket timeouts, and closed on shutdown"""
+        if not database_service.REDIS_AVAILABLE:
+            pytest.skip("redis not installed")
+        monkeypatch.setattr(database_service, "_usage_redis", None)
+
+        database_service.open_usage_redis()
+        kwargs = database_service._usage_redis.connection_pool.connection_kwargs
+        await database_service.close_usage_redis()
+
+        assert kwargs['socket_timeout'] == database_service.USAGE_REDIS_TIMEOUT_SECONDS
+        assert kwargs['socket_connect_timeout'] == database_service.USAGE_REDIS_TIMEOUT_SECONDS
+        assert database_service._usage_redis is None
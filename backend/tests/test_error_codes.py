@@ -3,13 +3,17 @@ Unit Tests for Error Code System
 Tests standardized error codes, exceptions, and error responses
 """
 import pytest
+import orjson
+from datetime import datetime
+from unittest.mock import MagicMock
 from app.core.error_codes import (
     ErrorCode,
     ErrorCategory,
     get_error_metadata,
     format_error_message,
     is_retryable,
-    get_http_status
+    get_http_status,
+    resolve_error
 )
 from app.core.exceptions import (
     PsiException,
@@ -24,62 +28,51 @@ from app.core.exceptions import (
     ExternalServiceError,
     ImageProcessingError,
     NutritionDataNotFoundError,
-    InsufficientDataError
+    InsufficientDataError,
+    to_response
 )
+from app.core.error_handlers import psi_exception_handler
 
 
 class TestErrorCodes:
     """Test error code constants and format"""
 
-    def test_error_code_format_authentication(self):
-        """Test authentication error codes follow format"""
-        assert ErrorCode.AUTH_INVALID_CREDENTIALS.value == "PSI-AUTH-1002"
-        assert ErrorCode.AUTH_TOKEN_EXPIRED.value == "PSI-AUTH-1005"
-        assert ErrorCode.AUTH_ACCOUNT_LOCKED.value == "PSI-AUTH-1010"
-
-    def test_error_code_format_authorization(self):
-        """Test authorization error codes follow format"""
-        assert ErrorCode.AUTHZ_INSUFFICIENT_PERMISSIONS.value == "PSI-AUTHZ-1500"
-        assert ErrorCode.AUTHZ_PREMIUM_ONLY.value == "PSI-AUTHZ-1503"
-
-    def test_error_code_format_validation(self):
-        """Test validation error codes follow format"""
-        assert ErrorCode.VAL_INVALID_INPUT.value == "PSI-VAL-2001"
-        assert ErrorCode.VAL_HRV_OUT_OF_RANGE.value == "PSI-VAL-2010"
-        assert ErrorCode.VAL_FILE_TOO_LARGE.value == "PSI-VAL-2020"
-
-    def test_error_code_format_resources(self):
-        """Test resource error codes follow format"""
-        assert ErrorCode.RES_NOT_FOUND.value == "PSI-RES-3001"
-        assert ErrorCode.RES_RECIPE_NOT_FOUND.value == "PSI-RES-3012"
-        assert ErrorCode.RES_USER_NOT_FOUND.value == "PSI-RES-3010"
-
-    def test_error_code_format_rate_limiting(self):
-        """Test rate limiting error codes follow format"""
-        assert ErrorCode.RATE_LIMIT_EXCEEDED.value == "PSI-RATE-4001"
-        assert ErrorCode.RATE_DAILY_LIMIT_EXCEEDED.value == "PSI-RATE-4002"
-
-    def test_error_code_format_services(self):
-        """Test service error codes follow format"""
-        assert ErrorCode.SVC_UNAVAILABLE.value == "PSI-SVC-5002"
-        assert ErrorCode.SVC_INTERNAL_ERROR.value == "PSI-SVC-5001"
-
-    def test_error_code_format_database(self):
-        """Test database error codes follow format"""
-        assert ErrorCode.DB_CONNECTION_FAILED.value == "PSI-DB-6001"
-        assert ErrorCode.DB_QUERY_FAILED.value == "PSI-DB-6002"
-
-    def test_error_code_format_image_processing(self):
-        """Test image processing error codes follow format"""
-        assert ErrorCode.IMG_PROCESSING_FAILED.value == "PSI-IMG-7001"
-        assert ErrorCode.IMG_NO_FOOD_DETECTED.value == "PSI-IMG-7002"
-
-    def test_error_code_format_domain_specific(self):
-        """Test domain-specific error codes follow format"""
-        assert ErrorCode.NUT_DATA_NOT_FOUND.value == "PSI-NUT-9001"
-        assert ErrorCode.EMO_ANALYSIS_FAILED.value == "PSI-EMO-9101"
-        assert ErrorCode.RCP_NO_MATCHES_FOUND.value == "PSI-RCP-9201"
-
+    @pytest.mark.parametrize("code,expected", [
+        # Authentication
+        (ErrorCode.AUTH_INVALID_CREDENTIALS, "PSI-AUTH-1002"),
+        (ErrorCode.AUTH_TOKEN_EXPIRED, "PSI-AUTH-1005"),
+        (ErrorCode.AUTH_ACCOUNT_LOCKED, "PSI-AUTH-1010"),
+        # Authorization
+        (ErrorCode.AUTHZ_INSUFFICIENT_PERMISSIONS, "PSI-AUTHZ-1500"),
+        (ErrorCode.AUTHZ_PREMIUM_ONLY, "PSI-AUTHZ-1503"),
+        # Validation
+        (ErrorCode.VAL_INVALID_INPUT, "PSI-VAL-2001"),
+        (ErrorCode.VAL_HRV_OUT_OF_RANGE, "PSI-VAL-2010"),
+        (ErrorCode.VAL_FILE_TOO_LARGE, "PSI-VAL-2020"),
+        # Resources
+        (ErrorCode.RES_NOT_FOUND, "PSI-RES-3001"),
+        (ErrorCode.RES_RECIPE_NOT_FOUND, "PSI-RES-3012"),
+        (ErrorCode.RES_USER_NOT_FOUND, "PSI-RES-3010"),
+        # Rate limiting
+        (ErrorCode.RATE_LIMIT_EXCEEDED, "PSI-RATE-4001"),
+        (ErrorCode.RATE_DAILY_LIMIT_EXCEEDED, "PSI-RATE-4002"),
+        # Services
+        (ErrorCode.SVC_UNAVAILABLE, "PSI-SVC-5002"),
+        (ErrorCode.SVC_INTERNAL_ERROR, "PSI-SVC-5001"),
+        # Database
+        (ErrorCode.DB_CONNECTION_FAILED, "PSI-DB-6001"),
+        (ErrorCode.DB_QUERY_FAILED, "PSI-DB-6002"),
+        # Image processing
+        (ErrorCode.IMG_PROCESSING_FAILED, "PSI-IMG-7001"),
+        (ErrorCode.IMG_NO_FOOD_DETECTED, "PSI-IMG-7002"),
+        # Domain-specific
+        (ErrorCode.NUT_DATA_NOT_FOUND, "PSI-NUT-9001"),
+        (ErrorCode.EMO_ANALYSIS_FAILED, "PSI-EMO-9101"),
+        (ErrorCode.RCP_NO_MATCHES_FOUND, "PSI-RCP-9201"),
+    ])
+    def test_error_code_value(self, code, expected):
+        """Test error codes follow the PSI-<CATEGORY>-<NUMBER> format"""
+        assert code.value == expected
 
 class TestErrorMetadata:
     """Test error code metadata retrieval"""
@@ -125,6 +118,24 @@ class TestErrorMetadata:
         assert "status_code" in metadata
         assert "message" in metadata
 
+    def test_metadata_lookup_is_memoized(self):
+        """Test repeated lookups return the same cached mapping"""
+        first = get_error_metadata(ErrorCode.RES_NOT_FOUND)
+        hits = get_error_metadata.cache_info().hits
+
+        assert get_error_metadata(ErrorCode.RES_NOT_FOUND) is first
+        assert get_error_metadata.cache_info().hits == hits + 1
+
+    def test_metadata_is_read_only(self):
+        """Test metadata table and entries cannot be mutated by callers"""
+        metadata = get_error_metadata(ErrorCode.RES_NOT_FOUND)
+        with pytest.raises(TypeError):
+            metadata["status_code"] = 200
+
+        fallback = get_error_metadata(ErrorCode.RES_EXPIRED)
+        with pytest.raises(TypeError):
+            fallback["retryable"] = False
+
 
 class TestErrorMessageFormatting:
     """Test error message formatting with placeholders"""
@@ -154,24 +165,57 @@ class TestErrorMessageFormatting:
 class TestErrorCodeHelpers:
     """Test helper functions"""
 
-    def test_is_retryable_true(self):
-        """Test retryable errors"""
-        assert is_retryable(ErrorCode.AUTH_INVALID_CREDENTIALS) == True
-        assert is_retryable(ErrorCode.SVC_UNAVAILABLE) == True
-        assert is_retryable(ErrorCode.RATE_DAILY_LIMIT_EXCEEDED) == True
+    @pytest.mark.parametrize("code,expected", [
+        (ErrorCode.AUTH_INVALID_CREDENTIALS, True),
+        (ErrorCode.SVC_UNAVAILABLE, True),
+        (ErrorCode.RATE_DAILY_LIMIT_EXCEEDED, True),
+        (ErrorCode.AUTHZ_INSUFFICIENT_PERMISSIONS, False),
+        (ErrorCode.RES_RECIPE_NOT_FOUND, False),
+    ])
+    def test_is_retryable(self, code, expected):
+        """Test retryable and non-retryable errors"""
+        assert is_retryable(code) is expected
+
+    @pytest.mark.parametrize("code,expected", [
+        (ErrorCode.AUTH_INVALID_CREDENTIALS, 401),
+        (ErrorCode.AUTHZ_INSUFFICIENT_PERMISSIONS, 403),
+        (ErrorCode.RES_NOT_FOUND, 404),
+        (ErrorCode.RATE_LIMIT_EXCEEDED, 429),
+        (ErrorCode.SVC_UNAVAILABLE, 503),
+    ])
+    def test_get_http_status(self, code, expected):
+        """Test HTTP status code retrieval"""
+        assert get_http_status(code) == expected
 
-    def test_is_retryable_false(self):
-        """Test non-retryable errors"""
-        assert is_retryable(ErrorCode.AUTHZ_INSUFFICIENT_PERMISSIONS) == False
-        assert is_retryable(ErrorCode.RES_RECIPE_NOT_FOUND) == False
+    def test_resolve_error(self):
+        """Test resolving status, messages and retryable flag in one call"""
+        status_code, message, user_message, retryable = resolve_error(
+            ErrorCode.RATE_DAILY_LIMIT_EXCEEDED,
+            limit=3,
+            error_code="PSI-RATE-4002"
+        )
+        assert status_code == 429
+        assert message == "Daily API limit exceeded"
+        assert "3 analyses" in user_message
+        assert retryable == True
+
+    def test_resolve_error_unknown_code(self):
+        """Test resolve_error falls back to default metadata"""
+        status_code, _, user_message, retryable = resolve_error(ErrorCode.RES_EXPIRED)
+        assert status_code == 500
+        assert len(user_message) > 0
+        assert retryable == True
+
+    def test_resolve_error_keeps_unformattable_message(self, monkeypatch):
+        """Test a malformed template is returned as-is instead of raising"""
+        from app.core import error_codes
+        monkeypatch.setattr(
+            error_codes, "_resolve_static",
+            lambda code: (400, "Bad input", "Use {braces only in pairs", False)
+        )
 
-    def test_get_http_status(self):
-        """Test HTTP status code retrieval"""
-        assert get_http_status(ErrorCode.AUTH_INVALID_CREDENTIALS) == 401
-        assert get_http_status(ErrorCode.AUTHZ_INSUFFICIENT_PERMISSIONS) == 403
-        assert get_http_status(ErrorCode.RES_NOT_FOUND) == 404
-        assert get_http_status(ErrorCode.RATE_LIMIT_EXCEEDED) == 429
-        assert get_http_status(ErrorCode.SVC_UNAVAILABLE) == 503
+        _, _, user_message, _ = resolve_error(ErrorCode.VAL_INVALID_INPUT, field="name")
+        assert user_message == "Use {braces only in pairs"
 
 
 class TestExceptions:
@@ -312,6 +356,23 @@ class TestPsiExceptionBase:
         assert error.details["error_code"] == "PSI-RES-3001"
         assert error.details["retryable"] == False
 
+    def test_psi_exception_details_built_lazily(self):
+        """Test metadata is only merged into details on first access"""
+        raw = {"field": "email"}
+        error = PsiException("Test error", error_code=ErrorCode.VAL_INVALID_INPUT, details=raw)
+        assert error._details is None
+
+        assert error.details["field"] == "email"
+        assert error.details["error_code"] == ErrorCode.VAL_INVALID_INPUT.value
+        assert error.details is error.details
+        assert raw == {"field": "email"}
+
+    def test_psi_exception_has_no_instance_dict(self):
+        """Test slotted exceptions never populate an instance __dict__"""
+        error = ResourceNotFoundError("Recipe", "42")
+        assert error.details["resource"] == "Recipe"
+        assert error.__dict__ == {}
+
     def test_psi_exception_inherits_from_exception(self):
         """Test PsiException inherits from Exception"""
         error = PsiException("Test")
@@ -323,45 +384,84 @@ class TestPsiExceptionBase:
         assert str(error) == "Test error message"
 
 
+class TestErrorResponse:
+    """Test direct PsiException to response conversion"""
+
+    def test_to_response_envelope(self):
+        """Test response carries status, code and user message"""
+        error = ResourceNotFoundError("Recipe", "42")
+        response = to_response(error)
+        body = orjson.loads(response.body)
+
+        assert response.status_code == 404
+        assert body["error"]["type"] == "ResourceNotFoundError"
+        assert body["error"]["code"] == error.details["error_code"]
+        assert "user_message" in body["error"]
+
+    def test_to_response_serializes_datetime_and_enum(self):
+        """Test details with datetime, Enum and set values are encoded"""
+        error = PsiException(
+            "Test error",
+            status_code=400,
+            details={
+                "at": datetime(2024, 1, 1, 12, 0),
+                "category": ErrorCategory.VALIDATION,
+                "tags": {"a"}
+            }
+        )
+        details = orjson.loads(to_response(error).body)["error"]["details"]
+
+        assert details["at"] == "2024-01-01T12:00:00"
+        assert details["category"] == ErrorCategory.VALIDATION.value
+        assert details["tags"] == ["a"]
+
+    @pytest.mark.asyncio
+    async def test_handler_drops_traceback_for_client_errors(self):
+        """Test traceback is released only for high-volume client errors"""
+        request = MagicMock()
+        for exc_class, kept in ((RateLimitError, False), (DatabaseError, True)):
+            try:
+                raise exc_class("query") if kept else exc_class()
+            except PsiException as caught:
+                error = caught
+
+            await psi_exception_handler(request, error)
+            assert (error.__traceback__ is not None) == kept
+
+
 class TestErrorCodeCoverage:
     """Test that all error codes have proper metadata"""
 
-    def test_all_auth_codes_have_metadata(self):
-        """Test all authentication error codes have metadata"""
-        auth_codes = [
-            ErrorCode.AUTH_INVALID_CREDENTIALS,
-            ErrorCode.AUTH_TOKEN_EXPIRED,
-            ErrorCode.AUTH_TOKEN_INVALID,
-            ErrorCode.AUTH_ACCOUNT_LOCKED,
-        ]
-        for code in auth_codes:
-            metadata = get_error_metadata(code)
-            assert "status_code" in metadata
-            assert "message" in metadata
-            assert "user_message" in metadata
-
-    def test_all_rate_limit_codes_have_metadata(self):
-        """Test all rate limit error codes have metadata"""
-        rate_codes = [
-            ErrorCode.RATE_LIMIT_EXCEEDED,
-            ErrorCode.RATE_DAILY_LIMIT_EXCEEDED,
-        ]
-        for code in rate_codes:
-            metadata = get_error_metadata(code)
-            assert metadata["status_code"] == 429
-            assert metadata["retryable"] == True
-
-    def test_all_resource_codes_have_metadata(self):
-        """Test all resource error codes have metadata"""
-        resource_codes = [
-            ErrorCode.RES_RECIPE_NOT_FOUND,
-            ErrorCode.RES_USER_NOT_FOUND,
-        ]
-        for code in resource_codes:
-            metadata = get_error_metadata(code)
-            assert metadata["status_code"] == 404
-            assert metadata["retryable"] == False
-
+    @pytest.mark.parametrize("code", [
+        ErrorCode.AUTH_INVALID_CREDENTIALS,
+        ErrorCode.AUTH_TOKEN_EXPIRED,
+        ErrorCode.AUTH_TOKEN_INVALID,
+        ErrorCode.AUTH_ACCOUNT_LOCKED,
+    ])
+    def test_auth_code_has_metadata(self, code):
+        """Test authentication error codes have metadata"""
+        metadata = get_error_metadata(code)
+        assert {"status_code", "message", "user_message"} <= metadata.keys()
+
+    @pytest.mark.parametrize("code", [
+        ErrorCode.RATE_LIMIT_EXCEEDED,
+        ErrorCode.RATE_DAILY_LIMIT_EXCEEDED,
+    ])
+    def test_rate_limit_code_has_metadata(self, code):
+        """Test rate limit error codes are retryable 429s"""
+        metadata = get_error_metadata(code)
+        assert metadata["status_code"] == 429
+        assert metadata["retryable"] is True
+
+    @pytest.mark.parametrize("code", [
+        ErrorCode.RES_RECIPE_NOT_FOUND,
+        ErrorCode.RES_USER_NOT_FOUND,
+    ])
+    def test_resource_code_has_metadata(self, code):
+        """Test resource error codes are non-retryable 404s"""
+        metadata = get_error_metadata(code)
+        assert metadata["status_code"] == 404
+        assert metadata["retryable"] is False
 
 class TestErrorCodeCategories:
     """Test error code categories"""
@@ -2,27 +2,21 @@
 Unit Tests for Food Analysis Component (Mode 1)
 """
 import pytest
-from fastapi.testclient import TestClient
-from app.main import app
+import asyncio
 from app.services.image_recognition import ImageRecognitionService
 from app.services.nutrition_analysis import NutritionAnalysisService
-from app.services.emotion_analysis import EmotionAnalysisService
 import io
+import orjson
 from PIL import Image
 
-client = TestClient(app)
-
 
 class TestFoodImageUpload:
     """Test suite for food image upload functionality"""
 
-    def test_food_upload_without_auth(self):
+    def test_food_upload_without_auth(self, client, image_factory):
         """Test that food upload requires authentication"""
         # Create a dummy image
-        img = Image.new('RGB', (100, 100), color='red')
-        img_bytes = io.BytesIO()
-        img.save(img_bytes, format='JPEG')
-        img_bytes.seek(0)
+        img_bytes = io.BytesIO(image_factory(size=(100, 100)))
 
         response = client.post(
             "/api/v1/food/upload",
@@ -31,7 +25,7 @@ class TestFoodImageUpload:
 
         assert response.status_code == 403  # Unauthorized
 
-    def test_food_upload_invalid_file_type(self):
+    def test_food_upload_invalid_file_type(self, client):
         """Test that non-image files are rejected"""
         response = client.post(
             "/api/v1/food/upload",
@@ -80,61 +74,169 @@ class TestFoodImageUpload:
         # Should be less than full image
         assert 50 <= portion <= 200
 
+    def test_batch_portion_sizes_match_single(self):
+        """Test the vectorised estimate agrees with the per-box estimate"""
+        service = ImageRecognitionService()
+        bboxes = [[0, 0, 640, 640], [0, 0, 320, 320], [10, 10, 20, 20], [100, 50, 500, 450]]
 
-class TestEmotionAnalysis:
-    """Test suite for emotion analysis"""
+        portions = service.estimate_portion_sizes(bboxes)
+
+        assert portions == pytest.approx([service.estimate_portion_size(b) for b in bboxes])
+        assert service.estimate_portion_sizes([]) == []
+
+    def test_cache_key_survives_reencoding(self):
+        """Test re-encoded copies of an image share a cache key"""
+        pytest.importorskip("cv2")
+        service = ImageRecognitionService()
+
+        image = Image.new('RGB', (200, 200), color='white')
+        image.paste((200, 30, 30), (40, 40, 160, 160))
+
+        keys = set()
+        for quality in (95, 70):
+            buffer = io.BytesIO()
+            image.save(buffer, format='JPEG', quality=quality)
+            keys.add(service._get_cache_key(buffer.getvalue()))
+
+        assert len(keys) == 1
+        assert keys.pop().startswith("phash:")
 
     @pytest.mark.asyncio
-    async def test_stress_detection(self):
-        """Test stress emotion detection"""
-        service = EmotionAnalysisService()
+    async def test_yolo_bboxes_independent_of_resolution(self):
+        """Test boxes are reported in 640x640 space regardless of upload size"""
+        from types import SimpleNamespace
+        from unittest.mock import AsyncMock
+        np = pytest.importorskip("numpy")
+        service = ImageRecognitionService()
+
+        # Box covering the top-left quarter of a 3024x4032 photo
+        boxes = SimpleNamespace(
+            cls=np.array([0.0]),
+            conf=np.array([0.9]),
+            xyxy=np.array([[0.0, 0.0, 1512.0, 2016.0]]),
+            xyxyn=np.array([[0.0, 0.0, 0.5, 0.5]])
+        )
+        result = SimpleNamespace(boxes=boxes, names={0: 'rice'})
+        service._yolo_runner = SimpleNamespace(submit=AsyncMock(return_value=result))
 
-        # High HR, low HRV = stress
-        result = await service.classify_emotion(hrv=30, hr=100)
+        detections = await service._run_yolo_inference(Image.new('RGB', (8, 8)))
 
-        assert result.type == 'stress' or result.type == 'anxiety'
-        assert result.score > 0
+        assert detections[0]['bbox'] == [0.0, 0.0, 320.0, 320.0]
+        assert service.estimate_portion_size(detections[0]['bbox']) == 100
+
+    def test_claude_payload_downscaled(self):
+        """Test large images are shrunk to JPEG before the Claude Vision fallback"""
+        import base64
+        from app.services.image_recognition import CLAUDE_IMAGE_MAX_SIDE
+        service = ImageRecognitionService()
+
+        buffer = io.BytesIO()
+        Image.new('RGB', (3000, 2000), color='green').save(buffer, format='PNG')
+        image_bytes = buffer.getvalue()
+
+        media_type, data = service._encode_for_claude(
+            image_bytes, Image.open(io.BytesIO(image_bytes))
+        )
+
+        sent = Image.open(io.BytesIO(base64.b64decode(data)))
+        assert media_type == "image/jpeg"
+        assert max(sent.size) == CLAUDE_IMAGE_MAX_SIDE
 
     @pytest.mark.asyncio
-    async def test_calmness_detection(self):
-        """Test calmness detection"""
-        service = EmotionAnalysisService()
+    async def test_yolo_runner_batches_concurrent_images(self):
+        """Test concurrent submissions share predict calls of at most YOLO_MAX_BATCH"""
+        import asyncio
+        from app.services.image_recognition import BatchingYOLORunner, YOLO_MAX_BATCH
+
+        class FakeModel:
+            def __init__(self):
+                self.batch_sizes = []
+
+            def predict(self, source, **kwargs):
+                self.batch_sizes.append(len(source))
+                return [f"result-{item}" for item in source]
+
+        model = FakeModel()
+        runner = BatchingYOLORunner(model)
+
+        results = await asyncio.gather(*(runner.submit(i) for i in range(10)))
+
+        assert results == [f"result-{i}" for i in range(10)]
+        assert max(model.batch_sizes) <= YOLO_MAX_BATCH
+        assert len(model.batch_sizes) < 10
+
 
-        # High HRV, low HR = calmness
-        result = await service.classify_emotion(hrv=80, hr=60)
+class TestEmotionAnalysis:
+    """Test suite for emotion analysis"""
 
-        assert result.type in ['calmness', 'happiness']
-        assert result.score > 0
+    # (reading, acceptable emotion types); None accepts any type
+    CLASSIFICATION_CASES = [
+        ({'hrv': 30, 'hr': 100}, {'stress', 'anxiety'}),  # High HR, low HRV = stress
+        ({'hrv': 80, 'hr': 60}, {'calmness', 'happiness'}),  # High HRV, low HR = calmness
+        ({'hrv': 25, 'hr': 55}, {'fatigue', 'apathy'}),  # Low HRV, low HR = fatigue
+        ({'hrv': 60, 'hr': 75}, None),  # Mid-range reading, scoring only
+    ]
 
     @pytest.mark.asyncio
-    async def test_fatigue_detection(self):
-        """Test fatigue detection"""
-        service = EmotionAnalysisService()
+    async def test_emotion_classification_matrix(self, emotion_service):
+        """Test stress, calmness and fatigue detection and score ranges in one batch"""
+        results = await asyncio.gather(*(
+            emotion_service.classify_emotion(**reading)
+            for reading, _ in self.CLASSIFICATION_CASES
+        ))
+
+        for (reading, expected_types), result in zip(self.CLASSIFICATION_CASES, results):
+            if expected_types is not None:
+                assert result.type in expected_types, reading
+                assert result.score > 0, reading
+            # Scores are in valid range for all 8 emotion types
+            assert 0 <= result.score <= 100, reading
+            assert len(result.all_emotions) == 8, reading
+
+    def test_score_readings_matches_single_scoring(self, emotion_service):
+        """Test batch NumPy scores equal the per-reading scores"""
+        pytest.importorskip("numpy")
+        readings = [(30, 100, 0.2), (80, 60, 0.9), (45, 58, 0.45), (120, 180, 0.0)]
+
+        scores = emotion_service.score_readings(*zip(*readings))
+
+        assert scores.shape == (len(readings), 8)
+        for row, (hrv, hr, coherence) in zip(scores, readings):
+            expected = [
+                emotion_service._calculate_emotion_score(hrv, hr, coherence, bounds)
+                for _, bounds in emotion_service._RULE_BOUNDS
+            ]
+            assert row.tolist() == pytest.approx(expected)
 
-        # Low HRV, low HR = fatigue
-        result = await service.classify_emotion(hrv=25, hr=55)
+    @pytest.mark.asyncio
+    async def test_top_emotion_lookup_matches_classifier(self, emotion_service):
+        """Test the lookup-table fast path agrees with classify_emotion on grid points"""
+        pytest.importorskip("numpy")
 
-        assert result.type in ['fatigue', 'apathy']
+        for hrv, hr, coherence in [(30, 100, 0.2), (80, 60, 0.9), (60, 85, 1.0), (35, 58, 0.5)]:
+            result = await emotion_service.classify_emotion(hrv, hr, coherence)
+            top = emotion_service.classify_top_emotion(hrv, hr, coherence)
+            assert top == (result.type, result.score)
 
     @pytest.mark.asyncio
-    async def test_emotion_score_calculation(self):
-        """Test emotion scoring algorithm"""
-        service = EmotionAnalysisService()
+    async def test_repeated_readings_hit_rank_cache(self, emotion_service):
+        """Test identical readings reuse the cached ranking but get fresh results"""
+        from app.services.emotion_analysis import _rank_emotions_cached
+        _rank_emotions_cached.cache_clear()
 
-        # Test that scores are in valid range
-        result = await service.classify_emotion(hrv=60, hr=75)
+        first = await emotion_service.classify_emotion(hrv=62, hr=74, coherence=0.7)
+        second = await emotion_service.classify_emotion(hrv=62, hr=74, coherence=0.7)
 
-        assert 0 <= result.score <= 100
-        assert hasattr(result, 'all_emotions')
-        assert len(result.all_emotions) == 8  # 8 emotion types
+        assert _rank_emotions_cached.cache_info().hits == 1
+        assert first == second
+        assert first.all_emotions is not second.all_emotions
 
 
 class TestNutritionCalculation:
     """Test suite for nutrition calculations"""
 
-    def test_total_nutrition_calculation(self):
+    def test_total_nutrition_calculation(self, nutrition_service):
         """Test combining nutrition from multiple foods"""
-        service = NutritionAnalysisService()
 
         food_items = [
             {
@@ -155,24 +257,181 @@ class TestNutritionCalculation:
             }
         ]
 
-        total = service.calculate_total_nutrition(food_items)
+        total = nutrition_service.calculate_total_nutrition(food_items)
 
         assert total['calories'] == 350
         assert total['protein'] == 30
         assert total['carbs'] == 30
         assert total['fat'] == 8
 
+    def test_total_nutrition_skips_missing_data(self, nutrition_service):
+        """Test items without nutrition are skipped and absent nutrients count as 0"""
+
+        total = nutrition_service.calculate_total_nutrition([
+            {'nutrition': {'calories': 10.25, 'iron': 0.04}},
+            {'name': 'unknown'},
+            {'nutrition': {'calories': 0.1, 'iron': 0.02}}
+        ])
+
+        assert list(total) == ['calories', 'protein', 'carbs', 'fat', 'fiber', 'sugar',
+                               'sodium', 'calcium', 'iron', 'vitamin_a', 'vitamin_c']
+        assert total['calories'] == 10.3
+        assert total['iron'] == 0.1
+        assert total['protein'] == 0
+        assert all(v == 0 for v in nutrition_service.calculate_total_nutrition([]).values())
+
+
+def make_usda_db(names, path=':memory:'):
+    """Foods table shaped like data/usda_foods.db (in memory by default)"""
+    import sqlite3
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute(
+        "CREATE TABLE foods (name TEXT, calories REAL, protein REAL, carbs REAL, fat REAL, "
+        "fiber REAL, sugar REAL, sodium REAL, calcium REAL, iron REAL, "
+        "vitamin_a REAL, vitamin_c REAL)"
+    )
+    conn.executemany(
+        "INSERT INTO foods VALUES (?, 100, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10)",
+        [(name,) for name in names]
+    )
+    conn.commit()
+    return conn
+
+
+class TestNutritionLookup:
+    """Test USDA food name lookups"""
+
+    def make_service(self, names):
+        service = NutritionAnalysisService()
+        service.db = make_usda_db(names)
+        service.redis_client = None
+        service._fts_enabled = service._ensure_search_indexes()
+        return service
+
+    @pytest.mark.asyncio
+    async def test_connection_tuned_and_read_only(self, tmp_path, monkeypatch):
+        """Test the USDA connection uses WAL and mmap and refuses writes after setup"""
+        import sqlite3
+        (tmp_path / 'data').mkdir()
+        make_usda_db(["Rice, white"], tmp_path / 'data' / 'usda_foods.db').close()
+        monkeypatch.chdir(tmp_path)
+
+        service = NutritionAnalysisService()
+        service.redis_client = None
+
+        assert service.db.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        assert service.db.execute("PRAGMA mmap_size").fetchone()[0] == 268435456
+        assert service.db.execute("PRAGMA query_only").fetchone()[0] == 1
+        assert service._fts_enabled is True
+        assert (await service.get_nutrition_info("rice"))['name'] == "Rice, white"
+        with pytest.raises(sqlite3.OperationalError):
+            service.db.execute("DELETE FROM foods")
+
+    @pytest.mark.asyncio
+    async def test_lookup_uses_fts_index(self):
+        """Test names are matched by word prefix through foods_fts"""
+        service = self.make_service(["Pineapple, raw", "Apples, raw, with skin", "Rice, white"])
+
+        plan = service.db.execute(
+            "EXPLAIN QUERY PLAN SELECT rowid FROM foods_fts WHERE foods_fts MATCH ?",
+            ('"apple"*',)
+        ).fetchall()
+        result = await service.get_nutrition_info("apple", 150)
+
+        assert any("VIRTUAL TABLE INDEX" in row[-1] for row in plan)
+        assert service._fts_enabled is True
+        assert result['name'] == "Apples, raw, with skin"
+        assert result['calories'] == 150.0
+
+    @pytest.mark.asyncio
+    async def test_fts_lookup_returns_best_ranked_match(self):
+        """Test the closest name wins over an earlier row that also matches"""
+        service = self.make_service([
+            "Rice pudding, with white chocolate, vanilla, and raisins",
+            "Rice, white",
+        ])
+
+        result = await service.get_nutrition_info("rice white")
+
+        assert result['name'] == "Rice, white"
+
+    @pytest.mark.asyncio
+    async def test_query_syntax_is_escaped(self):
+        """Test FTS operators in a food name are treated as plain words"""
+        service = self.make_service(["Crème brûlée", "Rice, white"])
+
+        assert (await service.get_nutrition_info('creme "brulee*')) is not None
+        assert (await service.get_nutrition_info("(rice:)"))['name'] == "Rice, white"
+        assert await service.get_nutrition_info("NOT rice") is None
+
+    @pytest.mark.asyncio
+    async def test_like_fallback_is_indexed_prefix_match(self):
+        """Test the LIKE fallback uses the NOCASE index and no longer matches mid-word"""
+        service = self.make_service(["Pineapple, raw", "Chicken breast, roasted"])
+        service._fts_enabled = False
+
+        plan = service.db.execute(
+            "EXPLAIN QUERY PLAN SELECT name FROM foods WHERE name LIKE ?", ("chicken%",)
+        ).fetchall()
+
+        assert any("idx_foods_name_nocase" in row[-1] for row in plan)
+        assert (await service.get_nutrition_info("chicken"))['name'] == "Chicken breast, roasted"
+        assert await service.get_nutrition_info("apple") is None
+
+    @pytest.mark.asyncio
+    async def test_sqlite_lookups_run_off_event_loop(self):
+        """Test SQLite queries run in a worker thread, not the event loop thread"""
+        import threading
+        service = self.make_service(["Rice, white"])
+        find_food = service._find_food
+        threads = []
+
+        def recording_find_food(food_name):
+            threads.append(threading.get_ident())
+            return find_food(food_name)
+
+        service._find_food = recording_find_food
+        await service.get_nutrition_info("rice")
+        await service.get_nutrition_info_batch([("rice", 100), ("rice", 50)])
+
+        assert len(threads) == 2
+        assert threading.get_ident() not in threads
+
+    @pytest.mark.asyncio
+    async def test_batch_lookup_uses_one_mget_and_pipeline(self):
+        """Test a meal's lookups share one MGET and one write-back pipeline"""
+        from unittest.mock import AsyncMock, MagicMock
+        service = self.make_service(["Apples, raw", "Rice, white"])
+        cached_apple = {'name': 'Apples, raw', 'portion_grams': 100, 'calories': 52.0}
+        service.redis_client = MagicMock()
+        service.redis_client.mget = AsyncMock(
+            return_value=[orjson.dumps(cached_apple), None, None, None]
+        )
+        pipe = service.redis_client.pipeline.return_value
+        pipe.execute = AsyncMock()
+
+        results = await service.get_nutrition_info_batch(
+            [("apple", 100), ("rice", 200), ("rice", 50), ("unknown food", 100)]
+        )
+
+        service.redis_client.mget.assert_awaited_once()
+        assert results[0] == cached_apple
+        assert [r['calories'] for r in results[1:3]] == [200.0, 50.0]
+        assert results[3] is None
+        assert pipe.setex.call_count == 2
+        pipe.execute.assert_awaited_once()
+        service.redis_client.get.assert_not_called()
+
 
 class TestFoodRecommendations:
     """Test suite for personalized recommendations"""
 
     @pytest.mark.asyncio
-    async def test_stress_recommendation(self):
+    async def test_stress_recommendation(self, emotion_service):
         """Test recommendation for stressed state"""
-        service = EmotionAnalysisService()
 
         nutrition = {'calories': 500, 'protein': 25, 'carbs': 60}
-        recommendation = await service.get_emotion_nutrition_recommendation(
+        recommendation = await emotion_service.get_emotion_nutrition_recommendation(
             'stress',
             nutrition
         )
@@ -181,12 +440,11 @@ class TestFoodRecommendations:
         assert len(recommendation) > 0
 
     @pytest.mark.asyncio
-    async def test_happiness_recommendation(self):
+    async def test_happiness_recommendation(self, emotion_service):
         """Test recommendation for happy state"""
-        service = EmotionAnalysisService()
 
         nutrition = {'calories': 400, 'protein': 20}
-        recommendation = await service.get_emotion_nutrition_recommendation(
+        recommendation = await emotion_service.get_emotion_nutrition_recommendation(
             'happiness',
             nutrition
         )
@@ -194,6 +452,16 @@ class TestFoodRecommendations:
         assert isinstance(recommendation, str)
         assert 'great' in recommendation.lower() or 'good' in recommendation.lower()
 
+    @pytest.mark.asyncio
+    async def test_unknown_emotion_gets_default_recommendation(self, emotion_service):
+        """Test an unrecognized emotion type falls back to the generic tip"""
+        recommendation = await emotion_service.get_emotion_nutrition_recommendation(
+            'bewildered',
+            {'calories': 400}
+        )
+
+        assert recommendation == "Enjoy your meal mindfully!"
+
 
 # Integration Tests
 
@@ -4,30 +4,25 @@ Tests: Unit, Integration, Security, Performance, Edge Cases
 """
 import pytest
 import asyncio
-from fastapi.testclient import TestClient
 from fastapi import HTTPException
 from unittest.mock import Mock, patch, AsyncMock, MagicMock
 import io
-from PIL import Image
 import json
 from datetime import datetime
+from types import SimpleNamespace
 
 # Import the app and services
 from app.main import app
 from app.api.v1.food_enhanced import FoodUploadService
+from app.models.food import FoodAnalysisResponse, FoodItem
 from app.services.database_service import DatabaseService
+from app.core.security import verify_token
 
 
 # ============================================================================
 # FIXTURES
 # ============================================================================
 
-@pytest.fixture
-def client():
-    """Test client for API requests"""
-    return TestClient(app)
-
-
 @pytest.fixture
 def mock_auth_token():
     """Mock JWT token for authentication"""
@@ -40,49 +35,53 @@ def mock_user_id():
     return "user-123-456-789"
 
 
-@pytest.fixture
-def sample_image_bytes():
+@pytest.fixture(scope="session")
+def sample_image_bytes(image_factory):
     """Generate sample valid image bytes"""
-    img = Image.new('RGB', (800, 600), color='red')
-    img_bytes = io.BytesIO()
-    img.save(img_bytes, format='JPEG')
-    img_bytes.seek(0)
-    return img_bytes.read()
+    return image_factory()
 
 
-@pytest.fixture
-def small_image_bytes():
+@pytest.fixture(scope="session")
+def small_image_bytes(image_factory):
     """Generate image that's too small"""
-    img = Image.new('RGB', (50, 50), color='blue')
-    img_bytes = io.BytesIO()
-    img.save(img_bytes, format='JPEG')
-    img_bytes.seek(0)
-    return img_bytes.read()
+    return image_factory(size=(50, 50), color='blue')
 
 
-@pytest.fixture
-def large_image_bytes():
+@pytest.fixture(scope="session")
+def large_image_bytes(image_factory):
     """Generate image that's too large (>10MB)"""
-    # Create a large image
-    img = Image.new('RGB', (5000, 5000), color='green')
-    img_bytes = io.BytesIO()
-    img.save(img_bytes, format='JPEG', quality=100)
-    img_bytes.seek(0)
-    return img_bytes.read()
+    return image_factory(size=(5000, 5000), color='green', quality=100)
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def corrupted_image_bytes():
     """Generate corrupted image data"""
     return b"This is not an image, just random bytes: \x89PNG\r\n\x1a\n corrupted"
 
 
+# Built once at import; the models are frozen, so every test can share it
+_CANNED_FOOD_RESULT = FoodAnalysisResponse(
+    food_items=[FoodItem(
+        name='apple', confidence=0.95, grams=150.0, calories=78.0,
+        nutrition={'calories': 78.0, 'protein': 0.4, 'carbs': 20.7, 'fat': 0.3}
+    )],
+    total_calories=78.0,
+    nutrition={'calories': 78.0, 'protein': 0.4, 'carbs': 20.7, 'fat': 0.3},
+    recommendation='Great choice!',
+    xp_gained=20
+)
+
+
 @pytest.fixture
 def mock_food_service():
-    """Mock FoodUploadService"""
-    service = Mock(spec=FoodUploadService)
-    service.process_food_image = AsyncMock()
-    return service
+    """Stub FoodUploadService returning a canned analysis; `calls` records each call"""
+    calls = []
+
+    async def process_food_image(*args, **kwargs):
+        calls.append((args, kwargs))
+        return _CANNED_FOOD_RESULT
+
+    return SimpleNamespace(process_food_image=process_food_image, calls=calls)
 
 
 # ============================================================================
@@ -255,7 +254,7 @@ class TestFoodUploadServiceUnit:
         ])
         service.image_service.estimate_portion_size = Mock(return_value=150.0)
 
-        service.nutrition_service.get_nutrition_info = AsyncMock(return_value={
+        nutrition_info = {
             'name': 'apple',
             'calories': 95.0,
             'protein': 0.5,
@@ -268,7 +267,10 @@ class TestFoodUploadServiceUnit:
             'iron': 0.2,
             'vitamin_a': 100.0,
             'vitamin_c': 8.0
-        })
+        }
+        service.nutrition_service.get_nutrition_info_batch = AsyncMock(
+            side_effect=lambda items: [nutrition_info] * len(items)
+        )
         service.nutrition_service.calculate_total_nutrition = Mock(return_value={
             'calories': 95.0,
             'protein': 0.5,
@@ -429,6 +431,24 @@ class TestFoodAPIIntegration:
         )
         assert response.status_code == 400
 
+    @pytest.mark.parametrize("cursor", [
+        "not-a-cursor",
+        "2024-01-01T00:00:00",
+        "2024-01-01T00:00:00|garbage",
+    ])
+    def test_get_history_invalid_cursor(self, client, mock_user_id, cursor):
+        """Test history rejects a malformed pagination cursor"""
+        app.dependency_overrides[verify_token] = lambda: mock_user_id
+        try:
+            response = client.get(
+                f"/api/v1/food/history?cursor={cursor}",
+                headers={"Authorization": "Bearer token"}
+            )
+        finally:
+            app.dependency_overrides.pop(verify_token, None)
+
+        assert response.status_code == 400
+
     @patch('app.core.security.verify_token')
     def test_get_history_invalid_offset(self, mock_verify, client, mock_user_id):
         """Test history validates offset parameter"""
@@ -682,9 +702,12 @@ class TestFoodAPIPerformance:
         service.image_service.analyze_food_image = AsyncMock(return_value=[
             {'class': 'apple', 'confidence': 0.95, 'bbox': [0, 0, 100, 100]}
         ])
-        service.nutrition_service.get_nutrition_info = AsyncMock(return_value={
+        nutrition_info = {
             'name': 'apple', 'calories': 95.0, 'protein': 0.5
-        })
+        }
+        service.nutrition_service.get_nutrition_info_batch = AsyncMock(
+            side_effect=lambda items: [nutrition_info] * len(items)
+        )
         service.nutrition_service.calculate_total_nutrition = Mock(return_value={})
         service.db_service.save_food_record = AsyncMock(return_value="record-1")
         service.db_service.increment_daily_usage = AsyncMock()
@@ -801,7 +824,9 @@ class TestFoodAPIEdgeCases:
         service.image_service.analyze_food_image = AsyncMock(return_value=[
             {'class': 'unknown_food_12345', 'confidence': 0.85, 'bbox': [0, 0, 100, 100]}
         ])
-        service.nutrition_service.get_nutrition_info = AsyncMock(return_value=None)
+        service.nutrition_service.get_nutrition_info_batch = AsyncMock(
+            side_effect=lambda items: [None] * len(items)
+        )
         service.nutrition_service.calculate_total_nutrition = Mock(return_value={})
         service.db_service.save_food_record = AsyncMock()
         service.db_service.increment_daily_usage = AsyncMock()
@@ -833,9 +858,12 @@ class TestFoodAPIEdgeCases:
             {'class': 'banana', 'confidence': 0.92, 'bbox': [100, 0, 200, 100]},
             {'class': 'orange', 'confidence': 0.88, 'bbox': [200, 0, 300, 100]},
         ])
-        service.nutrition_service.get_nutrition_info = AsyncMock(return_value={
+        nutrition_info = {
             'name': 'fruit', 'calories': 100.0, 'protein': 1.0
-        })
+        }
+        service.nutrition_service.get_nutrition_info_batch = AsyncMock(
+            side_effect=lambda items: [nutrition_info] * len(items)
+        )
         service.nutrition_service.calculate_total_nutrition = Mock(return_value={
             'calories': 300.0
         })
@@ -862,9 +890,12 @@ class TestFoodAPIEdgeCases:
         service.image_service.analyze_food_image = AsyncMock(return_value=[
             {'class': 'water', 'confidence': 0.99, 'bbox': [0, 0, 100, 100]}
         ])
-        service.nutrition_service.get_nutrition_info = AsyncMock(return_value={
+        nutrition_info = {
             'name': 'water', 'calories': 0.0, 'protein': 0.0
-        })
+        }
+        service.nutrition_service.get_nutrition_info_batch = AsyncMock(
+            side_effect=lambda items: [nutrition_info] * len(items)
+        )
         service.nutrition_service.calculate_total_nutrition = Mock(return_value={
             'calories': 0.0
         })
@@ -5,16 +5,13 @@ Coverage Target: 90%
 """
 import pytest
 import asyncio
-from fastapi.testclient import TestClient
 from fastapi import HTTPException
 from unittest.mock import Mock, patch, AsyncMock, MagicMock
 import io
-from PIL import Image
 import json
 from datetime import datetime
 
 # Import the app and services
-from app.main import app
 from app.api.v1.fridge_enhanced import FridgeDetectionService
 from app.services.database_service import DatabaseService
 from app.models.recipe import DetectedIngredient
@@ -24,12 +21,6 @@ from app.models.recipe import DetectedIngredient
 # FIXTURES
 # ============================================================================
 
-@pytest.fixture
-def client():
-    """Test client for API requests"""
-    return TestClient(app)
-
-
 @pytest.fixture
 def mock_auth_token():
     """Mock JWT token for authentication"""
@@ -42,37 +33,22 @@ def mock_user_id():
     return "user-123-456-789"
 
 
-@pytest.fixture
-def sample_fridge_images():
+@pytest.fixture(scope="session")
+def sample_fridge_images(image_factory):
     """Generate sample fridge images (5 images)"""
-    images = []
-    for i in range(5):
-        img = Image.new('RGB', (800, 600), color=(i*50, 100, 150))
-        img_bytes = io.BytesIO()
-        img.save(img_bytes, format='JPEG')
-        img_bytes.seek(0)
-        images.append(img_bytes.read())
-    return images
+    return [image_factory(color=(i*50, 100, 150)) for i in range(5)]
 
 
-@pytest.fixture
-def single_fridge_image():
+@pytest.fixture(scope="session")
+def single_fridge_image(image_factory):
     """Generate single fridge image"""
-    img = Image.new('RGB', (800, 600), color='blue')
-    img_bytes = io.BytesIO()
-    img.save(img_bytes, format='JPEG')
-    img_bytes.seek(0)
-    return img_bytes.read()
+    return image_factory(color='blue')
 
 
-@pytest.fixture
-def large_image():
+@pytest.fixture(scope="session")
+def large_image(image_factory):
     """Generate image > 10MB"""
-    img = Image.new('RGB', (6000, 6000), color='red')
-    img_bytes = io.BytesIO()
-    img.save(img_bytes, format='JPEG', quality=100)
-    img_bytes.seek(0)
-    return img_bytes.read()
+    return image_factory(size=(6000, 6000), quality=100)
 
 
 @pytest.fixture
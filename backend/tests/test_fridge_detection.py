@@ -52,17 +52,21 @@ class TestRecipeMatching:
         # Should be high score for easy, quick recipe
         assert stress_score > 0.5
 
-    def test_ingredient_match_calculation(self):
+    @pytest.mark.asyncio
+    async def test_ingredient_match_calculation(self):
         """Test ingredient matching percentage"""
         service = RecipeMatchingService()
+        service.recipes = [
+            {'recipe_id': '1', 'name': 'Pancakes',
+             'ingredients': ['eggs', 'milk', 'flour', 'sugar'],
+             'cooking_time': 20, 'difficulty': 'easy'},
+        ]
+        service._build_index()
 
-        available = ['eggs', 'milk', 'flour']
-        required = ['eggs', 'milk', 'flour', 'sugar']
-
-        match = service._calculate_ingredient_match(available, required)
+        recipes = await service.match_recipes(['eggs', 'milk', 'flour'], 'stress')
 
         # Should be 75% match (3 out of 4)
-        assert match == 0.75
+        assert recipes[0]['ingredient_match'] == 0.75
 
     def test_minimum_ingredient_threshold(self):
         """Test that recipes need 70%+ ingredients"""
@@ -77,6 +81,105 @@ class TestRecipeMatching:
         # (This depends on recipe database)
         pass
 
+    @pytest.mark.asyncio
+    async def test_tfidf_index_prefilters_recipes(self):
+        """Test the precomputed TF-IDF matrix only surfaces recipes sharing ingredients"""
+        service = RecipeMatchingService()
+        service.recipes = [
+            {'recipe_id': '1', 'name': 'Omelette', 'ingredients': ['Eggs', 'milk', 'butter'],
+             'cooking_time': 10, 'difficulty': 'easy'},
+            {'recipe_id': '2', 'name': 'Salad', 'ingredients': ['lettuce', 'tomato'],
+             'cooking_time': 5, 'difficulty': 'easy'},
+            {'recipe_id': '3', 'name': 'Pancakes',
+             'ingredients': ['eggs', 'milk', 'flour', 'sugar'],
+             'cooking_time': 20, 'difficulty': 'easy'},
+        ]
+        service._build_index()
+
+        assert service.recipe_matrix.shape[0] == 3
+        assert list(service._similar_recipe_indices(['eggs', 'milk'])) == [0, 2]
+
+        recipes = await service.match_recipes(['eggs', 'milk', 'butter', 'salt'], 'stress', top_k=1)
+
+        assert [recipe['name'] for recipe in recipes] == ['Omelette']
+        assert recipes[0]['available_ingredients'] == 3
+
+    @pytest.mark.asyncio
+    async def test_top_k_matches_full_sort(self):
+        """Test the argpartition top-k returns the same order as sorting every candidate"""
+        service = RecipeMatchingService()
+        service.recipes = [
+            {'recipe_id': str(i), 'name': f'Recipe {i}',
+             'ingredients': ['eggs', 'milk', 'flour'][:1 + i % 3],
+             'cooking_time': 5 * (i % 9), 'difficulty': ('easy', 'medium', 'hard')[i % 3]}
+            for i in range(30)
+        ]
+        service._build_index()
+
+        everything = await service.match_recipes(['eggs', 'milk', 'flour'], 'fatigue', top_k=30)
+        top = await service.match_recipes(['eggs', 'milk', 'flour'], 'fatigue', top_k=4)
+
+        expected = sorted(
+            everything,
+            key=lambda r: -(r['emotion_score'] + r['ingredient_match']) / 2
+        )
+        assert len(everything) == 30
+        assert [r['recipe_id'] for r in everything] == [r['recipe_id'] for r in expected]
+        assert [r['recipe_id'] for r in top] == [r['recipe_id'] for r in expected[:4]]
+        assert await service.match_recipes(['eggs'], 'fatigue', top_k=0) == []
+
+    def test_bitmask_search_matches_set_intersection(self):
+        """Test bitmask counts agree with the ingredient match percentage"""
+        service = RecipeMatchingService()
+        service.recipes = [
+            {'recipe_id': '1', 'name': 'Pancakes',
+             'ingredients': ['Eggs', 'milk', 'flour', 'sugar']},
+            {'recipe_id': '2', 'name': 'Crepes',
+             'ingredients': ['eggs', 'milk', 'flour', 'butter', 'salt']},
+        ]
+        service._build_index()
+
+        recipes = service._search_recipes(['eggs', 'MILK', 'flour', 'saffron'])
+
+        assert [recipe['name'] for recipe in recipes] == ['Pancakes']
+        assert recipes[0]['available_ingredients'] == 3
+        assert recipes[0]['total_ingredients'] == 4
+
+    def test_fitted_index_persisted_and_reused(self, tmp_path, monkeypatch):
+        """Test a saved index is loaded instead of refitting, and refit when recipes change"""
+        from app.services import recipe_matching
+        monkeypatch.setattr(recipe_matching, "RECIPE_INDEX_PATH", str(tmp_path / "recipes.joblib"))
+
+        first = RecipeMatchingService()
+        assert (tmp_path / "recipes.joblib").exists()
+
+        monkeypatch.setattr(
+            recipe_matching.TfidfVectorizer, "fit_transform",
+            lambda *args, **kwargs: pytest.fail("index should be loaded, not refitted")
+        )
+        second = RecipeMatchingService()
+
+        assert (second.recipe_matrix != first.recipe_matrix).nnz == 0
+        assert second.vectorizer.vocabulary_ == first.vectorizer.vocabulary_
+
+        second.recipes = second.recipes + [{'recipe_id': '2', 'ingredients': ['rice']}]
+        assert second._load_index(second._index_fingerprint(
+            [recipe['ingredients'] for recipe in second.recipes]
+        )) is None
+
+    def test_service_is_shared_per_process(self, tmp_path, monkeypatch):
+        """Test handlers reuse one fitted service instead of refitting per request"""
+        from app.services import recipe_matching
+        monkeypatch.setattr(recipe_matching, "RECIPE_INDEX_PATH", str(tmp_path / "recipes.joblib"))
+
+        first = recipe_matching.get_recipe_service()
+        monkeypatch.setattr(
+            recipe_matching.TfidfVectorizer, "fit_transform",
+            lambda *args, **kwargs: pytest.fail("shared service should not refit")
+        )
+
+        assert recipe_matching.get_recipe_service() is first
+
 
 class TestShoppingListGeneration:
     """Test suite for shopping list generation"""
@@ -157,6 +260,25 @@ class TestEmotionRecipeMatching:
         # Should allow medium complexity
         assert score >= 0.5
 
+    def test_emotion_scores_match_preference_ranges(self):
+        """Test the precomputed targets score like the preference ranges they come from"""
+        from app.services.recipe_matching import EMOTION_RECIPE_PREFERENCES
+        service = RecipeMatchingService()
+
+        for emotion, ((low, high), difficulty) in EMOTION_RECIPE_PREFERENCES.items():
+            for cooking_time in (0, 5, 12, 30, 45, 90):
+                for recipe_difficulty in ('easy', 'medium', 'hard'):
+                    recipe = {'cooking_time': cooking_time, 'difficulty': recipe_difficulty}
+                    expected = 0.5 + max(0, 1 - abs(cooking_time - (low + high) / 2) / 30) * 0.25
+                    if recipe_difficulty == difficulty:
+                        expected += 0.25
+
+                    assert service._score_by_emotion(recipe, emotion) == pytest.approx(
+                        min(1.0, expected)
+                    )
+
+        assert service._score_by_emotion({'cooking_time': 10}, 'unknown') == 0.5
+
 
 class TestUserPreferencesFiltering:
     """Test filtering by user preferences"""
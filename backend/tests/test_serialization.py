@@ -0,0 +1,60 @@
+"""
+Unit Tests for Response Serialization
+Tests JSON/MessagePack content negotiation
+"""
+import pytest
+import orjson
+
+from app.core.serialization import MSGPACK_MEDIA_TYPE, ndjson_lines, negotiate_response
+from app.models.recipe import DetectedIngredient, FridgeDetectionResponse
+
+ormsgpack = pytest.importorskip("ormsgpack")
+
+
+@pytest.fixture
+def fridge_response():
+    """Sample fridge detection response"""
+    return FridgeDetectionResponse(
+        ingredients=[DetectedIngredient(name="egg", confidence=0.9, quantity="2")],
+        recipes=[{"id": 1, "nutrition": {"protein": 12.5}}],
+        shopping_list=["milk"],
+        emotion_type="stress"
+    )
+
+
+class TestNegotiateResponse:
+    """Test Accept-header driven serialization"""
+
+    def test_defaults_to_json(self, fridge_response):
+        """Test JSON is returned without a MessagePack Accept header"""
+        response = negotiate_response(fridge_response, "application/json")
+
+        assert response.media_type == "application/json"
+        assert orjson.loads(response.body) == fridge_response.model_dump()
+
+    def test_msgpack_when_requested(self, fridge_response):
+        """Test MessagePack body round-trips to the same data"""
+        response = negotiate_response(fridge_response, MSGPACK_MEDIA_TYPE)
+
+        assert response.media_type == MSGPACK_MEDIA_TYPE
+        assert ormsgpack.unpackb(response.body) == fridge_response.model_dump()
+
+    def test_plain_dict_content(self):
+        """Test non-model content is serialized as-is"""
+        response = negotiate_response({"ok": True}, None)
+        assert orjson.loads(response.body) == {"ok": True}
+
+
+class TestNdjsonLines:
+    """Test newline-delimited JSON streaming"""
+
+    @pytest.mark.asyncio
+    async def test_one_line_per_record(self):
+        """Test each record is encoded on its own line"""
+        async def rows():
+            yield {"id": 1}
+            yield {"id": 2}
+
+        chunks = [chunk async for chunk in ndjson_lines(rows())]
+
+        assert chunks == [b'{"id":1}\n', b'{"id":2}\n']
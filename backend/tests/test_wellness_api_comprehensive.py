@@ -5,14 +5,12 @@ Coverage Target: 90%
 """
 import pytest
 import asyncio
-from fastapi.testclient import TestClient
 from fastapi import HTTPException
 from unittest.mock import Mock, patch, AsyncMock, MagicMock
 import json
 from datetime import datetime, timedelta
 
 # Import the app and services
-from app.main import app
 from app.api.v1.wellness_enhanced import WellnessService
 from app.services.emotion_analysis import EmotionAnalysisService
 from app.services.database_service import DatabaseService
@@ -23,12 +21,6 @@ from app.models.emotion import EmotionAnalysisResult
 # FIXTURES
 # ============================================================================
 
-@pytest.fixture
-def client():
-    """Test client for API requests"""
-    return TestClient(app)
-
-
 @pytest.fixture
 def mock_auth_token():
     """Mock JWT token for authentication"""
@@ -79,6 +71,7 @@ def mock_db_service():
     service = Mock(spec=DatabaseService)
     service.save_emotion_data = AsyncMock()
     service.get_emotion_history = AsyncMock(return_value=[])
+    service.get_full_emotion_history = AsyncMock(return_value=([], False))
     service.get_user_preferences = AsyncMock(return_value={})
     return service
 